@@ -0,0 +1,267 @@
+# adaptador.py
+# Camada entre o núcleo e o hardware. Adaptador é a interface: mandar ordens
+# de liga/desliga aos aparelhos e esperar a confirmação do gateway da casa.
+# AdaptadorMQTT fala no estilo MQTT (publish QoS 1 + puback), tudo em asyncio
+# no event loop do app:
+# - pool de conexões persistentes por gateway; cada aparelho usa sempre a
+#   mesma conexão, então as ordens dele chegam na ordem em que foram dadas;
+# - pipelining: várias ordens em voo por conexão (até JANELA), e as publicadas
+#   na mesma volta do loop saem numa escrita só;
+# - o gateway confirma em lote tudo o que chegou junto;
+# - sem confirmação (timeout ou conexão caída): reenvio com backoff
+#   exponencial e jitter, até `tentativas`; depois, FalhaDispositivo;
+# - histograma de latência por categoria de aparelho (metricas()).
+# gateway_local.py tem o broker/gateway em memória para rodar sem hardware.
+import abc
+import asyncio
+import bisect
+import itertools
+import logging
+import os
+import random
+import time
+import zlib
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+TENTATIVAS = int(os.environ.get("SMARTLIGHT_GATEWAY_TENTATIVAS", "4"))
+TIMEOUT = float(os.environ.get("SMARTLIGHT_GATEWAY_TIMEOUT", "2.0"))  # segundos por tentativa
+CONEXOES_POR_GATEWAY = int(os.environ.get("SMARTLIGHT_GATEWAY_CONEXOES", "2"))
+JANELA = 64             # ordens sem confirmação por conexão
+BACKOFF_INICIAL = 0.05  # segundos antes do primeiro reenvio; dobra a cada tentativa
+
+# limites superiores dos baldes do histograma: de 10 µs a ~168 s, quatro por
+# potência de 2 (cada balde ~19% mais largo que o anterior)
+LIMITES = tuple(1e-5 * 2 ** (i / 4) for i in range(97))
+
+
+class FalhaDispositivo(Exception):
+    # o gateway não confirmou a ordem depois de todas as tentativas
+    pass
+
+
+@dataclass
+class Ordem:
+    usuario: str
+    dispositivo: str   # categoria ("lâmpada")
+    comodo: str
+    ligado: bool
+
+    @property
+    def topico(self) -> str:
+        return f"smartlight/{self.usuario}/{self.dispositivo}/{self.comodo}/set"
+
+
+class Histograma:
+    # latências em baldes geométricos: registrar é O(log baldes) e a memória
+    # não cresce com o número de ordens
+    def __init__(self):
+        self.contagens = [0] * (len(LIMITES) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, segundos: float):
+        self.contagens[bisect.bisect_left(LIMITES, segundos)] += 1
+        self.total += 1
+        self.soma += segundos
+        self.maximo = max(self.maximo, segundos)
+
+    def percentil(self, p: float) -> float:
+        # limite superior do balde onde cai o percentil p (0-100)
+        alvo = self.total * p / 100
+        acumulado = 0
+        for i, n in enumerate(self.contagens):
+            acumulado += n
+            if n and acumulado >= alvo:
+                return min(LIMITES[i], self.maximo) if i < len(LIMITES) else self.maximo
+        return 0.0
+
+    def juntar(self, outro: "Histograma"):
+        self.contagens = [a + b for a, b in zip(self.contagens, outro.contagens)]
+        self.total += outro.total
+        self.soma += outro.soma
+        self.maximo = max(self.maximo, outro.maximo)
+
+    def resumo(self) -> dict:
+        return {
+            "ordens": self.total,
+            "media_ms": round(self.soma / self.total * 1000, 3) if self.total else 0.0,
+            "p50_ms": round(self.percentil(50) * 1000, 3),
+            "p99_ms": round(self.percentil(99) * 1000, 3),
+            "max_ms": round(self.maximo * 1000, 3),
+        }
+
+
+class Adaptador(abc.ABC):
+    # interface: enviar() devolve quando o aparelho confirmou ou levanta
+    # FalhaDispositivo; chamar sempre no mesmo event loop
+    @abc.abstractmethod
+    async def enviar(self, ordem: Ordem):
+        ...
+
+    async def enviar_varios(self, ordens) -> list:
+        # erro de cada ordem, na mesma ordem (None = confirmada)
+        return [r if isinstance(r, Exception) else None
+                for r in await asyncio.gather(*(self.enviar(o) for o in ordens), return_exceptions=True)]
+
+    def metricas(self) -> dict:
+        return {}
+
+    async def fechar(self):
+        pass
+
+
+class _Conexao:
+    # uma conexão persistente com o gateway e as ordens em voo nela
+    def __init__(self, canal):
+        self.canal = canal
+        self.viva = True
+        self.pendentes = {}  # id -> future da confirmação
+        self.vagas = asyncio.Semaphore(JANELA)
+        self._saida = []
+        self._loop = asyncio.get_running_loop()
+        self._leitor = self._loop.create_task(self._ler())
+
+    def publicar(self, ident: int, topico: str, payload: str, dup: bool) -> asyncio.Future:
+        confirmacao = self._loop.create_future()
+        self.pendentes[ident] = confirmacao
+        if not self._saida:
+            self._loop.call_soon(self._descarregar)
+        self._saida.append(("publish", ident, topico, payload, dup))
+        return confirmacao
+
+    def _descarregar(self):
+        saida, self._saida = self._saida, []
+        if not self.viva:
+            return
+        try:
+            self.canal.escrever(saida)
+        except ConnectionError as e:
+            self._cair(e)
+
+    async def _ler(self):
+        try:
+            while True:
+                tipo, ids = await self.canal.ler()
+                if tipo != "puback":
+                    continue
+                for ident in ids:
+                    confirmacao = self.pendentes.pop(ident, None)
+                    if confirmacao is not None and not confirmacao.done():
+                        confirmacao.set_result(None)
+        except ConnectionError as e:
+            self._cair(e)
+
+    def _cair(self, erro):
+        # quem esperava confirmação aqui reenvia por outra conexão
+        self.viva = False
+        pendentes, self.pendentes = self.pendentes, {}
+        for confirmacao in pendentes.values():
+            if not confirmacao.done():
+                confirmacao.set_exception(ConnectionError(str(erro)))
+
+    def fechar(self):
+        self.viva = False
+        self._leitor.cancel()
+        self.canal.fechar()
+
+
+class AdaptadorMQTT(Adaptador):
+    def __init__(self, conectar, gateway_de=None, conexoes_por_gateway: int = CONEXOES_POR_GATEWAY,
+                 tentativas: int = TENTATIVAS, timeout: float = TIMEOUT, backoff: float = BACKOFF_INICIAL):
+        # conectar(gateway) -> corrotina que abre um canal (escrever/ler/fechar)
+        # gateway_de(usuario) -> nome do gateway da casa (padrão: o próprio usuário)
+        self.conectar = conectar
+        self.gateway_de = gateway_de or (lambda usuario: usuario)
+        self.conexoes_por_gateway = max(1, conexoes_por_gateway)
+        self.tentativas = max(1, tentativas)
+        self.timeout = timeout
+        self.backoff = backoff
+        self._pools = {}  # gateway -> [_Conexao ou tarefa abrindo a conexão]
+        self._ids = itertools.count(1)  # crescente: o gateway descarta ordem mais velha que a aplicada
+        self.latencias = {}  # categoria -> Histograma
+        self.reenvios = 0
+        self.falhas = 0
+        self.conexoes_abertas = 0
+
+    async def _conexao(self, gateway: str, topico: str) -> _Conexao:
+        # sempre a mesma vaga do pool para o mesmo tópico; conexão pronta sai sem await
+        pool = self._pools.setdefault(gateway, [None] * self.conexoes_por_gateway)
+        i = zlib.crc32(topico.encode()) % len(pool)
+        atual = pool[i]
+        if isinstance(atual, _Conexao) and atual.viva:
+            return atual
+        if not isinstance(atual, asyncio.Task):
+            # quem chegar enquanto abre espera a mesma tarefa
+            atual = pool[i] = asyncio.get_running_loop().create_task(self._abrir(gateway))
+        try:
+            conexao = await asyncio.shield(atual)
+        except Exception:
+            if pool[i] is atual:
+                pool[i] = None
+            raise
+        if pool[i] is atual:
+            pool[i] = conexao
+        return conexao
+
+    async def _abrir(self, gateway: str) -> _Conexao:
+        canal = await asyncio.wait_for(self.conectar(gateway), self.timeout)
+        self.conexoes_abertas += 1
+        return _Conexao(canal)
+
+    async def enviar(self, ordem: Ordem):
+        inicio = time.perf_counter()
+        ident = next(self._ids)
+        topico = ordem.topico
+        payload = "1" if ordem.ligado else "0"
+        gateway = self.gateway_de(ordem.usuario)
+        espera = self.backoff
+        for tentativa in range(self.tentativas):
+            conexao = None
+            try:
+                conexao = await self._conexao(gateway, topico)
+                async with conexao.vagas:
+                    await asyncio.wait_for(conexao.publicar(ident, topico, payload, tentativa > 0), self.timeout)
+                hist = self.latencias.get(ordem.dispositivo)
+                if hist is None:
+                    hist = self.latencias[ordem.dispositivo] = Histograma()
+                hist.registrar(time.perf_counter() - inicio)
+                return
+            except (ConnectionError, asyncio.TimeoutError) as e:
+                if conexao is not None:
+                    conexao.pendentes.pop(ident, None)
+                if tentativa + 1 == self.tentativas:
+                    self.falhas += 1
+                    raise FalhaDispositivo(f"{ordem.dispositivo} ({ordem.comodo}) não confirmou: {e!r}") from e
+                self.reenvios += 1
+                log.debug("reenviando %s (tentativa %d): %r", topico, tentativa + 2, e)
+                await asyncio.sleep(espera * random.uniform(0.5, 1.5))
+                espera *= 2
+
+    def metricas(self) -> dict:
+        todas = Histograma()
+        for hist in self.latencias.values():
+            todas.juntar(hist)
+        return {
+            "latencia": {"todas": todas.resumo(), **{c: h.resumo() for c, h in self.latencias.items()}},
+            "reenvios": self.reenvios,
+            "falhas": self.falhas,
+            "conexoes_abertas": self.conexoes_abertas,
+        }
+
+    async def fechar(self):
+        for pool in self._pools.values():
+            for atual in pool:
+                if isinstance(atual, _Conexao):
+                    atual.fechar()
+                elif isinstance(atual, asyncio.Task):
+                    atual.cancel()
+        self._pools.clear()
+
+
+def adaptador_padrao() -> Adaptador:
+    # sem hardware configurado: o gateway em memória (gateway_local.py)
+    import gateway_local
+    return AdaptadorMQTT(gateway_local.GatewayLocal().conectar)
@@ -0,0 +1,342 @@
+# agendador.py
+# Motor único de agendamentos: uma thread, um heap mínimo por horário de disparo,
+# cancelamento por id em O(log n) e persistência no SQLite (tabela agendamentos).
+# Agendamentos recorrentes (regra != 0) voltam para o heap com o próximo horário
+# a cada disparo, sem thread nem timer por regra.
+# Com iniciar(loop=...) o laço vira uma tarefa do event loop (o mesmo do Flet)
+# e o banco e o executor rodam no executor do banco, sem thread própria; com
+# executor_async, os vencidos juntos são despachados de uma vez no próprio loop.
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import banco
+import recorrencia
+
+log = logging.getLogger(__name__)
+
+# Política para agendamentos perdidos enquanto o processo estava parado
+RECUPERAR_TODOS = "executar"
+DESCARTAR = "descartar"
+RECUPERAR_RECENTES = "recentes"  # executa só os atrasados até janela_recuperacao
+
+SQL_INSERIR = "INSERT INTO agendamentos (usuario, dispositivo, comodo, acao, quando, regra) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_REMOVER = "DELETE FROM agendamentos WHERE id = ?"
+SQL_REPROGRAMAR = "UPDATE agendamentos SET quando = ? WHERE id = ?"
+SQL_CARREGAR = "SELECT id, usuario, dispositivo, comodo, acao, quando, regra FROM agendamentos"
+
+
+@dataclass
+class Agendamento:
+    id: int
+    usuario: str
+    dispositivo: str
+    comodo: str
+    acao: bool
+    quando: float  # epoch em segundos
+    atrasado: bool = False
+    regra: int = 0  # recorrencia.criar(...); 0 = disparo único
+
+
+class _HeapIndexado:
+    # heap mínimo de (quando, id) que sabe a posição de cada id,
+    # permitindo remover qualquer entrada em O(log n)
+
+    def __init__(self):
+        self._itens = []
+        self._pos = {}
+
+    def __len__(self):
+        return len(self._itens)
+
+    def topo(self):
+        return self._itens[0] if self._itens else None
+
+    def inserir(self, quando, ident):
+        self._itens.append((quando, ident))
+        self._pos[ident] = len(self._itens) - 1
+        self._subir(len(self._itens) - 1)
+
+    def remover(self, ident):
+        i = self._pos.pop(ident, None)
+        if i is None:
+            return False
+        ultimo = self._itens.pop()
+        if i < len(self._itens):
+            self._itens[i] = ultimo
+            self._pos[ultimo[1]] = i
+            self._subir(i)
+            self._descer(self._pos[ultimo[1]])
+        return True
+
+    def _trocar(self, a, b):
+        itens = self._itens
+        itens[a], itens[b] = itens[b], itens[a]
+        self._pos[itens[a][1]] = a
+        self._pos[itens[b][1]] = b
+
+    def _subir(self, i):
+        while i > 0:
+            pai = (i - 1) >> 1
+            if self._itens[i] < self._itens[pai]:
+                self._trocar(i, pai)
+                i = pai
+            else:
+                break
+
+    def _descer(self, i):
+        n = len(self._itens)
+        while True:
+            menor = i
+            esq, dir_ = 2 * i + 1, 2 * i + 2
+            if esq < n and self._itens[esq] < self._itens[menor]:
+                menor = esq
+            if dir_ < n and self._itens[dir_] < self._itens[menor]:
+                menor = dir_
+            if menor == i:
+                return
+            self._trocar(i, menor)
+            i = menor
+
+
+class Agendador:
+    def __init__(self, executor=None, politica=RECUPERAR_RECENTES, janela_recuperacao=3600, persistir=True,
+                 executor_async=None):
+        # executor(agendamento) é chamado na thread do agendador (no modo loop,
+        # numa thread do executor do banco)
+        # executor_async([agendamentos]) é uma corrotina; no modo loop, tem
+        # preferência e roda como tarefa do loop, sem segurar o laço
+        self.executor = executor
+        self.executor_async = executor_async
+        self.politica = politica
+        self.janela_recuperacao = janela_recuperacao
+        self.persistir = persistir
+        self._heap = _HeapIndexado()
+        self._por_id = {}
+        self._por_usuario = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._loop = None
+        self._tarefa = None
+        self._acordar = None  # asyncio.Event do laço assíncrono
+        self._despachos = set()  # tarefas de executor_async em andamento
+        self._parar = False
+        self._proximo_id_local = -1  # ids negativos quando não persiste
+
+    # ciclo de vida
+
+    def iniciar(self, loop: asyncio.AbstractEventLoop = None):
+        # loop: roda como tarefa desse event loop em vez de numa thread própria
+        with self._cond:
+            if self._thread is not None or self._tarefa is not None:
+                return self
+            self._parar = False
+            if loop is not None:
+                self._loop = loop
+                self._tarefa = asyncio.run_coroutine_threadsafe(self._laco_async(), loop)
+                return self
+            if self.persistir:
+                self._carregar()
+            self._thread = threading.Thread(target=self._laco, name="agendador", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self, timeout=None):
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+            thread, tarefa = self._thread, self._tarefa
+        self._acordar_loop()
+        if thread is not None:
+            thread.join(timeout)
+        if tarefa is not None:
+            try:
+                tarefa.result(timeout)
+            except Exception:
+                log.exception("laço assíncrono do agendador terminou com erro")
+        self._thread = self._tarefa = self._loop = None
+
+    def _acordar_loop(self):
+        if self._loop is not None and self._acordar is not None:
+            self._loop.call_soon_threadsafe(self._acordar.set)
+
+    def _carregar_com_lock(self):
+        with self._cond:
+            self._carregar()
+
+    def _carregar(self):
+        with banco.conexao() as conn:
+            rows = conn.execute(SQL_CARREGAR).fetchall()
+        agora = time.time()
+        descartados = []
+        reprogramados = []
+        for ident, usuario, disp, comodo, acao, quando, regra in rows:
+            if ident in self._por_id:
+                continue
+            atrasado = quando < agora
+            if atrasado and not self._recuperar(agora - quando):
+                if not regra:
+                    descartados.append((ident,))
+                    continue
+                # a regra continua valendo: pula para o próximo horário
+                quando, atrasado = recorrencia.proxima(regra, agora), False
+                reprogramados.append((quando, ident))
+            self._adicionar(Agendamento(ident, usuario, disp, comodo, bool(acao), quando, atrasado, regra))
+        if descartados or reprogramados:
+            with banco.conexao() as conn:
+                conn.executemany(SQL_REMOVER, descartados)
+                conn.executemany(SQL_REPROGRAMAR, reprogramados)
+
+    def _recuperar(self, atraso):
+        if self.politica == RECUPERAR_TODOS:
+            return True
+        if self.politica == DESCARTAR:
+            return False
+        return atraso <= self.janela_recuperacao
+
+    # API
+
+    def agendar(self, usuario, dispositivo, comodo, acao, quando=None, regra=0):
+        # com regra, quando=None usa o próximo horário da regra
+        if quando is None:
+            quando = recorrencia.proxima(regra, time.time())
+        if self.persistir:
+            with banco.conexao() as conn:
+                ident = conn.execute(SQL_INSERIR, (usuario, dispositivo, comodo, int(acao), quando, regra)).lastrowid
+        else:
+            with self._cond:
+                ident = self._proximo_id_local
+                self._proximo_id_local -= 1
+        ag = Agendamento(ident, usuario, dispositivo, comodo, bool(acao), quando, regra=regra)
+        with self._cond:
+            self._adicionar(ag)
+            primeiro = self._heap.topo()[1] == ident
+            if primeiro:
+                self._cond.notify()
+        if primeiro:
+            self._acordar_loop()
+        return ag
+
+    def cancelar(self, ident):
+        with self._cond:
+            ag = self._retirar(ident)
+        if ag is not None and self.persistir:
+            with banco.conexao() as conn:
+                conn.execute(SQL_REMOVER, (ident,))
+        return ag
+
+    def listar(self, usuario):
+        with self._cond:
+            ids = self._por_usuario.get(usuario, ())
+            return sorted((self._por_id[i] for i in ids), key=lambda a: a.quando)
+
+    def pendentes(self):
+        return len(self._heap)
+
+    # internos (chamados com _cond adquirido)
+
+    def _adicionar(self, ag):
+        self._por_id[ag.id] = ag
+        self._por_usuario.setdefault(ag.usuario, set()).add(ag.id)
+        self._heap.inserir(ag.quando, ag.id)
+
+    def _retirar(self, ident):
+        ag = self._por_id.pop(ident, None)
+        if ag is None:
+            return None
+        self._heap.remover(ident)
+        ids = self._por_usuario.get(ag.usuario)
+        if ids is not None:
+            ids.discard(ident)
+            if not ids:
+                del self._por_usuario[ag.usuario]
+        return ag
+
+    def _espera(self):
+        # com _cond: segundos até o próximo disparo (None = heap vazio)
+        topo = self._heap.topo()
+        return None if topo is None else topo[0] - time.time()
+
+    def _tirar_vencido(self):
+        # com _cond: retira o primeiro do heap; recorrente volta com o próximo horário
+        ag = self._retirar(self._heap.topo()[1])
+        proximo = None
+        if ag.regra:
+            proximo = Agendamento(ag.id, ag.usuario, ag.dispositivo, ag.comodo, ag.acao,
+                                  recorrencia.proxima(ag.regra, max(ag.quando, time.time())),
+                                  regra=ag.regra)
+            self._adicionar(proximo)
+        return ag, proximo
+
+    def _laco(self):
+        while True:
+            with self._cond:
+                while not self._parar:
+                    espera = self._espera()
+                    if espera is not None and espera <= 0:
+                        break
+                    self._cond.wait(espera)
+                if self._parar:
+                    return
+                ag, proximo = self._tirar_vencido()
+            self._disparar(ag, proximo)
+
+    async def _laco_async(self):
+        self._acordar = asyncio.Event()
+        if self.persistir:
+            await banco.executar(self._carregar_com_lock)
+        while True:
+            with self._cond:
+                if self._parar:
+                    return
+                # limpa antes de olhar o heap: um agendar() depois daqui acorda o laço
+                self._acordar.clear()
+                espera = self._espera()
+                vencidos = []
+                while espera is not None and espera <= 0:
+                    vencidos.append(self._tirar_vencido())
+                    espera = self._espera()
+            if not vencidos:
+                try:
+                    await asyncio.wait_for(self._acordar.wait(), espera)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if self.executor_async is None:
+                for vencido in vencidos:
+                    await banco.executar(self._disparar, *vencido)
+                continue
+            # tudo o que venceu junto (22:00 de muitos usuários): uma transação
+            # no banco e um despacho só, que não segura o próximo disparo
+            await banco.executar(self._gravar, vencidos)
+            tarefa = asyncio.get_running_loop().create_task(self._despachar([ag for ag, _ in vencidos]))
+            self._despachos.add(tarefa)
+            tarefa.add_done_callback(self._despachos.discard)
+
+    async def _despachar(self, ags):
+        try:
+            await self.executor_async(ags)
+        except Exception:
+            log.exception("falha ao executar %d agendamento(s)", len(ags))
+
+    def _gravar(self, vencidos):
+        # disparo único sai da tabela; recorrente vai para o próximo horário
+        if not self.persistir:
+            return
+        try:
+            with banco.conexao() as conn:
+                conn.executemany(SQL_REMOVER, [(ag.id,) for ag, proximo in vencidos if proximo is None])
+                conn.executemany(SQL_REPROGRAMAR, [(proximo.quando, ag.id) for ag, proximo in vencidos
+                                                   if proximo is not None])
+        except Exception:
+            log.exception("falha ao atualizar %d agendamento(s)", len(vencidos))
+
+    def _disparar(self, ag, proximo):
+        self._gravar([(ag, proximo)])
+        if self.executor is not None:
+            try:
+                self.executor(ag)
+            except Exception:
+                log.exception("falha ao executar agendamento %s", ag.id)
@@ -1,6 +1,7 @@
 import flet as ft
-import sqlite3
-import hashlib
+import asyncio
+import banco
+import credenciais
 from menu import carregar_dashboard
 
 
@@ -8,50 +9,22 @@ from menu import carregar_dashboard
 # Funções auxiliares do Banco
 # ==============================
 def criar_banco():
-    with sqlite3.connect("usuarios.db", timeout=5, check_same_thread=False) as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT,
-                email TEXT UNIQUE NOT NULL,
-                senha TEXT NOT NULL
-            )
-        """)
-        # garante que a coluna 'nome' existe
-        try:
-            cursor.execute("ALTER TABLE usuarios ADD COLUMN nome TEXT")
-        except sqlite3.OperationalError:
-            pass  # já existe
-        conn.commit()
+    # as tabelas saem das migrações (migracoes.py), aplicadas uma vez quando o
+    # pool do banco é criado; chamar de novo não custa nada
+    banco.pool()
 
 
 def hash_senha(senha):
-    return hashlib.sha256(senha.encode()).hexdigest()
+    return credenciais.gerar_hash(senha)
 
 
+# versões bloqueantes (scripts e benchmarks); as telas usam credenciais.servico
 def cadastrar_usuario(email, senha, nome="Usuário"):
-    try:
-        with sqlite3.connect("usuarios.db", timeout=5, check_same_thread=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO usuarios (nome, email, senha) VALUES (?, ?, ?)",
-                (nome, email, hash_senha(senha))
-            )
-            conn.commit()
-        return True, "Usuário cadastrado com sucesso!"
-    except sqlite3.IntegrityError:
-        return False, "E-mail já cadastrado."
-    except sqlite3.OperationalError as e:
-        return False, f"Erro no banco: {e}"
+    return credenciais.servico.cadastrar(email, senha, nome).result()
 
 
 def verificar_credenciais(email, senha):
-    with sqlite3.connect("usuarios.db", timeout=5, check_same_thread=False) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT senha FROM usuarios WHERE email = ?", (email,))
-        row = cursor.fetchone()
-    return row and row[0] == hash_senha(senha)
+    return credenciais.servico.verificar(email, senha).result()
 
 
 # ==============================
@@ -64,10 +37,19 @@ def tela_login(page: ft.Page):
     email = ft.TextField(label="E-mail", width=300, border_radius=10)
     senha = ft.TextField(label="Senha", password=True, can_reveal_password=True, width=300, border_radius=10)
 
-    def login(e):
-        if verificar_credenciais(email.value, senha.value):
+    async def login(e):
+        # o scrypt roda no pool de credenciais; o loop só espera o resultado
+        entrar_btn.disabled = True
+        page.update()
+        email_digitado = email.value
+        try:
+            ok = await asyncio.wrap_future(credenciais.servico.verificar(email_digitado, senha.value))
+        except Exception:
+            ok = False
+        entrar_btn.disabled = False
+        if ok:
             # guarda e-mail do usuário logado
-            page.session.set("usuario_email", email.value)
+            page.session.set("usuario_email", email_digitado)
             carregar_dashboard(page)
         else:
             page.snack_bar = ft.SnackBar(
@@ -111,8 +93,15 @@ def tela_cadastro(page: ft.Page):
     cad_email = ft.TextField(label="E-mail", width=300, border_radius=10)
     cad_senha = ft.TextField(label="Senha", password=True, width=300, border_radius=10)
 
-    def salvar(e):
-        ok, msg = cadastrar_usuario(cad_email.value, cad_senha.value, cad_nome.value if cad_nome.value else "Usuário")
+    async def salvar(e):
+        salvar_btn.disabled = True
+        page.update()
+        try:
+            ok, msg = await asyncio.wrap_future(credenciais.servico.cadastrar(
+                cad_email.value, cad_senha.value, cad_nome.value if cad_nome.value else "Usuário"))
+        except Exception as erro:
+            ok, msg = False, f"Erro no banco: {erro}"
+        salvar_btn.disabled = False
         page.snack_bar = ft.SnackBar(
             content=ft.Text(msg, color="white"),
             bgcolor="green" if ok else "red",
@@ -152,13 +141,15 @@ def tela_cadastro(page: ft.Page):
 # ==============================
 # Inicialização
 # ==============================
-def main(page: ft.Page):
+async def main(page: ft.Page):
     page.bgcolor = "#0F1B2D"
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
 
-    criar_banco()
     tela_login(page)
 
 
-ft.app(target=main)
+if __name__ == "__main__":
+    # esquema migrado uma vez, antes de aceitar sessões
+    criar_banco()
+    ft.app(target=main)
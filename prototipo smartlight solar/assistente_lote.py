@@ -0,0 +1,134 @@
+# assistente_lote.py
+# Executa comandos do assistente sem interface, lendo uma frase por linha de um
+# arquivo ou da entrada padrão, e grava um resultado JSON por linha.
+#
+# Formatos de linha aceitos:
+#   ligue a lâmpada da sala de estar
+#   usuario@email.com<TAB>ligue a lâmpada da sala de estar
+#   {"usuario": "usuario@email.com", "texto": "ligue a lâmpada da sala de estar"}
+#
+# Uso:
+#   python assistente_lote.py comandos.txt -o resultados.jsonl
+#   cat comandos.txt | python assistente_lote.py - --vazao
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import banco
+import recorrencia
+from estado import repositorio
+from eventos_uso import log_uso
+from nucleo import Controlador
+
+
+def ler_comandos(linhas, usuario_padrao):
+    for n, linha in enumerate(linhas, 1):
+        linha = linha.rstrip("\r\n")
+        if not linha.strip():
+            continue
+        if linha.lstrip().startswith("{"):
+            dados = json.loads(linha)
+            yield n, dados.get("usuario", usuario_padrao), dados["texto"]
+        elif "\t" in linha:
+            usuario, texto = linha.split("\t", 1)
+            yield n, usuario or usuario_padrao, texto
+        else:
+            yield n, usuario_padrao, linha
+
+
+def resultado_json(n, usuario, texto, res, latencia):
+    cmd = res.comando
+    return {
+        "linha": n,
+        "usuario": usuario,
+        "texto": texto,
+        "ok": cmd.ok,
+        "acao": None if cmd.acao is None else ("ligar" if cmd.acao else "desligar"),
+        "dispositivo": cmd.dispositivo,
+        "comodo": cmd.comodo,
+        "quando": cmd.quando.isoformat() if cmd.quando else None,
+        "cena": cmd.cena,
+        "recorrencia": recorrencia.descrever(cmd.recorrencia) if cmd.recorrencia else None,
+        "agendamento": res.agendamento,
+        "mensagem": res.mensagem,
+        "latencia_ms": round(latencia * 1000, 4),
+    }
+
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    i = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[i]
+
+
+def executar(entrada, saida, controlador, usuario_padrao="", rnd=None, escrever=True):
+    latencias = []
+    inicio = time.perf_counter()
+    for n, usuario, texto in ler_comandos(entrada, usuario_padrao):
+        t0 = time.perf_counter()
+        res = controlador.executar_comando(usuario, texto, rnd)
+        dur = time.perf_counter() - t0
+        latencias.append(dur)
+        if escrever:
+            saida.write(json.dumps(resultado_json(n, usuario, texto, res, dur), ensure_ascii=False) + "\n")
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "comandos": len(latencias),
+        "segundos": round(total, 4),
+        "comandos_por_segundo": round(len(latencias) / total, 1) if total > 0 else 0.0,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 4),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 4),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Assistente SmartLight em modo lote")
+    ap.add_argument("entrada", nargs="?", default="-", help="arquivo com um comando por linha (- para stdin)")
+    ap.add_argument("-o", "--saida", default="-", help="arquivo JSON lines de saída (- para stdout)")
+    ap.add_argument("--usuario", default="lote", help="usuário das linhas sem usuário")
+    ap.add_argument("--db", help="banco SQLite a usar (padrão: um banco temporário descartável)")
+    ap.add_argument("--semente", type=int, help="semente para respostas reproduzíveis")
+    ap.add_argument("--vazao", action="store_true", help="mostra comandos/s e latências p50/p99 no stderr")
+    ap.add_argument("--sem-saida", action="store_true", help="não grava os resultados (só mede)")
+    args = ap.parse_args(argv)
+
+    tmp = None
+    if args.db:
+        banco.configurar(args.db)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        banco.configurar(os.path.join(tmp.name, "lote.db"))
+
+    # agendamentos são só registrados: o agendador não é iniciado no modo lote
+    controlador = Controlador()
+    rnd = random.Random(args.semente) if args.semente is not None else None
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    try:
+        resumo = executar(entrada, saida, controlador, args.usuario, rnd, not args.sem_saida)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+        controlador.parar()
+        repositorio.fechar()
+        log_uso.fechar()
+        banco.pool().fechar()
+        if tmp is not None:
+            tmp.cleanup()
+
+    if args.vazao:
+        print(json.dumps(resumo), file=sys.stderr)
+    return resumo
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# atualizacoes.py
+# Junta pedidos de page.update() e avisos (snack bar) que chegam em rajada e
+# envia no máximo um update por intervalo de quadro. Pode ser chamado tanto
+# dos handlers da interface quanto das threads do agendador. Com um event loop
+# (page.loop), o envio sempre acontece na thread do loop, nunca na de quem pediu.
+import asyncio
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# intervalo mínimo entre dois envios (segundos); 16-50 ms é o razoável
+INTERVALO_PADRAO = int(os.environ.get("SMARTLIGHT_INTERVALO_UPDATE_MS", "33")) / 1000
+
+
+class Coalescedor:
+    def __init__(self, atualizar, mostrar_aviso=None, intervalo: float = INTERVALO_PADRAO,
+                 loop: asyncio.AbstractEventLoop = None):
+        # atualizar(*controles) -> page.update; sem controles = página inteira
+        # mostrar_aviso(texto) prepara o snack bar, sem chamar update
+        self.atualizar = atualizar
+        self.mostrar_aviso = mostrar_aviso
+        self.intervalo = intervalo
+        self.loop = loop
+        self._lock = threading.Lock()
+        self._sujos = {}  # id(controle) -> controle
+        self._tudo = False
+        self._avisos = []
+        self._timer = None
+        self._ultimo = 0.0
+        self.pedidos = 0
+        self.enviados = 0
+        self.avisos = 0
+
+    def pedir(self, *controles):
+        # marca controles (ou a página toda) para o próximo envio
+        with self._lock:
+            self.pedidos += 1
+            if controles:
+                for c in controles:
+                    self._sujos[id(c)] = c
+            else:
+                self._tudo = True
+            imediato = self._agendar()
+        if imediato:
+            self.enviar()
+
+    def avisar(self, mensagem: str):
+        with self._lock:
+            self.pedidos += 1
+            self.avisos += 1
+            self._avisos.append(mensagem)
+            self._tudo = True
+            imediato = self._agendar()
+        if imediato:
+            self.enviar()
+
+    def _agendar(self):
+        # com o lock: True se quem pediu deve enviar agora (quadro livre)
+        if self._timer is not None:
+            return False
+        espera = self._ultimo + self.intervalo - time.monotonic()
+        if self.loop is not None:
+            if espera <= 0 and self._no_loop():
+                self._ultimo = time.monotonic()
+                return True
+            # de outra thread (ou quadro ocupado): o loop envia
+            self._timer = self.loop.call_soon_threadsafe(self._armar, max(espera, 0))
+            return False
+        if espera <= 0:
+            self._ultimo = time.monotonic()
+            return True
+        self._timer = threading.Timer(espera, self.enviar)
+        self._timer.daemon = True
+        self._timer.start()
+        return False
+
+    def _no_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _armar(self, espera):
+        # na thread do loop
+        with self._lock:
+            if self._timer is None:
+                return  # já enviado ou fechado
+            self._timer = self.loop.call_later(espera, self.enviar) if espera > 0 else None
+        if espera <= 0:
+            self.enviar()
+
+    def enviar(self):
+        with self._lock:
+            self._timer = None
+            if not (self._tudo or self._sujos):
+                return
+            controles = list(self._sujos.values())
+            tudo, avisos = self._tudo, self._avisos
+            self._sujos, self._tudo, self._avisos = {}, False, []
+            self._ultimo = time.monotonic()
+            self.enviados += 1
+        try:
+            if avisos and self.mostrar_aviso:
+                texto = avisos[-1]
+                if len(avisos) > 1:
+                    texto += f" (+{len(avisos) - 1} outras mudanças)"
+                self.mostrar_aviso(texto)
+            if tudo:
+                self.atualizar()
+            else:
+                self.atualizar(*controles)
+        except Exception:
+            # página fechada ou desconectada
+            log.exception("falha ao atualizar a página")
+
+    def fechar(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.enviar()
+
+    def contadores(self) -> dict:
+        with self._lock:
+            return {
+                "pedidos": self.pedidos,
+                "enviados": self.enviados,
+                "avisos": self.avisos,
+                "economizados": self.pedidos - self.enviados,
+            }
@@ -0,0 +1,185 @@
+# banco.py
+# Camada única de acesso ao SQLite: pool de conexões reaproveitadas, modo WAL
+# e caminho do banco configurável (variável SMARTLIGHT_DB ou configurar()).
+# O esquema é migrado uma vez, quando o pool de um banco é criado (migracoes.py).
+# Handlers assíncronos usam `await banco.executar(fn, ...)` para tirar o SQLite
+# do event loop.
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import migracoes
+
+DB_PADRAO = os.environ.get("SMARTLIGHT_DB", "usuarios.db")
+TAMANHO_POOL = int(os.environ.get("SMARTLIGHT_DB_POOL", "4"))
+TIMEOUT = 5
+
+# Consultas usadas pelas telas (o sqlite3 guarda o statement preparado por
+# conexão, então manter o texto idêntico garante o reuso)
+
+SQL_INSERIR_USUARIO = "INSERT INTO usuarios (nome, email, senha) VALUES (?, ?, ?)"
+SQL_SENHA_POR_EMAIL = "SELECT senha FROM usuarios WHERE email = ?"
+SQL_USUARIO_POR_EMAIL = "SELECT nome, email FROM usuarios WHERE email = ?"
+SQL_ATUALIZAR_NOME_SENHA = "UPDATE usuarios SET nome=?, senha=? WHERE email=?"
+SQL_ATUALIZAR_NOME = "UPDATE usuarios SET nome=? WHERE email=?"
+SQL_ATUALIZAR_SENHA = "UPDATE usuarios SET senha=? WHERE email=?"
+SQL_REGRAVAR_SENHA = "UPDATE usuarios SET senha=? WHERE email=? AND senha=?"
+
+
+class PoolConexoes:
+    def __init__(self, caminho: str, tamanho: int = TAMANHO_POOL, timeout: float = TIMEOUT):
+        self.caminho = caminho
+        self.tamanho = max(1, tamanho)
+        self.timeout = timeout
+        self._livres = queue.LifoQueue(maxsize=self.tamanho)
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+    def _nova_conexao(self):
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        # WAL: leitores não bloqueiam o escritor (login em rajada)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def obter(self):
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            pode_criar = self._criadas < self.tamanho
+            if pode_criar:
+                self._criadas += 1
+        if pode_criar:
+            try:
+                return self._nova_conexao()
+            except sqlite3.Error:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+        try:
+            return self._livres.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("pool de conexões esgotado") from None
+
+    def devolver(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put_nowait(conn)
+
+    def descartar(self, conn):
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._criadas -= 1
+
+    @contextmanager
+    def conexao(self):
+        conn = self.obter()
+        try:
+            with conn:  # commit no sucesso, rollback na exceção
+                yield conn
+        except (sqlite3.IntegrityError, sqlite3.OperationalError):
+            self.devolver(conn)
+            raise
+        except BaseException:
+            # estado desconhecido: não volta para o pool
+            self.descartar(conn)
+            raise
+        else:
+            self.devolver(conn)
+
+    def migrar(self):
+        # esquema em dia antes da primeira consulta (uma vez por pool)
+        conn = self.obter()
+        try:
+            migracoes.migrar(conn)
+        except BaseException:
+            self.descartar(conn)
+            raise
+        self.devolver(conn)
+        return self
+
+    def fechar(self):
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self.descartar(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_executor = None
+
+
+def configurar(caminho: str = None, tamanho: int = None):
+    # troca o banco em uso (ex.: testes, benchmarks ou deploy web)
+    global _pool
+    with _pool_lock:
+        antigo = _pool
+        _pool = PoolConexoes(
+            caminho or (antigo.caminho if antigo else DB_PADRAO),
+            tamanho or (antigo.tamanho if antigo else TAMANHO_POOL),
+        ).migrar()
+    if antigo is not None:
+        antigo.fechar()
+    _trocar_executor()
+    return _pool
+
+
+def pool() -> PoolConexoes:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(DB_PADRAO).migrar()
+    return _pool
+
+
+def caminho_banco() -> str:
+    return pool().caminho
+
+
+def conexao():
+    return pool().conexao()
+
+
+def _trocar_executor():
+    global _executor
+    with _pool_lock:
+        antigo, _executor = _executor, None
+    if antigo is not None:
+        antigo.shutdown(wait=False)
+
+
+def executor() -> ThreadPoolExecutor:
+    # uma thread por conexão do pool: quem entra aqui nunca espera conexão, e o
+    # número de threads não cresce com o número de sessões
+    global _executor
+    if _executor is None:
+        tamanho = pool().tamanho
+        with _pool_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix="sqlite")
+    return _executor
+
+
+async def executar(fn, *args, **kwargs):
+    # roda fn (que usa o banco) fora do event loop e devolve o resultado
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor(), functools.partial(fn, *args, **kwargs))
@@ -0,0 +1,186 @@
+# benchmarks/bench_assistente.py
+# Interpretação de comandos: versão de antes (várias varreduras da frase —
+# any(p in texto) por verbo, regex de horário, de recorrência, de cena e de
+# grupo, cada uma normalizando de novo) x léxico de uma passada (lexico.py).
+# Também conta as frases em que as duas versões discordam da ação.
+# Uso: python benchmarks/bench_assistente.py [--frases 20000] [--dispositivos 10,100,1000]
+import argparse
+import copy
+import datetime
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cenas  # noqa: E402
+import recorrencia  # noqa: E402
+from estado import DISPOSITIVOS_PADRAO  # noqa: E402
+from indice_entidades import IndiceEntidades  # noqa: E402
+from interpretador import Comando, interpretar, SINONIMOS_CATEGORIA  # noqa: E402
+from texto import normalize_text  # noqa: E402
+
+FRASES = [
+    "Ligue a lâmpada da sala de estar",
+    "Desligue o ar condicionado do quarto do Amom às 10:00",
+    "acenda a lâmpada do quarto do victor às 7h30 da noite",
+    "apague a câmera da garagem",
+    "desligue a lâmpada da sala de estar",
+    "Todo dia às 22:00 desligue a lâmpada da sala de estar",
+    "toda segunda e quarta às 07:00 ligue a lâmpada do quarto do fernando",
+    "desligue tudo da sala",
+    "modo noite às 23:00",
+    "ligue o ar condicionado do quarto do amom daqui a 30 minutos",
+    "ligue a lâmpada da sala de estar amanhã às 7h",
+    "desligue a câmera do quintal segunda às 18h",
+    "ligue o ar condicionado do quarto do victor por 2 horas",
+]
+
+
+# ---- versão de antes (interpretador.py até a troca pelo léxico) ----
+
+PALAVRAS_LIGAR = ["ligue", "acenda", "ative", "ligar", "ativar", "acender"]
+PALAVRAS_DESLIGAR = ["desligue", "apague", "desative", "desligar", "desativar", "apagar"]
+_grupo = re.compile(
+    r'\b(?:tudo|luzes|tod[oa]s (?:as |os )?(?!dias?\b|segunda|terca|quarta|quinta|sexta|sabado|domingo)\w+)'
+)
+time_pattern = re.compile(
+    r'(\d{1,2})[:h](\d{2})(?:\s*(am|pm|da manhã|da tarde|da noite|manhã|tarde|noite))?',
+    flags=re.IGNORECASE
+)
+_DIAS = {normalize_text(n): i for i, n in enumerate(recorrencia.NOMES_DIAS)}
+_dia = r'(segunda|terca|quarta|quinta|sexta|sabado|domingo)(?:\s*feira)?s?'
+_padrao_todo_dia = re.compile(r'\b(?:todo dia|todos os dias|diariamente|cada dia)\b')
+_padrao_uteis = re.compile(r'\bdias? ute(?:is|l)\b')
+_padrao_fim_semana = re.compile(r'\b(?:fim|fins) de semana\b')
+_padrao_intervalo = re.compile(r'\bde ' + _dia + r' a ' + _dia + r'\b')
+_padrao_toda = re.compile(r'\btod[oa]s?\s+(?:as\s+|os\s+)?' + _dia + r'\b')
+_padrao_mais_dias = re.compile(r'\s*(?:e\s+)?(?:as\s+|os\s+|a\s+|o\s+)?' + _dia + r'\b')
+_CENAS_NORMALIZADAS = {normalize_text(n): n for n in cenas.CENAS}
+
+
+def cena_no_texto(texto):
+    t = f" {normalize_text(texto)} "
+    for norm, nome in _CENAS_NORMALIZADAS.items():
+        if f" {norm} " in t:
+            return nome
+    return None
+
+
+def parse_time_antes(text, agora=None):
+    m = time_pattern.search(text)
+    if not m:
+        return None
+    hour = int(m.group(1))
+    minute = int(m.group(2))
+    suffix = (m.group(3) or "").lower()
+    if any(x in suffix for x in ["pm", "tarde", "noite", "da tarde", "da noite"]) and hour < 12:
+        hour += 12
+    if any(x in suffix for x in ["am", "manhã", "da manhã"]) and hour == 12:
+        hour = 0
+    now = agora or datetime.datetime.now()
+    try:
+        return datetime.datetime(now.year, now.month, now.day, hour, minute)
+    except ValueError:
+        return None
+
+
+def mascara_do_texto(texto):
+    t = normalize_text(texto)
+    if _padrao_todo_dia.search(t):
+        return recorrencia.TODO_DIA
+    if _padrao_uteis.search(t):
+        return recorrencia.DIAS_UTEIS
+    if _padrao_fim_semana.search(t):
+        return recorrencia.FIM_DE_SEMANA
+    m = _padrao_intervalo.search(t)
+    if m:
+        a, b = _DIAS[m.group(1)], _DIAS[m.group(2)]
+        return sum(1 << i for i in range(7) if (i - a) % 7 <= (b - a) % 7)
+    mascara = 0
+    for m in _padrao_toda.finditer(t):
+        mascara |= 1 << _DIAS[m.group(1)]
+        fim = m.end()
+        while True:
+            seg = _padrao_mais_dias.match(t, fim)
+            if not seg:
+                break
+            mascara |= 1 << _DIAS[seg.group(1)]
+            fim = seg.end()
+    return mascara
+
+
+def interpretar_antes(texto, indice, agora=None):
+    texto_lower = texto.lower()
+    cena = cena_no_texto(texto_lower)
+    if any(p in texto_lower for p in PALAVRAS_LIGAR):
+        acao = True
+    elif any(p in texto_lower for p in PALAVRAS_DESLIGAR):
+        acao = False
+    elif cena:
+        acao = True
+    else:
+        return Comando(erro="acao")
+    norm = normalize_text(texto_lower)
+    if cena is None and _grupo.search(norm):
+        categoria, comodo = indice.resolver_grupo(texto_lower)
+        if categoria is None:
+            categoria = next((c for p, c in SINONIMOS_CATEGORIA.items() if p in norm.split()), None)
+        cena = cenas.nome_grupo(categoria, comodo)
+    if cena is not None:
+        cmd = Comando(acao, cena=cena)
+    else:
+        dispositivo, comodo = indice.resolver(texto_lower)
+        if not dispositivo or not comodo:
+            return Comando(acao=acao, dispositivo=dispositivo, erro="entidade")
+        cmd = Comando(acao, dispositivo, comodo)
+    cmd.quando = parse_time_antes(texto_lower, agora)
+    mascara = mascara_do_texto(texto_lower)
+    if mascara and cmd.quando is not None:
+        cmd.recorrencia = recorrencia.criar(mascara, cmd.quando.hour, cmd.quando.minute)
+    return cmd
+
+
+# ---- medição ----
+
+def indice_com(n_outros):
+    d = copy.deepcopy(DISPOSITIVOS_PADRAO)
+    for i in range(n_outros):
+        d["outros"][f"aparelho {i} (comodo {i % 20})"] = False
+    return IndiceEntidades(d)
+
+
+def medir(fn, frases, indice, agora, repeticoes=3):
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        for f in frases:
+            fn(f, indice, agora)
+        melhor = min(melhor, time.perf_counter() - t0)
+    return len(frases) / melhor
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frases", type=int, default=20_000)
+    ap.add_argument("--dispositivos", default="10,100,1000", help="aparelhos extras em 'outros'")
+    args = ap.parse_args(argv)
+    frases = [FRASES[i % len(FRASES)] for i in range(args.frases)]
+    agora = datetime.datetime(2026, 1, 7, 9, 0)
+
+    indice = indice_com(0)
+    discordam = [f for f in FRASES
+                 if interpretar_antes(f, indice, agora).acao != interpretar(f, indice, agora).acao]
+    print(f"ação diferente em {len(discordam)} de {len(FRASES)} frases: {discordam}")
+
+    for n in [int(x) for x in args.dispositivos.split(",")]:
+        indice = indice_com(n)
+        antes = medir(interpretar_antes, frases, indice, agora)
+        depois = medir(interpretar, frases, indice, agora)
+        print(f"{n:5d} dispositivos: antes {antes:9.0f} frases/s   léxico {depois:9.0f} frases/s   "
+              f"{depois / antes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
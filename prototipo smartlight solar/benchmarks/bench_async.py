@@ -0,0 +1,144 @@
+# benchmarks/bench_async.py
+# Sessões concorrentes com handlers síncronos (como o Flet roda um handler
+# comum: numa thread do pool padrão, bloqueando nela o banco e a E/S) x
+# handlers assíncronos (corrotina no loop, SQLite em banco.executar e a E/S
+# com await). Cada evento lê o usuário, liga/desliga um dispositivo e, de vez
+# em quando, cria um agendamento; --io-ms simula a espera por um gateway.
+# Uso: python benchmarks/bench_async.py [--sessoes 10,100,500] [--eventos 20] [--io-ms 5]
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+
+
+def preparar_banco(n_usuarios):
+    with banco.conexao() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT,
+                email TEXT UNIQUE NOT NULL,
+                senha TEXT NOT NULL
+            )
+        """)
+        conn.executemany(banco.SQL_INSERIR_USUARIO,
+                         [(f"u{i}", f"u{i}@teste.com", "x") for i in range(n_usuarios)])
+
+
+def trabalho_banco(ctl, usuario, i):
+    # a parte do handler que toca o SQLite / o estado
+    with banco.conexao() as conn:
+        conn.execute(banco.SQL_USUARIO_POR_EMAIL, (usuario,)).fetchone()
+    ctl.definir(usuario, "lâmpada", "sala de estar", i % 2 == 0)
+    if i % 10 == 0:
+        ctl.agendar(usuario, "lâmpada", "sala de estar", True,
+                    datetime.datetime.now() + datetime.timedelta(hours=1))
+
+
+class Medidor:
+    def __init__(self):
+        self.latencias = []
+        self.max_threads = threading.active_count()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+
+    def _amostrar(self):
+        while not self._parar.wait(0.005):
+            self.max_threads = max(self.max_threads, threading.active_count())
+
+    def fim(self):
+        self._parar.set()
+        self._thread.join()
+        self.latencias.sort()
+        n = len(self.latencias)
+        return self.latencias[n // 2], self.latencias[min(n - 1, int(n * 0.99))]
+
+
+async def sessoes_sincronas(ctl, n_sessoes, n_eventos, io, pool, medidor):
+    loop = asyncio.get_running_loop()
+
+    def handler(usuario, i):
+        trabalho_banco(ctl, usuario, i)
+        time.sleep(io)
+
+    async def sessao(s):
+        usuario = f"u{s}@teste.com"
+        for i in range(n_eventos):
+            t0 = time.perf_counter()
+            await loop.run_in_executor(pool, handler, usuario, i)
+            medidor.latencias.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(sessao(s) for s in range(n_sessoes)))
+
+
+async def sessoes_assincronas(ctl, n_sessoes, n_eventos, io, medidor):
+    async def handler(usuario, i):
+        await banco.executar(trabalho_banco, ctl, usuario, i)
+        await asyncio.sleep(io)
+
+    async def sessao(s):
+        usuario = f"u{s}@teste.com"
+        for i in range(n_eventos):
+            t0 = time.perf_counter()
+            await handler(usuario, i)
+            medidor.latencias.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(sessao(s) for s in range(n_sessoes)))
+
+
+def rodar(modo, n_sessoes, n_eventos, io, threads_flet):
+    from nucleo import Controlador
+    from agendador import Agendador
+    ctl = Controlador(agendador=Agendador())
+    medidor = Medidor()
+    inicio = time.perf_counter()
+    if modo == "sync":
+        pool = ThreadPoolExecutor(max_workers=threads_flet)
+        asyncio.run(sessoes_sincronas(ctl, n_sessoes, n_eventos, io, pool, medidor))
+        pool.shutdown()
+    else:
+        asyncio.run(sessoes_assincronas(ctl, n_sessoes, n_eventos, io, medidor))
+    total = time.perf_counter() - inicio
+    p50, p99 = medidor.fim()
+    return n_sessoes * n_eventos / total, p50, p99, medidor.max_threads
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessoes", default="10,100,500")
+    ap.add_argument("--eventos", type=int, default=20, help="eventos por sessão")
+    ap.add_argument("--io-ms", type=float, default=5.0, help="espera simulada de E/S por evento")
+    ap.add_argument("--threads-flet", type=int, default=min(32, (os.cpu_count() or 1) + 4),
+                    help="tamanho do pool de handlers síncronos (padrão do Flet)")
+    args = ap.parse_args(argv)
+    tamanhos = [int(x) for x in args.sessoes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        banco.configurar(os.path.join(tmp, "bench.db"))
+        preparar_banco(max(tamanhos))
+        print(f"{args.eventos} eventos/sessão, E/S simulada {args.io_ms} ms, "
+              f"pool síncrono {args.threads_flet} threads, pool do banco {banco.pool().tamanho}")
+        for n in tamanhos:
+            for modo in ("sync", "async"):
+                por_s, p50, p99, threads = rodar(modo, n, args.eventos, args.io_ms / 1000, args.threads_flet)
+                print(f"{n:5d} sessões {modo:5s}: {por_s:9.0f} eventos/s   p50 {p50 * 1e3:7.1f} ms   "
+                      f"p99 {p99 * 1e3:7.1f} ms   threads {threads}")
+        from estado import repositorio
+        from eventos_uso import log_uso
+        repositorio.fechar()
+        log_uso.fechar()
+        banco.pool().fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_credenciais.py
+# Vazão de logins concorrentes com scrypt no pool de credenciais, por tamanho de
+# pool, e quanto tempo a "thread da interface" fica presa em cada login
+# (verificação inline x envio para o pool).
+# Uso: python benchmarks/bench_credenciais.py [--logins 200] [--sessoes 16] [--n 16384]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import credenciais  # noqa: E402
+
+
+def preparar_banco(n_usuarios, n, legado=False):
+    with banco.conexao() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT,
+                email TEXT UNIQUE NOT NULL,
+                senha TEXT NOT NULL
+            )
+        """)
+        conn.execute("DELETE FROM usuarios")
+        # o mesmo hash para todos: preparar não precisa custar n_usuarios scrypts
+        senha = credenciais.hash_legado("senha") if legado else credenciais.gerar_hash("senha", n)
+        conn.executemany(banco.SQL_INSERIR_USUARIO,
+                         [(f"u{i}", f"u{i}@teste.com", senha) for i in range(n_usuarios)])
+
+
+def vazao(servico, n_logins, n_sessoes, n_usuarios):
+    # n_sessoes clientes disparam logins ao mesmo tempo e esperam o resultado
+    por_sessao = n_logins // n_sessoes
+    latencias = []
+    falhas = []
+    trava = threading.Lock()
+
+    def sessao(idx):
+        for i in range(por_sessao):
+            email = f"u{(idx * por_sessao + i) % n_usuarios}@teste.com"
+            t0 = time.perf_counter()
+            ok = servico.verificar(email, "senha").result()
+            dur = time.perf_counter() - t0
+            with trava:
+                latencias.append(dur)
+                if not ok:
+                    falhas.append(email)
+
+    threads = [threading.Thread(target=sessao, args=(s,)) for s in range(n_sessoes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+    if falhas:
+        raise RuntimeError(f"{len(falhas)} logins falharam")
+    latencias.sort()
+    return por_sessao * n_sessoes / total, latencias[len(latencias) // 2], latencias[int(len(latencias) * 0.99)]
+
+
+def bloqueio_interface(servico, n, repeticoes=20):
+    # tempo que o handler segura a thread: scrypt inline x só enfileirar
+    armazenado = credenciais.gerar_hash("senha", n)
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        credenciais.conferir("senha", armazenado, n)
+    inline = (time.perf_counter() - t0) / repeticoes
+    futuros = []
+    t0 = time.perf_counter()
+    for i in range(repeticoes):
+        futuros.append(servico.verificar(f"u{i}@teste.com", "senha"))
+    enviado = (time.perf_counter() - t0) / repeticoes
+    for f in futuros:
+        f.result()
+    return inline, enviado
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--sessoes", type=int, default=16)
+    ap.add_argument("--usuarios", type=int, default=100)
+    ap.add_argument("--n", type=int, default=credenciais.SCRYPT_N, help="custo N do scrypt")
+    ap.add_argument("--pools", default="1,2,4,8", help="tamanhos de pool a medir")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        banco.configurar(os.path.join(tmp, "bench.db"), tamanho=args.sessoes)
+        preparar_banco(args.usuarios, args.n)
+        print(f"scrypt N={args.n}, {args.sessoes} sessões concorrentes, {args.logins} logins")
+        for tamanho in [int(x) for x in args.pools.split(",")]:
+            servico = credenciais.ServicoCredenciais(trabalhadores=tamanho, n=args.n)
+            por_s, p50, p99 = vazao(servico, args.logins, args.sessoes, args.usuarios)
+            servico.fechar()
+            print(f"pool {tamanho:2d}: {por_s:8.1f} logins/s   p50 {p50 * 1e3:8.1f} ms   p99 {p99 * 1e3:8.1f} ms")
+
+        servico = credenciais.ServicoCredenciais(n=args.n)
+        inline, enviado = bloqueio_interface(servico, args.n)
+        print(f"thread da interface por login: inline {inline * 1e3:.2f} ms, pool {enviado * 1e3:.3f} ms")
+
+        # linhas SHA-256 antigas são regravadas com scrypt no primeiro login
+        preparar_banco(args.usuarios, args.n, legado=True)
+        for i in range(args.usuarios):
+            servico.verificar(f"u{i}@teste.com", "senha").result()
+        with banco.conexao() as conn:
+            restantes = conn.execute("SELECT COUNT(*) FROM usuarios WHERE senha NOT LIKE 'scrypt$%'").fetchone()[0]
+        print(f"migração legada: {servico.rehashes} regravadas, {restantes} ainda em SHA-256")
+        servico.fechar()
+        banco.pool().fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_dispositivos.py
+# Ordens de liga/desliga pelo adaptador (adaptador.py) contra o gateway em
+# memória com latência e perda simuladas: uma ordem por vez, esperando cada
+# confirmação (como o antigo "muda o booleano e pronto" faria com hardware)
+# x todas em voo pelo pool, com pipelining e confirmação em lote.
+# Latências p50/p99 saem dos histogramas do próprio adaptador.
+# Uso: python benchmarks/bench_dispositivos.py [--ordens 2000] [--casas 50] [--latencia-ms 2] [--perda 0,0.01]
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gateway_local  # noqa: E402
+from adaptador import AdaptadorMQTT, Ordem  # noqa: E402
+
+CATEGORIAS = ["lâmpada", "ar condicionado", "câmera", "outros"]
+
+
+def ordens(n, casas):
+    return [Ordem(f"casa{i % casas}", CATEGORIAS[i % len(CATEGORIAS)], f"comodo {i % 9}", i % 3 != 0)
+            for i in range(n)]
+
+
+async def rodar(modo, lista, latencia, perda, timeout):
+    gateway = gateway_local.GatewayLocal(latencia=latencia, perda=perda, semente=3)
+    adaptador = AdaptadorMQTT(gateway.conectar, timeout=timeout)
+    # conexões abertas antes: mede o regime, não o primeiro contato
+    await adaptador.enviar_varios(ordens(len({o.usuario for o in lista}) * 9, len({o.usuario for o in lista})))
+    adaptador.latencias.clear()
+    adaptador.reenvios = 0
+    t0 = time.perf_counter()
+    if modo == "uma por vez":
+        erros = 0
+        for o in lista:
+            try:
+                await adaptador.enviar(o)
+            except Exception:
+                erros += 1
+    else:
+        erros = sum(e is not None for e in await adaptador.enviar_varios(lista))
+    total = time.perf_counter() - t0
+    m = adaptador.metricas()
+    await adaptador.fechar()
+    return len(lista) / total, m["latencia"]["todas"], m["reenvios"], erros, gateway.confirmacoes
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ordens", type=int, default=2000)
+    ap.add_argument("--casas", type=int, default=50)
+    ap.add_argument("--latencia-ms", type=float, default=2.0, help="ida até o gateway")
+    ap.add_argument("--perda", default="0,0.01", help="fração de publishes perdidos")
+    ap.add_argument("--timeout", type=float, default=0.25, help="segundos por tentativa")
+    args = ap.parse_args(argv)
+    lista = ordens(args.ordens, args.casas)
+    for perda in [float(x) for x in args.perda.split(",")]:
+        for modo in ("uma por vez", "pipelining"):
+            por_s, lat, reenvios, erros, pubacks = asyncio.run(
+                rodar(modo, lista, args.latencia_ms / 1000, perda, args.timeout))
+            print(f"perda {perda:4.0%}  {modo:12s}: {por_s:9.0f} ordens/s   p50 {lat['p50_ms']:8.2f} ms   "
+                  f"p99 {lat['p99_ms']:8.2f} ms   reenvios {reenvios:5d}   falhas {erros}   pubacks {pubacks}")
+
+
+if __name__ == "__main__":
+    main()
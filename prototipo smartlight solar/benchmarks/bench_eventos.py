@@ -0,0 +1,82 @@
+# benchmarks/bench_eventos.py
+# Barramento de eventos (eventos.py): threads publicando (como o executor do
+# banco e o agendador) para assinantes no event loop (como as telas abertas).
+# Mede eventos/s entregues, tamanho médio dos lotes que chegam ao loop e
+# quantos se perdem com fila pequena: esperando vaga (backpressure) x
+# descartando os mais antigos. Também o custo de publicar com muitas sessões
+# assinadas (cada evento só visita as assinaturas do próprio usuário).
+# Uso: python benchmarks/bench_eventos.py [--eventos 200000] [--threads 4] [--fila 1000,64] [--sessoes 10,10000]
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eventos import Barramento, Mudanca, Perdidos  # noqa: E402
+
+
+async def entregar(n_eventos, n_threads, fila, espera):
+    loop = asyncio.get_running_loop()
+    barramento = Barramento()
+    recebidos = [0, 0, 0]  # eventos, lotes, perdidos
+
+    def tela(eventos):
+        recebidos[1] += 1
+        for ev in eventos:
+            if isinstance(ev, Perdidos):
+                recebidos[2] += ev.quantidade
+            else:
+                recebidos[0] += 1
+
+    a = barramento.assinar(Mudanca, tela, usuario="casa0", loop=loop, maximo=fila, espera=espera, lote=True)
+    por_thread = n_eventos // n_threads
+
+    def publicar(k):
+        for i in range(por_thread):
+            barramento.publicar(Mudanca("casa0", "lâmpada", f"comodo {k}", i % 2 == 0, "tela"))
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=publicar, args=(k,)) for k in range(n_threads)]
+    for t in threads:
+        t.start()
+    while recebidos[0] + recebidos[2] < por_thread * n_threads:
+        await asyncio.sleep(0.001)
+    total = time.perf_counter() - t0
+    for t in threads:
+        t.join()
+    a.cancelar()
+    return recebidos[0] / total, recebidos[0] / max(1, recebidos[1]), recebidos[2]
+
+
+def publicar_com_sessoes(n_sessoes, n_eventos=100_000):
+    barramento = Barramento()
+    contagem = [0]
+    for i in range(n_sessoes):
+        barramento.assinar(Mudanca, lambda ev: contagem.__setitem__(0, contagem[0] + 1), usuario=f"casa{i}")
+    t0 = time.perf_counter()
+    for i in range(n_eventos):
+        barramento.publicar(Mudanca(f"casa{i % n_sessoes}", "lâmpada", "sala", True, "tela"))
+    return n_eventos / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eventos", type=int, default=200_000)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--fila", default="1000,64", help="tamanho máximo da fila da assinatura")
+    ap.add_argument("--sessoes", default="10,10000", help="sessões assinadas, cada uma de um usuário")
+    args = ap.parse_args(argv)
+    for fila in [int(x) for x in args.fila.split(",")]:
+        for modo, espera in (("esperando vaga", 0.05), ("descartando", 0.0)):
+            por_s, lote, perdidos = asyncio.run(entregar(args.eventos, args.threads, fila, espera))
+            print(f"fila {fila:5d}  {modo:14s}: {por_s:10.0f} eventos/s entregues   lote médio {lote:7.1f}   "
+                  f"perdidos {perdidos}")
+    for n in [int(x) for x in args.sessoes.split(",")]:
+        print(f"{n:6d} sessões assinadas: {publicar_com_sessoes(n):10.0f} eventos/s publicados")
+
+
+if __name__ == "__main__":
+    main()
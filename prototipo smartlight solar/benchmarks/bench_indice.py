@@ -0,0 +1,81 @@
+# benchmarks/bench_indice.py
+# Resolução de dispositivo/cômodo no assistente com muitos dispositivos em "outros":
+# varredura linear com normalize_text por chave (antes) x índice pré-compilado (depois).
+# Uso: python benchmarks/bench_indice.py [--dispositivos 1000] [--frases 2000]
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from estado import DISPOSITIVOS_PADRAO  # noqa: E402
+from indice_entidades import IndiceEntidades  # noqa: E402
+from texto import normalize_text  # noqa: E402
+
+TIPOS = ["alexa", "aquecedor", "smart tv", "fechadura inteligente", "interruptor inteligente"]
+COMODOS = ["sala de estar", "quarto do amom", "quarto do victor", "quarto do fernando"]
+
+
+# comportamento original de processar_comando
+def resolver_linear(dispositivos, texto):
+    norm_text = normalize_text(texto.lower())
+    dispositivo = None
+    for d in dispositivos.keys():
+        if normalize_text(d) in norm_text:
+            dispositivo = d
+            break
+    if not dispositivo:
+        return None, None
+    for c in dispositivos[dispositivo].keys():
+        if normalize_text(c) in norm_text:
+            return dispositivo, c
+    return dispositivo, None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dispositivos", type=int, default=1000)
+    ap.add_argument("--frases", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(7)
+    dispositivos = copy.deepcopy(DISPOSITIVOS_PADRAO)
+    nomes = [f"{rnd.choice(TIPOS)} {i} ({rnd.choice(COMODOS)})" for i in range(args.dispositivos)]
+    for n in nomes:
+        dispositivos["outros"][n] = False
+
+    frases = []
+    for _ in range(args.frases):
+        if rnd.random() < 0.5:
+            frases.append(f"ligue outros {rnd.choice(nomes)}")
+        else:
+            frases.append(f"desligue a lâmpada do {rnd.choice(COMODOS)}")
+
+    t0 = time.perf_counter()
+    esperado = [resolver_linear(dispositivos, f) for f in frases]
+    t_linear = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indice = IndiceEntidades(dispositivos)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    obtido = [indice.resolver(f) for f in frases]
+    t_indice = time.perf_counter() - t0
+
+    divergencias = sum(a != b for a, b in zip(esperado, obtido))
+    print(f"dispositivos em outros: {args.dispositivos}  frases: {args.frases}")
+    print(f"linear (antes)     : {t_linear / args.frases * 1e6:9.1f} us/frase")
+    print(f"índice (depois)    : {t_indice / args.frases * 1e6:9.1f} us/frase  ({t_linear / t_indice:.0f}x)")
+    print(f"montagem do índice : {t_build * 1e3:9.1f} ms (só quando a lista muda)")
+    print(f"divergências       : {divergencias}")
+
+    erros = [f.replace("lâmpada", "lampda").replace("victor", "victr") for f in frases if "victor" in f]
+    acertos = sum(indice.resolver(f)[1] is not None for f in erros)
+    print(f"com erro de digitação: {acertos}/{len(erros)} resolvidas")
+
+
+if __name__ == "__main__":
+    main()
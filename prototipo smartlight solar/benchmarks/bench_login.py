@@ -0,0 +1,96 @@
+# benchmarks/bench_login.py
+# Compara logins por segundo: conexão nova por chamada (antes) x pool com WAL (depois).
+# Uso: python benchmarks/bench_login.py [--logins 5000] [--threads 8] [--usuarios 500]
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+
+
+def hash_senha(senha):
+    return hashlib.sha256(senha.encode()).hexdigest()
+
+
+def preparar_banco(caminho, n_usuarios):
+    with sqlite3.connect(caminho) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT,
+                email TEXT UNIQUE NOT NULL,
+                senha TEXT NOT NULL
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO usuarios (nome, email, senha) VALUES (?, ?, ?)",
+            [(f"u{i}", f"u{i}@teste.com", hash_senha("senha")) for i in range(n_usuarios)],
+        )
+
+
+# comportamento original de app.verificar_credenciais
+def login_antes(caminho, email, senha):
+    with sqlite3.connect(caminho, timeout=5, check_same_thread=False) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT senha FROM usuarios WHERE email = ?", (email,))
+        row = cursor.fetchone()
+    return row and row[0] == hash_senha(senha)
+
+
+def login_depois(caminho, email, senha):
+    with banco.conexao() as conn:
+        row = conn.execute(banco.SQL_SENHA_POR_EMAIL, (email,)).fetchone()
+    return row and row[0] == hash_senha(senha)
+
+
+def medir(fn, caminho, n_logins, n_threads, n_usuarios):
+    por_thread = n_logins // n_threads
+    falhas = []
+
+    def trabalho(idx):
+        for i in range(por_thread):
+            email = f"u{(idx * por_thread + i) % n_usuarios}@teste.com"
+            if not fn(caminho, email, "senha"):
+                falhas.append(email)
+
+    threads = [threading.Thread(target=trabalho, args=(t,)) for t in range(n_threads)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    dur = time.perf_counter() - inicio
+    if falhas:
+        raise RuntimeError(f"{len(falhas)} logins falharam")
+    return por_thread * n_threads / dur
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--usuarios", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, "bench.db")
+        preparar_banco(caminho, args.usuarios)
+        antes = medir(login_antes, caminho, args.logins, args.threads, args.usuarios)
+        banco.configurar(caminho, tamanho=args.threads)
+        depois = medir(login_depois, caminho, args.logins, args.threads, args.usuarios)
+        banco.pool().fechar()
+
+    print(f"antes  (connect por chamada): {antes:10.0f} logins/s")
+    print(f"depois (pool + WAL)         : {depois:10.0f} logins/s")
+    print(f"ganho: {depois / antes:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_motor_energia.py
+# Compara o caminho escalar (consumo.Consumo, o mesmo do relatório) com o
+# motor vetorizado em históricos grandes e confere se os totais (kWh e R$ na
+# tarifa branca, com bandeira) batem.
+# Uso: python benchmarks/bench_motor_energia.py [--intervalos 1000000] [--dispositivos 5000]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from consumo import Consumo, MS_POR_HORA  # noqa: E402
+from motor_energia import Intervalos, MotorEnergia  # noqa: E402
+from tarifa import branca, reais as tarifa_reais  # noqa: E402
+
+CATEGORIAS = ["ar condicionado", "lâmpada", "câmera", "aquecedor", "smart tv"]
+
+
+def gerar(n_intervalos, n_dispositivos, semente=42):
+    rnd = random.Random(semente)
+    pares = [(rnd.choice(CATEGORIAS), f"comodo {i}") for i in range(n_dispositivos)]
+    # cada dispositivo tem intervalos sequenciais que não se sobrepõem
+    relogio = [1_700_000_000_000] * n_dispositivos
+    disps, comodos, inicio, fim = [], [], [], []
+    for _ in range(n_intervalos):
+        d = rnd.randrange(n_dispositivos)
+        ini = relogio[d] + rnd.randrange(60_000, 6 * MS_POR_HORA)
+        fin = ini + rnd.randrange(60_000, 5 * MS_POR_HORA)
+        relogio[d] = fin
+        disps.append(pares[d][0])
+        comodos.append(pares[d][1])
+        inicio.append(ini)
+        fim.append(fin)
+    return disps, comodos, inicio, fim
+
+
+def escalar(disps, comodos, inicio, fim, tarifa):
+    c = Consumo(tarifa)
+    for d, cm, ini, fin in zip(disps, comodos, inicio, fim):
+        c.ligar(d, cm, ini)
+        c.desligar(d, cm, fin)
+    return c
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--intervalos", type=int, default=1_000_000)
+    ap.add_argument("--dispositivos", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    dados = gerar(args.intervalos, args.dispositivos)
+    tarifa = branca()
+    tarifa.definir_bandeira(2023, 12, "vermelha 1")
+
+    t0 = time.perf_counter()
+    ref = escalar(*dados, tarifa)
+    t_escalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    iv = Intervalos.de_listas(*dados)
+    t_arrays = time.perf_counter() - t0
+    motor = MotorEnergia(tarifa=tarifa)
+    t0 = time.perf_counter()
+    res = motor.calcular(iv, periodo_ms=24 * MS_POR_HORA)
+    t_motor = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    motor.custo(iv, motor.curva(iv))
+    t_custo = time.perf_counter() - t0
+
+    assert np.isclose(res.total_kwh, ref.total_kwh, rtol=1e-9)
+    for chave, kwh in ref.por_dispositivo.items():
+        assert np.isclose(res.por_par[chave], kwh, rtol=1e-9), chave
+    for comodo, kwh in ref.por_comodo.items():
+        assert np.isclose(res.por_comodo[comodo], kwh, rtol=1e-9), comodo
+    assert np.isclose(sum(res.por_periodo.values()), sum(ref.por_dia.values()), rtol=1e-9)
+    assert np.isclose(res.custo_total, ref.custo_total, rtol=1e-9)
+    for chave, reais in ref.custo_por_dispositivo.items():
+        assert np.isclose(res.custo_por_par[chave], reais, rtol=1e-9), chave
+    assert np.isclose(sum(res.custo_por_periodo.values()), sum(ref.custo_por_dia.values()), rtol=1e-9)
+
+    dias = (iv.fim.max() - iv.inicio.min()) / (24 * MS_POR_HORA)
+    print(f"intervalos: {len(iv):,}  dispositivos: {len(iv.pares):,}  histórico: {dias:.0f} dias")
+
+    print(f"escalar (Consumo)       : {t_escalar:8.3f} s")
+    print(f"montagem dos arrays     : {t_arrays:8.3f} s")
+    print(f"motor vetorizado        : {t_motor:8.3f} s  ({t_escalar / t_motor:.0f}x)")
+    print(f"  só o custo por tarifa : {t_custo:8.3f} s")
+    print(f"total: {res.total_kwh:.2f} kWh / {tarifa_reais(res.custo_total)} / {res.total_co2:.2f} kg CO2 "
+          f"(confere com o escalar)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_otimizador.py
+# Deslocamento de cargas flexíveis (otimizador.py) para muitos domicílios:
+# um domicílio por vez (otimizar em laço) x todos juntos (otimizar_lote, que
+# coloca a k-ésima carga de cada domicílio numa só operação NumPy). Também
+# mostra quanto as cargas custariam ligadas logo no início do horizonte.
+# Uso: python benchmarks/bench_otimizador.py [--domicilios 100,1000,5000] [--cargas 100,300]
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import otimizador  # noqa: E402
+import solar  # noqa: E402
+import tarifa  # noqa: E402
+
+APARELHOS = [("ar condicionado", 1.2), ("aquecedor", 2.0), ("bomba", 0.3), ("lâmpada", 0.06)]
+
+
+def casos(n_domicilios, n_cargas, semente=5):
+    rnd = random.Random(semente)
+    inicio_ms = int(datetime.datetime(2026, 1, 7).timestamp() * 1000)
+    branca = tarifa.branca()
+    saida = []
+    for _ in range(n_domicilios):
+        inst = solar.Instalacao(potencia_kwp=rnd.choice([0.0, 1.5, 3.0, 6.0]), inclinacao=rnd.randrange(5, 35))
+        h = otimizador.horizonte(inst, branca, inicio_ms, carga_base_kw=rnd.uniform(0, 0.5))
+        base = h.instante(0)
+        cargas = []
+        for i in range(n_cargas):
+            nome, kw = rnd.choice(APARELHOS)
+            cargas.append(otimizador.CargaFlexivel(
+                nome, f"comodo {i}", kw, datetime.timedelta(minutes=15 * rnd.randrange(1, 16)),
+                base + datetime.timedelta(minutes=15 * rnd.randrange(16, 97)), rnd.random() < 0.8))
+        saida.append((h, cargas))
+    return saida
+
+
+def custo_imediato(h, c):
+    # a carga ligada já, sem olhar preço nem sol (só a geração, sem disputa)
+    q = min(len(h), max(1, -(-int(c.duracao.total_seconds()) // 900)))
+    e = c.potencia_kw * solar.HORAS_POR_QUARTO
+    return float((np.maximum(e - h.excedente[:q], 0) * h.preco[:q]).sum())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--domicilios", default="100,1000,5000")
+    ap.add_argument("--cargas", default="100,300", help="cargas flexíveis por domicílio")
+    args = ap.parse_args(argv)
+    for n_cargas in [int(x) for x in args.cargas.split(",")]:
+        for n in [int(x) for x in args.domicilios.split(",")]:
+            lote = casos(n, n_cargas)
+            total = n * n_cargas
+            t0 = time.perf_counter()
+            r = otimizador.otimizar_lote(lote)
+            t_lote = time.perf_counter() - t0
+            # o laço por domicílio fica caro rápido: mede numa amostra e extrapola
+            amostra = lote[:min(n, 100)]
+            t0 = time.perf_counter()
+            um_a_um = [otimizador.otimizar(h, cargas) for h, cargas in amostra]
+            t_laco = (time.perf_counter() - t0) * n / len(amostra)
+            assert all(abs(a.custo - b.custo) < 1e-9 for x, y in zip(um_a_um, r) for a, b in zip(x, y))
+            custo = sum(c.custo for x in r for c in x)
+            imediato = sum(custo_imediato(h, c) for h, cargas in lote for c in cargas)
+            print(f"{n:5d} domicílios x {n_cargas} cargas: lote {t_lote:6.2f} s ({total / t_lote:9.0f} cargas/s)   "
+                  f"um a um {t_laco:6.2f} s   {t_laco / t_lote:5.1f}x   "
+                  f"custo {tarifa.reais(custo)} (ligando já: {tarifa.reais(imediato)})")
+
+
+if __name__ == "__main__":
+    main()
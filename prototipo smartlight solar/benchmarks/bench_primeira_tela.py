@@ -0,0 +1,108 @@
+# benchmarks/bench_primeira_tela.py
+# Tempo até a primeira tela (app.main até a tela de login montada e enviada)
+# com o DDL de antes em toda sessão (CREATE TABLE IF NOT EXISTS + ALTER TABLE
+# que falha) x esquema migrado uma vez no início do processo.
+# A página usa uma conexão Flet falsa que só serializa os comandos.
+# Uso: python benchmarks/bench_primeira_tela.py [--sessoes 2000] [--threads 1]
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+import flet as ft  # noqa: E402
+from flet_core.connection import Connection  # noqa: E402
+from flet_core.protocol import CommandEncoder  # noqa: E402
+
+_ids = itertools.count()
+
+
+class ConexaoFalsa(Connection):
+    def send_commands(self, session_id, commands):
+        json.dumps(commands, cls=CommandEncoder)
+        return SimpleNamespace(results=[" ".join(f"_{next(_ids)}" for _ in c.commands)
+                                        for c in commands if c.name == "add"])
+
+    def send_command(self, session_id, command):
+        return SimpleNamespace(result="", error="")
+
+
+# comportamento original de app.criar_banco, rodado em toda sessão
+def criar_banco_antes():
+    with banco.conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT,
+                email TEXT UNIQUE NOT NULL,
+                senha TEXT NOT NULL
+            )
+        """)
+        try:
+            cursor.execute("ALTER TABLE usuarios ADD COLUMN nome TEXT")
+        except sqlite3.OperationalError:
+            pass
+
+
+def medir(n_sessoes, n_threads, ddl_por_sessao):
+    import app
+    loop = asyncio.new_event_loop()
+    tempos = []
+    trava = threading.Lock()
+
+    def sessao(i):
+        page = ft.Page(ConexaoFalsa(), f"s{i}", loop)
+        t0 = time.perf_counter()
+        if ddl_por_sessao:
+            criar_banco_antes()
+        asyncio.run(app.main(page))
+        dur = time.perf_counter() - t0
+        with trava:
+            tempos.append(dur)
+
+    por_thread = n_sessoes // n_threads
+
+    def trabalho(t):
+        for i in range(por_thread):
+            sessao(t * por_thread + i)
+
+    threads = [threading.Thread(target=trabalho, args=(t,)) for t in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    loop.close()
+    tempos.sort()
+    return statistics.median(tempos), tempos[int(len(tempos) * 0.99)]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessoes", type=int, default=2000)
+    ap.add_argument("--threads", type=int, default=1, help="sessões abrindo ao mesmo tempo")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        banco.configurar(os.path.join(tmp, "bench.db"), tamanho=args.threads)
+        print(f"migração inicial (banco novo): {(time.perf_counter() - t0) * 1e3:.1f} ms, uma vez por processo")
+        medir(20, 1, False)  # aquecimento (imports, imagens, statements)
+        for rotulo, ddl in (("antes  (DDL por sessão)", True), ("depois (migrado no início)", False)):
+            p50, p99 = medir(args.sessoes, args.threads, ddl)
+            print(f"{rotulo:28s}: p50 {p50 * 1e3:7.3f} ms   p99 {p99 * 1e3:7.3f} ms")
+        banco.pool().fechar()
+
+
+if __name__ == "__main__":
+    main()
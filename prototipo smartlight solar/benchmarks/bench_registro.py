@@ -0,0 +1,138 @@
+# benchmarks/bench_registro.py
+# Registro compacto (registro.py) x o dicionário {categoria: {comodo: bool}}
+# de estado.py para instalações grandes (condomínio: blocos, apartamentos e
+# cômodos). Mede memória (tracemalloc, só as estruturas: os nomes já
+# existem nos dois casos), busca pontual por nome e por id e consultas em
+# massa: ligados de um cômodo, ligados da casa, potência ligada e uma cena
+# de grupo ("desligue tudo do bloco 7").
+# Uso: python benchmarks/bench_registro.py [--dispositivos 1000,100000] [--buscas 200000]
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cenas  # noqa: E402
+import registro  # noqa: E402
+from consumo import potencia  # noqa: E402
+from texto import normalize_text  # noqa: E402
+
+CATEGORIAS = ["lâmpada", "ar condicionado", "câmera", "tomada inteligente", "sensor de presença", "fechadura",
+              "aquecedor", "outros"]
+
+
+def instalacao(n, semente=11):
+    rnd = random.Random(semente)
+    comodos = [f"bloco {b} apto {a} {c}" for b in range(1, 1 + max(1, n // 800))
+               for a in range(100) for c in ("sala", "quarto", "cozinha", "varanda")]
+    dispositivos = {}
+    for i in range(n):
+        dispositivos.setdefault(CATEGORIAS[i % len(CATEGORIAS)], {})[comodos[i // len(CATEGORIAS) % len(comodos)]] = \
+            rnd.random() < 0.3
+    return dispositivos
+
+
+def resolver_dict(cena, dispositivos, acao=None):
+    # cena resolvida sobre o dicionário de estado.py, aparelho a aparelho (como
+    # cenas.py fazia antes do registro); se dois itens pegam o mesmo, vale o último
+    alvo = {}
+    normalizados = {}
+    for item in cena.itens:
+        ligado = acao if item.ligado is None else item.ligado
+        if ligado is None:
+            continue
+        comodo = normalize_text(item.comodo) if item.comodo else None
+        for categoria, aparelhos in dispositivos.items():
+            if item.categoria is not None and categoria != item.categoria:
+                continue
+            if categoria in item.exceto:
+                continue
+            for nome in aparelhos:
+                if comodo is not None:
+                    norm = normalizados.get(nome)
+                    if norm is None:
+                        norm = normalizados[nome] = f" {normalize_text(nome)} "
+                    if f" {comodo} " not in norm:
+                        continue
+                alvo[(categoria, nome)] = ligado
+    return [(c, n, v) for (c, n), v in alvo.items()]
+
+
+def memoria(construir):
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    obj = construir()
+    depois = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, depois - antes
+
+
+def cronometrar(fn, repeticoes=1):
+    # uma rodada antes, fora da conta (caches preguiçosos, como o dos nomes normalizados)
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        r = fn()
+    return (time.perf_counter() - t0) / repeticoes, r
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dispositivos", default="1000,100000")
+    ap.add_argument("--buscas", type=int, default=200_000)
+    args = ap.parse_args(argv)
+    for n in [int(x) for x in args.dispositivos.split(",")]:
+        base = instalacao(n)
+        n = sum(len(v) for v in base.values())
+        # cópia das estruturas com os mesmos objetos str: a medida é só do contêiner
+        d, mem_dict = memoria(lambda: {c: dict(v) for c, v in base.items()})
+        # o registro também guarda o último instante de cada aparelho; com
+        # dicionários isso seria outro, por (categoria, cômodo)
+        _, mem_ts = memoria(lambda: {(c, m): 1_700_000_000_000 + i for i, (c, m) in
+                                     enumerate((c, m) for c, v in base.items() for m in v)})
+        reg, mem_reg = memoria(lambda: registro.montar(base, ts_ms=1_700_000_000_000))
+        print(f"{n} dispositivos: memória dict {mem_dict / n:5.0f} B/disp   "
+              f"dict + último instante {(mem_dict + mem_ts) / n:5.0f} B/disp   "
+              f"registro (com potência e último instante) {mem_reg / n:5.0f} B/disp = {mem_reg / 1e6:.2f} MB")
+
+        rnd = random.Random(3)
+        pares = [(c, m) for c, v in d.items() for m in v]
+        amostra = [pares[rnd.randrange(len(pares))] for _ in range(args.buscas)]
+        ids = [reg.id(c, m) for c, m in amostra]
+        t_dict, _ = cronometrar(lambda: [d[c][m] for c, m in amostra])
+        t_nome, _ = cronometrar(lambda: [reg.ligado(reg.id(c, m)) for c, m in amostra])
+        t_id, _ = cronometrar(lambda: [reg.ligado(i) for i in ids])
+        t_massa, _ = cronometrar(lambda: reg.estados(ids))
+        ns = 1e9 / args.buscas
+        print(f"  busca: dict {t_dict * ns:5.0f} ns   registro por nome {t_nome * ns:5.0f} ns   "
+              f"por id {t_id * ns:5.0f} ns   {args.buscas} ids de uma vez {t_massa * ns:5.1f} ns/id")
+
+        comodo = pares[len(pares) // 2][1]
+        consultas = [
+            ("ligados no cômodo",
+             lambda: [c for c, v in d.items() if v.get(comodo)],
+             lambda: reg.ligados_no_comodo(comodo)),
+            ("ligados da casa",
+             lambda: [(c, m) for c, v in d.items() for m, ligado in v.items() if ligado],
+             lambda: reg.ligados()),
+            ("potência ligada",
+             lambda: sum(potencia(c) * sum(v.values()) for c, v in d.items()),
+             lambda: reg.potencia_ligada()),
+        ]
+        grupo = cenas.obter(cenas.nome_grupo(None, "bloco 7" if n >= 8 * 800 else "bloco 1"))
+        consultas.append((
+            "cena de grupo",
+            lambda: [(c, m, v) for c, m, v in resolver_dict(grupo, d, False) if d[c][m] != v],
+            lambda: cenas.mudancas(grupo, reg, False)))
+        for nome, com_dict, com_registro in consultas:
+            t_a, a = cronometrar(com_dict, 5)
+            t_b, b = cronometrar(com_registro, 5)
+            assert len(a) == len(b) if not isinstance(a, float) else abs(a - b) < 1e-3 * max(1.0, a), nome
+            print(f"  {nome:18s}: dict {t_a * 1e3:8.3f} ms   registro {t_b * 1e3:8.3f} ms   {t_a / t_b:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
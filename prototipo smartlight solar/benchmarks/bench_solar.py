@@ -0,0 +1,76 @@
+# benchmarks/bench_solar.py
+# Geração solar de um ano (96 quartos de hora x 365 dias) por domicílio, sem
+# e com o cache por configuração, e o balanço consumo x geração (autoconsumo
+# e CO2 evitado) sobre um ano de intervalos liga/desliga de cada domicílio.
+# Uso: python benchmarks/bench_solar.py [--domicilios 200] [--intervalos 5000]
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+import solar  # noqa: E402
+from motor_energia import Intervalos, MotorEnergia  # noqa: E402
+
+CATEGORIAS = ["ar condicionado", "lâmpada", "câmera", "aquecedor"]
+INICIO_ANO = int(np.datetime64("2026-01-01", "ms").astype(np.int64))
+
+
+def instalacoes(n, semente=7):
+    rnd = random.Random(semente)
+    return [solar.Instalacao(potencia_kwp=rnd.choice([1.5, 3.0, 4.5, 6.0]), inclinacao=rnd.randrange(5, 35),
+                             azimute=rnd.randrange(-45, 46), latitude=rnd.uniform(-30, -3),
+                             longitude=rnd.uniform(-60, -35)) for _ in range(n)]
+
+
+def historico(n_intervalos, rnd):
+    inicio = [INICIO_ANO + rnd.randrange(0, 364 * 86_400_000) for _ in range(n_intervalos)]
+    fim = [i + rnd.randrange(5 * 60_000, 6 * 3_600_000) for i in inicio]
+    disps = [rnd.choice(CATEGORIAS) for _ in range(n_intervalos)]
+    return Intervalos.de_listas(disps, [f"comodo {i % 6}" for i in range(n_intervalos)], inicio, fim)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--domicilios", type=int, default=200)
+    ap.add_argument("--intervalos", type=int, default=5000, help="intervalos por domicílio em um ano")
+    args = ap.parse_args(argv)
+    casas = instalacoes(args.domicilios)
+    solar.geracao_ano.cache_clear()
+
+    frio, quente = [], []
+    for c in casas:
+        t0 = time.perf_counter()
+        solar.geracao_ano(c, 2026)
+        frio.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        solar.geracao_ano(c, 2026)
+        quente.append(time.perf_counter() - t0)
+    print(f"geração de 1 ano ({len(solar.geracao_ano(casas[0], 2026)):,} quartos de hora) por domicílio:")
+    print(f"  sem cache: mediana {statistics.median(frio) * 1e3:6.2f} ms   máx {max(frio) * 1e3:6.2f} ms")
+    print(f"  com cache: mediana {statistics.median(quente) * 1e6:6.2f} µs")
+
+    rnd = random.Random(11)
+    motor = MotorEnergia()
+    tempos, auto, consumo, co2 = [], 0.0, 0.0, 0.0
+    for c in casas:
+        iv = historico(args.intervalos, rnd)
+        t0 = time.perf_counter()
+        b = solar.balanco_intervalos(iv, c, motor)
+        tempos.append(time.perf_counter() - t0)
+        auto += b.autoconsumo_kwh
+        consumo += b.consumo_kwh
+        co2 += b.co2_evitado_kg
+    print(f"balanço de 1 ano com {args.intervalos:,} intervalos: mediana {statistics.median(tempos) * 1e3:6.2f} ms "
+          f"por domicílio, {sum(tempos):.2f} s para {len(casas)}")
+    print(f"autoconsumo {auto / consumo:.0%} do consumo; CO2 evitado {co2:,.0f} kg "
+          f"(fator fixo sobre o consumo todo daria {consumo * solar.FATOR_CO2:,.0f} kg)")
+
+
+if __name__ == "__main__":
+    main()
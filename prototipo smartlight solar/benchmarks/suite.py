@@ -0,0 +1,410 @@
+# benchmarks/suite.py
+# Suíte de benchmarks dos caminhos quentes do app (app.py, menu.py e núcleo).
+# Cada benchmark roda em vários tamanhos de dados e o resultado sai em JSON;
+# com --comparar, os tempos são checados contra um baseline salvo.
+#
+# Uso:
+#   python benchmarks/suite.py --salvar baseline.json
+#   python benchmarks/suite.py --comparar baseline.json [--tolerancia 0.25]
+#   python benchmarks/suite.py --filtro assistente --rapido
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import banco  # noqa: E402
+
+BENCHMARKS = []
+
+
+def benchmark(nome, tamanhos, rapido=None):
+    # registra fn(n) -> callable que executa n operações
+    def registrar(fn):
+        BENCHMARKS.append((nome, list(tamanhos), list(rapido or tamanhos[:1]), fn))
+        return fn
+    return registrar
+
+
+def _rnd():
+    return random.Random(1234)
+
+
+def _dispositivos(n_outros):
+    from estado import DISPOSITIVOS_PADRAO
+    d = copy.deepcopy(DISPOSITIVOS_PADRAO)
+    for i in range(n_outros):
+        d["outros"][f"aparelho {i} (comodo {i % 20})"] = False
+    return d
+
+
+FRASES = [
+    "Ligue a lâmpada da sala de estar",
+    "Desligue o ar condicionado do quarto do Amom às 10:00",
+    "acenda a lâmpada do quarto do victor às 7h30 da noite",
+    "apague a câmera da garagem",
+]
+
+
+@benchmark("normalize_text", [1_000, 10_000, 100_000], [1_000])
+def b_normalize(n):
+    from texto import normalize_text
+    frases = [FRASES[i % len(FRASES)] + f" {i}" for i in range(n)]
+    return lambda: [normalize_text(f) for f in frases]
+
+
+@benchmark("parse_time_from_text", [1_000, 10_000, 100_000], [1_000])
+def b_parse_time(n):
+    from interpretador import parse_time_from_text
+    frases = [FRASES[i % len(FRASES)] for i in range(n)]
+    return lambda: [parse_time_from_text(f) for f in frases]
+
+
+@benchmark("assistente.interpretar[dispositivos]", [10, 100, 1_000], [10])
+def b_interpretar(n):
+    from indice_entidades import IndiceEntidades
+    from interpretador import interpretar
+    indice = IndiceEntidades(_dispositivos(n))
+    frases = [FRASES[i % len(FRASES)] for i in range(1_000)]
+    return lambda: [interpretar(f, indice) for f in frases]
+
+
+@benchmark("registrar_uso[eventos]", [1_000, 10_000, 100_000], [1_000])
+def b_registrar_uso(n):
+    from eventos_uso import LogUso
+    from nucleo import Controlador
+    from agendador import Agendador
+    log = LogUso()
+    ctl = Controlador(log_eventos=log, agendador=Agendador(persistir=False))
+    pares = [("lâmpada", f"comodo {i % 50}") for i in range(n)]
+    t0 = 1_700_000_000_000
+
+    def rodar():
+        for i, (d, c) in enumerate(pares):
+            ctl.registrar_uso("bench", d, c, i % 2 == 0, t0 + i * 1000)
+        log.flush()
+    return rodar
+
+
+@benchmark("cena.aplicar[dispositivos]", [100, 1_000, 10_000], [100])
+def b_cena(n):
+    from eventos_uso import LogUso
+    from estado import RepositorioEstado
+    from nucleo import Controlador
+    from agendador import Agendador
+    estado = RepositorioEstado()
+    ctl = Controlador(estado=estado, log_eventos=LogUso(), agendador=Agendador(persistir=False))
+    for i in range(n):
+        ctl.adicionar_dispositivo("bench", f"aparelho {i} (sala {i % 3})")
+    acao = [False]
+
+    def rodar():
+        # alterna tudo da "sala 1" (n/3 aparelhos) num único lote
+        acao[0] = not acao[0]
+        ctl.aplicar_cena("bench", "grupo:outros:sala 1", acao[0])
+        estado.flush()
+    return rodar
+
+
+@benchmark("relatorio.agregados[dispositivos]", [10, 1_000, 10_000], [10])
+def b_relatorio(n):
+    from consumo import Consumo
+    c = Consumo()
+    t0 = 1_700_000_000_000
+    for i in range(n):
+        c.ligar("lâmpada", f"comodo {i}", t0)
+        if i % 2:
+            c.desligar("lâmpada", f"comodo {i}", t0 + 3_600_000)
+    agora = t0 + 7_200_000
+    return lambda: (c.total(agora), c.dispositivos(agora))
+
+
+@benchmark("relatorio.motor_numpy[intervalos]", [10_000, 100_000, 1_000_000], [10_000])
+def b_motor(n):
+    try:
+        from motor_energia import Intervalos, MotorEnergia
+    except ImportError:
+        return None
+    rnd = _rnd()
+    t0 = 1_700_000_000_000
+    inicio = [t0 + rnd.randrange(0, 30 * 86_400_000) for _ in range(n)]
+    fim = [i + rnd.randrange(60_000, 4 * 3_600_000) for i in inicio]
+    iv = Intervalos.de_listas(["lâmpada"] * n, [f"comodo {i % 100}" for i in range(n)], inicio, fim)
+    motor = MotorEnergia()
+    return lambda: motor.calcular(iv, fuso_ms=0)
+
+
+@benchmark("solar.geracao_ano[domicilios]", [1, 10, 100], [1])
+def b_solar(n):
+    try:
+        import solar
+    except ImportError:
+        return None
+    # configurações diferentes e sem o cache: o custo do modelo em si
+    casas = [solar.Instalacao(potencia_kwp=2 + i % 8, inclinacao=10 + i % 30) for i in range(n)]
+    return lambda: [solar.geracao_ano.__wrapped__(c, 2026) for c in casas]
+
+
+@benchmark("otimizador.otimizar_lote[domicilios]", [10, 100, 1_000], [10])
+def b_otimizador(n):
+    try:
+        import otimizador
+        import solar
+        import tarifa
+    except ImportError:
+        return None
+    rnd = _rnd()
+    inicio_ms = int(datetime.datetime(2026, 1, 7).timestamp() * 1000)
+    branca = tarifa.branca()
+    casos = []
+    for i in range(n):
+        h = otimizador.horizonte(solar.Instalacao(potencia_kwp=i % 7), branca, inicio_ms)
+        base = h.instante(0)
+        casos.append((h, [otimizador.CargaFlexivel("ar condicionado", f"comodo {j}", rnd.choice([0.3, 1.2, 2.0]),
+                                                   datetime.timedelta(minutes=15 * rnd.randrange(1, 16)),
+                                                   base + datetime.timedelta(minutes=15 * rnd.randrange(16, 97)),
+                                                   rnd.random() < 0.8)
+                          for j in range(100)]))
+    return lambda: otimizador.otimizar_lote(casos)
+
+
+@benchmark("adaptador.enviar_varios[ordens]", [100, 1_000, 10_000], [100])
+def b_adaptador(n):
+    import asyncio
+    import gateway_local
+    from adaptador import AdaptadorMQTT, Ordem
+    ordens = [Ordem(f"casa{i % 50}", "lâmpada", f"comodo {i % 9}", i % 2 == 0) for i in range(n)]
+
+    async def enviar():
+        adaptador = AdaptadorMQTT(gateway_local.GatewayLocal().conectar)
+        await adaptador.enviar_varios(ordens)
+        await adaptador.fechar()
+    return lambda: asyncio.run(enviar())
+
+
+@benchmark("registro.consultas[dispositivos]", [1_000, 10_000, 100_000], [1_000])
+def b_registro(n):
+    # 1000 buscas por nome + ligados da casa + potência ligada + um grupo por trecho do cômodo
+    import cenas
+    import registro
+    rnd = _rnd()
+    categorias = ["lâmpada", "ar condicionado", "câmera", "tomada inteligente", "outros"]
+    dispositivos = {}
+    for i in range(n):
+        dispositivos.setdefault(categorias[i % 5], {})[f"bloco {i % 50} apto {i // 5}"] = rnd.random() < 0.3
+    reg = registro.montar(dispositivos)
+    nomes = [(c, m) for c, v in dispositivos.items() for m in v]
+    amostra = [nomes[rnd.randrange(len(nomes))] for _ in range(1_000)]
+    grupo = cenas.obter(cenas.nome_grupo(None, "bloco 7"))
+
+    def rodar():
+        for c, m in amostra:
+            reg.ligado(reg.id(c, m))
+        reg.ligados()
+        reg.potencia_ligada()
+        cenas.mudancas(grupo, reg, False)
+    return rodar
+
+
+@benchmark("eventos.entregar[eventos]", [1_000, 10_000, 100_000], [1_000])
+def b_eventos(n):
+    # de uma thread (executor do banco) para uma tela assinada no loop
+    import asyncio
+    import threading
+    from eventos import Barramento, Mudanca
+    eventos = [Mudanca("casa0", "lâmpada", f"comodo {i % 9}", i % 2 == 0, "tela") for i in range(n)]
+
+    async def entregar():
+        barramento = Barramento()
+        recebidos = [0]
+        fim = asyncio.Event()
+
+        def tela(lote):
+            recebidos[0] += len(lote)
+            if recebidos[0] == n:
+                fim.set()
+        barramento.assinar(Mudanca, tela, usuario="casa0", loop=asyncio.get_running_loop(), lote=True)
+        t = threading.Thread(target=lambda: [barramento.publicar(ev) for ev in eventos])
+        t.start()
+        await fim.wait()
+        t.join()
+    return lambda: asyncio.run(entregar())
+
+
+# scrypt é caro de propósito: poucos hashes por rodada bastam
+@benchmark("hash_senha", [10, 100], [10])
+def b_hash(n):
+    from app import hash_senha
+    return lambda: [hash_senha(f"senha{i}") for i in range(n)]
+
+
+@benchmark("cadastrar_usuario[usuarios]", [10, 100], [10])
+def b_cadastrar(n):
+    from app import cadastrar_usuario, criar_banco
+    criar_banco()
+    contador = [0]
+
+    def rodar():
+        contador[0] += 1
+        for i in range(n):
+            cadastrar_usuario(f"u{contador[0]}_{i}@bench", "senha", "Bench")
+    return rodar
+
+
+@benchmark("verificar_credenciais[usuarios]", [10, 100], [10])
+def b_verificar(n):
+    from app import cadastrar_usuario, criar_banco, verificar_credenciais
+    criar_banco()
+    emails = [f"login{n}_{i}@bench" for i in range(n)]
+    for e in emails:
+        cadastrar_usuario(e, "senha", "Bench")
+    return lambda: [verificar_credenciais(e, "senha") for e in emails]
+
+
+@benchmark("agendar[agendamentos]", [100, 1_000, 10_000], [100])
+def b_agendar(n):
+    from agendador import Agendador
+    quando = time.time() + 86_400
+
+    def rodar():
+        ag = Agendador(persistir=False)
+        ids = [ag.agendar("bench", "lâmpada", "sala", True, quando + i).id for i in range(n)]
+        for i in ids[::2]:
+            ag.cancelar(i)
+    return rodar
+
+
+@benchmark("agendar_persistido[agendamentos]", [100, 1_000], [100])
+def b_agendar_persistido(n):
+    from agendador import Agendador
+    quando = time.time() + 86_400
+
+    def rodar():
+        ag = Agendador()
+        ids = [ag.agendar("bench", "lâmpada", "sala", True, quando + i).id for i in range(n)]
+        for i in ids:
+            ag.cancelar(i)
+    return rodar
+
+
+@benchmark("recorrencia.proxima[regras]", [10_000, 100_000], [10_000])
+def b_proxima(n):
+    import recorrencia
+    rnd = _rnd()
+    regras = [recorrencia.criar(rnd.randrange(1, 128), rnd.randrange(24), rnd.randrange(60)) for _ in range(n)]
+    t0 = time.time()
+    return lambda: [recorrencia.proxima(r, t0) for r in regras]
+
+
+@benchmark("agendar_recorrente[regras]", [1_000, 10_000, 50_000], [1_000])
+def b_agendar_recorrente(n):
+    import recorrencia
+    from agendador import Agendador
+    regras = [recorrencia.criar(1 + i % 127, i % 24, i % 60) for i in range(n)]
+
+    def rodar():
+        ag = Agendador(persistir=False)
+        for r in regras:
+            ag.agendar("bench", "lâmpada", "sala", True, regra=r)
+    return rodar
+
+
+def medir(fn, repeticoes):
+    fn()  # aquecimento (imports, caches, páginas do SQLite)
+    tempos = []
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        fn()
+        tempos.append(time.perf_counter() - t0)
+    return tempos
+
+
+def rodar(filtro=None, rapido=False, repeticoes=5):
+    resultados = []
+    for nome, tamanhos, tamanhos_rapidos, fabrica in BENCHMARKS:
+        if filtro and filtro not in nome:
+            continue
+        for n in (tamanhos_rapidos if rapido else tamanhos):
+            fn = fabrica(n)
+            if fn is None:
+                print(f"{nome} [{n}]: pulado (dependência ausente)", file=sys.stderr)
+                continue
+            tempos = medir(fn, repeticoes)
+            r = {
+                "nome": nome,
+                "tamanho": n,
+                "repeticoes": repeticoes,
+                "melhor_s": min(tempos),
+                "mediana_s": statistics.median(tempos),
+            }
+            resultados.append(r)
+            print(f"{nome:40s} {n:>9,}  melhor {r['melhor_s'] * 1e3:10.3f} ms  "
+                  f"mediana {r['mediana_s'] * 1e3:10.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, baseline, tolerancia):
+    # regressão = mediana atual acima de (1 + tolerancia) x mediana do baseline
+    base = {(r["nome"], r["tamanho"]): r for r in baseline["resultados"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        b = base.get((r["nome"], r["tamanho"]))
+        if b is None:
+            continue
+        razao = r["mediana_s"] / b["mediana_s"] if b["mediana_s"] else float("inf")
+        r["baseline_mediana_s"] = b["mediana_s"]
+        r["razao"] = round(razao, 3)
+        marca = "REGRESSÃO" if razao > 1 + tolerancia else ("melhora" if razao < 1 - tolerancia else "")
+        print(f"{r['nome']:40s} {r['tamanho']:>9,}  {razao:6.2f}x  {marca}", file=sys.stderr)
+        if razao > 1 + tolerancia:
+            regressoes.append(r)
+    return regressoes
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks do SmartLight Solar")
+    ap.add_argument("--filtro", help="roda só os benchmarks cujo nome contém este texto")
+    ap.add_argument("--rapido", action="store_true", help="só o menor tamanho de cada benchmark")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--salvar", help="grava o resultado JSON neste arquivo")
+    ap.add_argument("--comparar", help="baseline JSON para detectar regressões")
+    ap.add_argument("--tolerancia", type=float, default=0.25, help="folga relativa antes de acusar regressão")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        banco.configurar(os.path.join(tmp, "bench.db"))
+        resultado = rodar(args.filtro, args.rapido, args.repeticoes)
+        banco.pool().fechar()
+
+    regressoes = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultado, json.load(f), args.tolerancia)
+        resultado["regressoes"] = len(regressoes)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
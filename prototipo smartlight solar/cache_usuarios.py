@@ -0,0 +1,131 @@
+# cache_usuarios.py
+# Cache por usuário compartilhado pelo processo inteiro (todas as abas/sessões
+# do mesmo usuário veem o mesmo objeto), com limite de usuários, de memória e
+# de tempo ocioso. Quem sai do cache volta do banco no próximo acesso.
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MAX_USUARIOS = int(os.environ.get("SMARTLIGHT_MAX_USUARIOS", "10000"))
+MAX_BYTES = int(float(os.environ.get("SMARTLIGHT_MEMORIA_MB", "256")) * 1024 * 1024)
+TTL = float(os.environ.get("SMARTLIGHT_TTL_USUARIO", "1800"))  # segundos sem acesso
+
+
+def tamanho_aproximado(obj, _vistos=None) -> int:
+    # sys.getsizeof recursivo para dicts, listas, tuplas, conjuntos e objetos simples
+    vistos = set() if _vistos is None else _vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    total = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            total += tamanho_aproximado(k, vistos) + tamanho_aproximado(v, vistos)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for v in obj:
+            total += tamanho_aproximado(v, vistos)
+    elif hasattr(obj, "__dict__"):
+        total += tamanho_aproximado(vars(obj), vistos)
+    return total
+
+
+class CacheLRU:
+    def __init__(self, max_itens: int = MAX_USUARIOS, max_bytes: int = MAX_BYTES, ttl: float = TTL,
+                 pode_despejar=None):
+        # pode_despejar(chave) -> False segura o item (ex.: escritas ainda não gravadas)
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.pode_despejar = pode_despejar
+        self._itens = OrderedDict()  # chave -> [valor, bytes, último acesso]; o mais antigo primeiro
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.despejos = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def chaves(self):
+        with self._lock:
+            return list(self._itens)
+
+    def obter(self, chave, padrao=None):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.faltas += 1
+                return padrao
+            self.acertos += 1
+            item[2] = time.monotonic()
+            self._itens.move_to_end(chave)
+            return item[0]
+
+    def colocar(self, chave, valor, tamanho: int = None):
+        # devolve o valor que ficou no cache (o já existente ganha de um novo)
+        tamanho = tamanho_aproximado(valor) if tamanho is None else tamanho
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None:
+                item[2] = time.monotonic()
+                self._itens.move_to_end(chave)
+                return item[0]
+            self._itens[chave] = [valor, tamanho, time.monotonic()]
+            self._bytes += tamanho
+        return valor
+
+    def medir(self, chave, tamanho: int = None):
+        # o valor cresceu/encolheu (ex.: dispositivo novo): refaz a conta
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return
+            novo = tamanho_aproximado(item[0]) if tamanho is None else tamanho
+            self._bytes += novo - item[1]
+            item[1] = novo
+
+    def remover(self, chave):
+        with self._lock:
+            item = self._itens.pop(chave, None)
+            if item is not None:
+                self._bytes -= item[1]
+            return None if item is None else item[0]
+
+    def despejar(self, agora: float = None, manter=None):
+        # tira os ociosos (ttl) e, do menos usado para o mais usado, o que passar
+        # dos limites; `manter` é a chave que acabou de entrar e não pode sair
+        agora = time.monotonic() if agora is None else agora
+        removidos = []
+        with self._lock:
+            n, total = len(self._itens), self._bytes
+            for chave, (_, tamanho, acesso) in self._itens.items():
+                if n <= self.max_itens and total <= self.max_bytes and agora - acesso < self.ttl:
+                    break  # daqui em diante todos são mais recentes
+                if chave == manter or (self.pode_despejar is not None and not self.pode_despejar(chave)):
+                    continue
+                removidos.append(chave)
+                n -= 1
+                total -= tamanho
+            for chave in removidos:
+                del self._itens[chave]
+            self._bytes = total
+            self.despejos += len(removidos)
+        return removidos
+
+    def memoria(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "max_itens": self.max_itens,
+                "max_bytes": self.max_bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "despejos": self.despejos,
+            }
@@ -0,0 +1,86 @@
+# cenas.py
+# Cenas ("modo noite") e grupos ("desligue tudo da sala"). Uma cena é uma lista
+# de seletores resolvida contra o registro.Registro do usuário na hora de
+# aplicar, então aparelhos adicionados depois também entram.
+from dataclasses import dataclass
+
+import numpy as np
+
+from texto import normalize_text
+
+# Agendamento.dispositivo dos agendamentos de cena; o nome da cena vai em comodo
+CENA = "cena"
+
+_PREFIXO_GRUPO = "grupo:"
+
+
+@dataclass(frozen=True)
+class Item:
+    ligado: bool = None     # None = ação do comando (grupos)
+    categoria: str = None   # None = todas as categorias
+    comodo: str = None      # normalizado; casa por palavras inteiras ("quarto" pega todos os quartos)
+    exceto: tuple = ()      # categorias que ficam de fora
+
+
+@dataclass(frozen=True)
+class Cena:
+    nome: str
+    itens: tuple
+
+
+CENAS = {
+    "modo noite": Cena("modo noite", (
+        Item(False, "lâmpada", "sala de estar"),
+        Item(False, "ar condicionado", "sala de estar"),
+        Item(True, "câmera"),
+    )),
+    "sair de casa": Cena("sair de casa", (
+        Item(False, exceto=("câmera",)),
+        Item(True, "câmera"),
+    )),
+    "cheguei": Cena("cheguei", (
+        Item(True, "lâmpada", "sala de estar"),
+        Item(False, "câmera", "sala de estar"),
+    )),
+}
+
+
+def nome_grupo(categoria: str = None, comodo: str = None) -> str:
+    return f"{_PREFIXO_GRUPO}{categoria or '*'}:{comodo or '*'}"
+
+
+def obter(nome: str) -> Cena:
+    if nome.startswith(_PREFIXO_GRUPO):
+        categoria, comodo = nome[len(_PREFIXO_GRUPO):].split(":", 1)
+        return Cena(nome, (Item(None, None if categoria == "*" else categoria, None if comodo == "*" else comodo),))
+    return CENAS[nome]
+
+
+def mudancas(cena: Cena, registro, acao: bool = None):
+    # [(categoria, nome, ligado)] só do que a cena muda, resolvido sobre o
+    # registro.Registro do usuário: cada item vira uma seleção de ids e a
+    # comparação com o estado atual é feita no bitset
+    alvo = np.full(len(registro), -1, dtype=np.int8)  # -1 = fora da cena
+    for item in cena.itens:
+        ligado = acao if item.ligado is None else item.ligado
+        if ligado is None:
+            continue
+        trecho = normalize_text(item.comodo) if item.comodo else None
+        alvo[registro.selecionar(item.categoria, trecho, item.exceto)] = ligado
+    ids = np.flatnonzero(alvo >= 0)
+    ids = ids[registro.estados(ids) != (alvo[ids] == 1)]
+    return [(*registro.nome(i), bool(alvo[i])) for i in ids.tolist()]
+
+
+def descrever(nome: str, acao: bool = None) -> str:
+    if not nome.startswith(_PREFIXO_GRUPO):
+        return nome
+    item = obter(nome).itens[0]
+    verbo = "ligar" if acao else "desligar"
+    if item.categoria and item.comodo:
+        return f"{verbo} {item.categoria} ({item.comodo})"
+    if item.categoria:
+        return f"{verbo} todos: {item.categoria}"
+    if item.comodo:
+        return f"{verbo} tudo ({item.comodo})"
+    return f"{verbo} tudo"
@@ -0,0 +1,243 @@
+# consumo.py
+# Agregados de energia mantidos incrementalmente a cada liga/desliga:
+# kWh e custo (R$, pela tarifa) por dispositivo, por cômodo, por quarto de
+# hora, por hora e por dia. O relatório só lê esses totais e soma o trecho em
+# andamento dos dispositivos ligados.
+import datetime
+import threading
+import time
+
+from tarifa import Tarifa, tarifa_padrao
+
+# Consumo médio por dispositivo
+
+CONSUMO_PADRAO = {
+    "ar condicionado": 1.2,   # kWh por hora
+    "lâmpada": 0.06,          # kWh por hora
+    "câmera": 0.02,           # kWh por hora
+    "outros": 0.1
+}
+
+FATOR_CO2 = 0.084  # 84 g CO2 per kWh => 0.084 kg (emissão da energia da rede)
+
+MS_POR_HORA = 3_600_000
+MS_POR_QUARTO = MS_POR_HORA // 4
+
+
+def potencia(dispositivo: str) -> float:
+    return CONSUMO_PADRAO.get(dispositivo, CONSUMO_PADRAO["outros"])
+
+
+def co2(kwh: float) -> float:
+    return kwh * FATOR_CO2
+
+
+class Consumo:
+    def __init__(self, tarifa: Tarifa = None):
+        self._lock = threading.Lock()
+        self.tarifa = tarifa or tarifa_padrao()
+        self.total_kwh = 0.0
+        self.por_dispositivo = {}  # (dispositivo, comodo) -> kWh
+        self.por_comodo = {}       # comodo -> kWh
+        self.por_quarto = {}       # quarto de hora epoch (ts // MS_POR_QUARTO) -> kWh
+        self._mudados = {}         # quarto -> kWh somado desde a última leitura do balanço solar
+        self.por_hora = {}         # hora epoch (ts // MS_POR_HORA) -> kWh
+        self.por_dia = {}          # datetime.date local -> kWh
+        self.custo_total = 0.0
+        self.custo_por_dispositivo = {}  # (dispositivo, comodo) -> R$
+        self.custo_por_comodo = {}       # comodo -> R$
+        self.custo_por_dia = {}          # datetime.date local -> R$
+        self.abertos = {}          # (dispositivo, comodo) -> inicio em ms
+        # integral da tarifa dos abertos até a última hora cheia já lida:
+        # (dispositivo, comodo) -> (inicio, hora cheia em ms, integral)
+        self._integrais = {}
+        # kWh em andamento = agora * soma(p) - soma(p * inicio), em O(1);
+        # os tempos são relativos a _base para não perder precisão
+        self._base = None
+        self._soma_potencia = 0.0
+        self._soma_potencia_inicio = 0.0
+
+    def ligar(self, dispositivo: str, comodo: str, ts_ms: int):
+        chave = (dispositivo, comodo)
+        with self._lock:
+            self.por_dispositivo.setdefault(chave, 0.0)
+            if chave in self.abertos:
+                return
+            p = potencia(dispositivo) / MS_POR_HORA
+            if self._base is None:
+                self._base = ts_ms
+            self.abertos[chave] = ts_ms
+            self._soma_potencia += p
+            self._soma_potencia_inicio += p * (ts_ms - self._base)
+
+    def desligar(self, dispositivo: str, comodo: str, ts_ms: int):
+        # (início, kWh, R$) do trecho que fechou; None se não estava ligado
+        chave = (dispositivo, comodo)
+        with self._lock:
+            inicio = self.abertos.pop(chave, None)
+            if inicio is None:
+                return None
+            self._integrais.pop(chave, None)
+            p = potencia(dispositivo) / MS_POR_HORA
+            self._soma_potencia -= p
+            self._soma_potencia_inicio -= p * (inicio - self._base)
+            if not self.abertos:
+                # zera o erro acumulado de ponto flutuante
+                self._base = None
+                self._soma_potencia = self._soma_potencia_inicio = 0.0
+            kwh, custo = self._acumular(chave, inicio, ts_ms, p)
+            return inicio, kwh, custo
+
+    def _acumular(self, chave, inicio, fim, p):
+        if fim <= inicio:
+            return 0.0, 0.0
+        kwh = (fim - inicio) * p
+        self.total_kwh += kwh
+        self.por_dispositivo[chave] = self.por_dispositivo.get(chave, 0.0) + kwh
+        self.por_comodo[chave[1]] = self.por_comodo.get(chave[1], 0.0) + kwh
+        # reparte o intervalo pelos quartos de hora, horas e dias que ele
+        # cruza; o preço da tarifa é constante dentro de cada hora
+        custo = 0.0
+        hora_lt = None
+        t = inicio
+        while t < fim:
+            quarto = t // MS_POR_QUARTO
+            fim_quarto = min(fim, (quarto + 1) * MS_POR_QUARTO)
+            parcela = (fim_quarto - t) * p
+            self.por_quarto[quarto] = self.por_quarto.get(quarto, 0.0) + parcela
+            self._mudados[quarto] = self._mudados.get(quarto, 0.0) + parcela
+            hora = t // MS_POR_HORA
+            self.por_hora[hora] = self.por_hora.get(hora, 0.0) + parcela
+            if hora != hora_lt:
+                hora_lt = hora
+                lt = time.localtime(hora * 3600)
+                dia = datetime.date(lt.tm_year, lt.tm_mon, lt.tm_mday)
+                preco = self.tarifa.preco_local(lt)
+            self.por_dia[dia] = self.por_dia.get(dia, 0.0) + parcela
+            reais = parcela * preco
+            self.custo_por_dia[dia] = self.custo_por_dia.get(dia, 0.0) + reais
+            custo += reais
+            t = fim_quarto
+        self.custo_total += custo
+        self.custo_por_dispositivo[chave] = self.custo_por_dispositivo.get(chave, 0.0) + custo
+        self.custo_por_comodo[chave[1]] = self.custo_por_comodo.get(chave[1], 0.0) + custo
+        return kwh, custo
+
+    # leitura
+
+    def _andamento(self, agora_ms):
+        if self._base is None:
+            return 0.0
+        return max(0.0, (agora_ms - self._base) * self._soma_potencia - self._soma_potencia_inicio)
+
+    def em_andamento(self, agora_ms: int) -> float:
+        with self._lock:
+            return self._andamento(agora_ms)
+
+    def total(self, agora_ms: int) -> float:
+        with self._lock:
+            return self.total_kwh + self._andamento(agora_ms)
+
+    def dispositivos(self, agora_ms: int):
+        # [(dispositivo, comodo, kWh)] incluindo o trecho em andamento
+        with self._lock:
+            linhas = []
+            for (disp, comodo), kwh in self.por_dispositivo.items():
+                inicio = self.abertos.get((disp, comodo))
+                if inicio is not None and agora_ms > inicio:
+                    kwh += (agora_ms - inicio) * potencia(disp) / MS_POR_HORA
+                linhas.append((disp, comodo, kwh))
+            return linhas
+
+    def quartos(self):
+        # (cópia de por_quarto, [(inicio, kWh por ms)] dos dispositivos ligados)
+        with self._lock:
+            abertos = [(inicio, potencia(disp) / MS_POR_HORA) for (disp, _), inicio in self.abertos.items()]
+            return dict(self.por_quarto), abertos
+
+    def quartos_mudados(self, ultimo: int, todos: bool = False):
+        # para o balanço solar corrente (solar.BalancoCorrente), numa leitura só:
+        # {quarto: (kWh, kWh somado desde a chamada anterior)} (com `todos`,
+        # todos os quartos), [(inicio, kWh por ms)] dos ligados e o kWh fechado
+        # de cada quarto do primeiro ligado até `ultimo`
+        with self._lock:
+            if todos:
+                mudados = {q: (kwh, kwh) for q, kwh in self.por_quarto.items()}
+            else:
+                mudados = {q: (self.por_quarto[q], kwh) for q, kwh in self._mudados.items()}
+            self._mudados = {}
+            abertos = [(inicio, potencia(disp) / MS_POR_HORA) for (disp, _), inicio in self.abertos.items()]
+            fechados = []
+            if abertos:
+                primeiro = min(inicio for inicio, _ in abertos) // MS_POR_QUARTO
+                fechados = [self.por_quarto.get(q, 0.0) for q in range(primeiro, ultimo + 1)]
+            return mudados, abertos, fechados
+
+    def custos(self, agora_ms: int):
+        # (R$ por (dispositivo, comodo), R$ por cômodo, R$ total) com o trecho em andamento
+        with self._lock:
+            por_dispositivo = dict(self.custo_por_dispositivo)
+            por_comodo = dict(self.custo_por_comodo)
+            total = self.custo_total
+            for (disp, comodo), inicio in self.abertos.items():
+                reais = self._custo_aberto(disp, comodo, inicio, agora_ms)
+                por_dispositivo[(disp, comodo)] = por_dispositivo.get((disp, comodo), 0.0) + reais
+                por_comodo[comodo] = por_comodo.get(comodo, 0.0) + reais
+                total += reais
+            return por_dispositivo, por_comodo, total
+
+    # leituras pontuais (o relatório refaz só as linhas que um evento mudou)
+
+    def _custo_aberto(self, disp, comodo, inicio, agora_ms):
+        return potencia(disp) / MS_POR_HORA * self._integral_aberta((disp, comodo), inicio, agora_ms)
+
+    def _integral_aberta(self, chave, inicio, agora_ms):
+        # tarifa.integral(inicio, agora_ms) sem refazer as horas já somadas:
+        # cada leitura só percorre o que passou desde a última hora cheia
+        guardado = self._integrais.get(chave)
+        if guardado is None or guardado[0] != inicio or guardado[1] > agora_ms:
+            guardado = (inicio, inicio, 0.0)
+        _, ate, soma = guardado
+        hora_cheia = agora_ms // MS_POR_HORA * MS_POR_HORA
+        if hora_cheia > ate:
+            soma += self.tarifa.integral(ate, hora_cheia)
+            ate = hora_cheia
+            self._integrais[chave] = (inicio, ate, soma)
+        return soma + self.tarifa.integral(ate, agora_ms)
+
+    def linha(self, dispositivo: str, comodo: str, agora_ms: int):
+        # (kWh, R$) de um dispositivo com o trecho em andamento, em O(1)
+        chave = (dispositivo, comodo)
+        with self._lock:
+            kwh = self.por_dispositivo.get(chave, 0.0)
+            custo = self.custo_por_dispositivo.get(chave, 0.0)
+            inicio = self.abertos.get(chave)
+            if inicio is not None and agora_ms > inicio:
+                kwh += (agora_ms - inicio) * potencia(dispositivo) / MS_POR_HORA
+                custo += self._custo_aberto(dispositivo, comodo, inicio, agora_ms)
+            return kwh, custo
+
+    def custo_comodo(self, comodo: str, agora_ms: int) -> float:
+        # R$ do cômodo com o trecho em andamento; O(dispositivos ligados)
+        with self._lock:
+            return self.custo_por_comodo.get(comodo, 0.0) + sum(
+                self._custo_aberto(disp, c, inicio, agora_ms) for (disp, c), inicio in self.abertos.items()
+                if c == comodo)
+
+    def custo(self, agora_ms: int) -> float:
+        # R$ total com o trecho em andamento; O(dispositivos ligados)
+        with self._lock:
+            return self.custo_total + sum(self._custo_aberto(disp, comodo, inicio, agora_ms)
+                                          for (disp, comodo), inicio in self.abertos.items())
+
+    def custo_desde(self, desde: datetime.date, agora_ms: int) -> float:
+        # R$ do dia local `desde` (à meia-noite) até agora
+        inicio_ms = int(time.mktime(desde.timetuple()) * 1000)
+        with self._lock:
+            total = sum(v for dia, v in self.custo_por_dia.items() if dia >= desde)
+            for (disp, comodo), inicio in self.abertos.items():
+                if inicio >= inicio_ms:
+                    total += self._custo_aberto(disp, comodo, inicio, agora_ms)
+                else:
+                    total += potencia(disp) / MS_POR_HORA * self.tarifa.integral(inicio_ms, agora_ms)
+            return total
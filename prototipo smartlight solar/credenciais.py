@@ -0,0 +1,119 @@
+# credenciais.py
+# Hash e verificação de senhas fora da thread da interface.
+# Usa scrypt (com sal, custo de memória configurável) num pool limitado de
+# threads; linhas antigas com SHA-256 puro são regravadas no primeiro login.
+import hashlib
+import hmac
+import os
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import banco
+
+# custo do scrypt: N (potência de 2), r e p; memória ~ 128 * N * r bytes
+SCRYPT_N = int(os.environ.get("SMARTLIGHT_SCRYPT_N", str(2 ** 14)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+TAMANHO_SAL = 16
+TRABALHADORES = int(os.environ.get("SMARTLIGHT_CREDENCIAIS_THREADS", "4"))
+
+_sha256_legado = re.compile(r'^[0-9a-f]{64}$')
+
+
+def hash_legado(senha: str) -> str:
+    return hashlib.sha256(senha.encode()).hexdigest()
+
+
+def gerar_hash(senha: str, n: int = None) -> str:
+    n = n or SCRYPT_N
+    sal = os.urandom(TAMANHO_SAL)
+    chave = hashlib.scrypt(senha.encode(), salt=sal, n=n, r=SCRYPT_R, p=SCRYPT_P,
+                           maxmem=256 * n * SCRYPT_R)
+    return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${sal.hex()}${chave.hex()}"
+
+
+def conferir(senha: str, armazenado: str, n: int = None):
+    # (senha confere?, precisa regravar o hash?)
+    if not armazenado:
+        return False, False
+    if _sha256_legado.match(armazenado):
+        ok = hmac.compare_digest(armazenado, hash_legado(senha))
+        return ok, ok
+    try:
+        _, n_salvo, r, p, sal, chave = armazenado.split("$")
+        n_salvo, r, p = int(n_salvo), int(r), int(p)
+        calculada = hashlib.scrypt(senha.encode(), salt=bytes.fromhex(sal), n=n_salvo, r=r, p=p,
+                                   maxmem=256 * n_salvo * r)
+    except ValueError:
+        return False, False
+    ok = hmac.compare_digest(calculada.hex(), chave)
+    # custo mudou desde que a senha foi gravada: aproveita o login para atualizar
+    return ok, ok and n_salvo != (n or SCRYPT_N)
+
+
+class ServicoCredenciais:
+    def __init__(self, trabalhadores: int = TRABALHADORES, n: int = None, max_pendentes: int = None):
+        self.n = n or SCRYPT_N
+        self._pool = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix="credenciais")
+        # limita a fila: acima disso quem pede espera em vez de acumular memória
+        self._vagas = threading.BoundedSemaphore(max_pendentes or trabalhadores * 16)
+        self.rehashes = 0
+        self._lock_contagem = threading.Lock()  # rehashes sobe em várias threads do pool
+
+    def _enviar(self, fn, *args):
+        self._vagas.acquire()
+        try:
+            futuro = self._pool.submit(fn, *args)
+        except BaseException:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return futuro
+
+    # as funções abaixo devolvem concurrent.futures.Future
+
+    def verificar(self, email: str, senha: str):
+        return self._enviar(self._verificar, email, senha)
+
+    def cadastrar(self, email: str, senha: str, nome: str = "Usuário"):
+        return self._enviar(self._cadastrar, email, senha, nome)
+
+    def gerar_hash(self, senha: str):
+        return self._enviar(gerar_hash, senha, self.n)
+
+    def fechar(self):
+        self._pool.shutdown(wait=True)
+
+    # trabalho executado no pool
+
+    def _verificar(self, email, senha):
+        with banco.conexao() as conn:
+            row = conn.execute(banco.SQL_SENHA_POR_EMAIL, (email,)).fetchone()
+        if not row:
+            return False
+        ok, regravar = conferir(senha, row[0], self.n)
+        if regravar:
+            novo = gerar_hash(senha, self.n)
+            with banco.conexao() as conn:
+                # só troca se ninguém alterou a senha no meio tempo
+                conn.execute(banco.SQL_REGRAVAR_SENHA, (novo, email, row[0]))
+            with self._lock_contagem:
+                self.rehashes += 1
+        return ok
+
+    def _cadastrar(self, email, senha, nome):
+        # o scrypt roda antes de pegar a conexão: ela não fica presa durante o hash
+        senha_hash = gerar_hash(senha, self.n)
+        try:
+            with banco.conexao() as conn:
+                conn.execute(banco.SQL_INSERIR_USUARIO, (nome, email, senha_hash))
+            return True, "Usuário cadastrado com sucesso!"
+        except sqlite3.IntegrityError:
+            return False, "E-mail já cadastrado."
+        except sqlite3.OperationalError as e:
+            return False, f"Erro no banco: {e}"
+
+
+servico = ServicoCredenciais()
@@ -0,0 +1,176 @@
+# estado.py
+# Estado dos dispositivos por usuário, persistido no SQLite.
+# Leituras e toggles ficam em memória; as escritas são agrupadas (write-behind)
+# e gravadas em lote por uma thread, com flush garantido no encerramento.
+# O cache é um só para o processo (todas as abas do usuário veem o mesmo
+# estado) e despeja usuários ociosos ou além do limite de memória.
+import atexit
+import copy
+import itertools
+import logging
+import threading
+
+import banco
+from cache_usuarios import CacheLRU, MAX_BYTES, MAX_USUARIOS, TTL
+
+log = logging.getLogger(__name__)
+
+DISPOSITIVOS_PADRAO = {
+    "ar condicionado": {
+        "sala de estar": False,
+        "quarto do amom": False,
+        "quarto do victor": False,
+        "quarto do fernando": False
+    },
+    "lâmpada": {
+        "sala de estar": False,
+        "quarto do amom": False,
+        "quarto do victor": False,
+        "quarto do fernando": False
+    },
+    "câmera": {
+        "quintal": False,
+        "garagem": False,
+        "lavanderia": False,
+        "sala de estar": False
+    },
+    "outros": {}
+}
+
+SQL_CARREGAR = "SELECT categoria, nome, ligado FROM estado_dispositivos WHERE usuario = ?"
+SQL_GRAVAR = "INSERT OR REPLACE INTO estado_dispositivos (usuario, categoria, nome, ligado) VALUES (?, ?, ?, ?)"
+
+
+class RepositorioEstado:
+    def __init__(self, intervalo_flush: float = 0.25, max_usuarios: int = MAX_USUARIOS,
+                 max_bytes: int = MAX_BYTES, ttl: float = TTL):
+        self.intervalo_flush = intervalo_flush
+        # usuario -> {categoria: {nome: bool}}; quem tem escrita pendente não sai
+        self._cache = CacheLRU(max_usuarios, max_bytes, ttl, pode_despejar=self._pode_despejar)
+        self._sujos = {}   # (usuario, categoria, nome) -> bool, só o último valor
+        self._usuarios_sujos = set()
+        self._lock = threading.RLock()
+        self._acordar = threading.Event()
+        self._parar = False
+        self._thread = None
+        self._versoes = {}  # usuario -> geração, muda quando dispositivos são adicionados ou recarregados
+        self._geracao = itertools.count(1)
+        self.lotes_gravados = 0
+
+    def _iniciar_thread(self):
+        if self._thread is None:
+            self._parar = False
+            self._thread = threading.Thread(target=self._laco, name="estado-flush", daemon=True)
+            self._thread.start()
+
+    # leitura
+
+    def carregar(self, usuario: str) -> dict:
+        estado = self._cache.obter(usuario)
+        if estado is not None:
+            return estado
+        with banco.conexao() as conn:
+            rows = conn.execute(SQL_CARREGAR, (usuario,)).fetchall()
+        estado = copy.deepcopy(DISPOSITIVOS_PADRAO)
+        for categoria, nome, ligado in rows:
+            estado.setdefault(categoria, {})[nome] = bool(ligado)
+        with self._lock:
+            # escritas ainda não gravadas valem mais que o banco
+            if usuario in self._usuarios_sujos:
+                for (u, categoria, nome), ligado in self._sujos.items():
+                    if u == usuario:
+                        estado.setdefault(categoria, {})[nome] = ligado
+            # outra sessão pode ter carregado enquanto líamos o banco
+            atual = self._cache.colocar(usuario, estado)
+            if atual is estado:
+                self._versoes[usuario] = next(self._geracao)
+        self._despejar(usuario)
+        return atual
+
+    def _pode_despejar(self, usuario):
+        return usuario not in self._usuarios_sujos
+
+    def _despejar(self, manter=None):
+        for usuario in self._cache.despejar(manter=manter):
+            self._versoes.pop(usuario, None)
+
+    def memoria(self) -> dict:
+        return self._cache.memoria()
+
+    def versao(self, usuario: str) -> int:
+        # para caches derivados da lista de dispositivos (ex.: índice do assistente)
+        return self._versoes.get(usuario, 0)
+
+    # escrita (só memória; o banco é atualizado pela thread de flush)
+
+    def definir(self, usuario: str, categoria: str, nome: str, ligado: bool):
+        estado = self.carregar(usuario)
+        with self._lock:
+            estado.setdefault(categoria, {})[nome] = ligado
+            self._sujos[(usuario, categoria, nome)] = ligado
+            self._usuarios_sujos.add(usuario)
+            self._iniciar_thread()
+
+    def definir_varios(self, usuario: str, mudancas):
+        # [(categoria, nome, ligado)] de uma vez (cenas): um lock, um lote no flush
+        estado = self.carregar(usuario)
+        with self._lock:
+            for categoria, nome, ligado in mudancas:
+                estado.setdefault(categoria, {})[nome] = ligado
+                self._sujos[(usuario, categoria, nome)] = ligado
+            self._usuarios_sujos.add(usuario)
+            self._iniciar_thread()
+
+    def adicionar(self, usuario: str, categoria: str, nome: str, ligado: bool = False):
+        estado = self.carregar(usuario)
+        with self._lock:
+            novo = nome not in estado.setdefault(categoria, {})
+            if novo:
+                self._versoes[usuario] = next(self._geracao)
+        self.definir(usuario, categoria, nome, ligado)
+        if novo:
+            self._cache.medir(usuario)
+
+    # flush
+
+    def flush(self):
+        with self._lock:
+            if not self._sujos:
+                return 0
+            sujos, self._sujos = self._sujos, {}
+            usuarios, self._usuarios_sujos = self._usuarios_sujos, set()
+        linhas = [(u, c, n, int(v)) for (u, c, n), v in sujos.items()]
+        try:
+            with banco.conexao() as conn:
+                conn.executemany(SQL_GRAVAR, linhas)
+        except Exception:
+            # devolve o que não foi gravado sem sobrescrever toggles mais novos
+            with self._lock:
+                for chave, valor in sujos.items():
+                    self._sujos.setdefault(chave, valor)
+                self._usuarios_sujos |= usuarios
+            raise
+        self.lotes_gravados += 1
+        return len(linhas)
+
+    def _laco(self):
+        while not self._parar:
+            self._acordar.wait(self.intervalo_flush)
+            self._acordar.clear()
+            try:
+                self.flush()
+                self._despejar()
+            except Exception:
+                log.exception("falha ao gravar estado dos dispositivos")
+
+    def fechar(self):
+        self._parar = True
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+repositorio = RepositorioEstado()
+atexit.register(repositorio.fechar)
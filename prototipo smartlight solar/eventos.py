@@ -0,0 +1,204 @@
+# eventos.py
+# Barramento de eventos do núcleo: quem publica (controlador, agendador,
+# threads do banco) não conhece quem assina (telas, relatório, avisos).
+# Assinatura por tipo de evento e, opcionalmente, por usuário.
+# Sem loop, o assinante é chamado na hora, na thread de quem publicou. Com
+# loop, o evento entra numa fila limitada da assinatura e é entregue na
+# thread do loop, em lote. Fila cheia: quem publica de outra thread espera
+# um pouco por vaga (backpressure); se a vaga não abrir, ou se quem publica
+# é o próprio loop, os mais antigos saem e o assinante recebe um Perdidos
+# antes dos próximos, para se ressincronizar lendo o estado de novo.
+import asyncio
+import collections
+import logging
+import os
+import threading
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+MAXIMO_FILA = int(os.environ.get("SMARTLIGHT_EVENTOS_FILA", "1000"))
+ESPERA_VAGA = 0.05  # segundos que quem publica espera por vaga numa fila cheia
+
+
+# tipos de evento
+
+@dataclass
+class Mudanca:
+    # liga/desliga aplicado
+    usuario: str
+    dispositivo: str
+    comodo: str
+    ligado: bool
+    origem: str
+    atrasado: bool = False
+
+
+@dataclass
+class MudancaLote:
+    # cena/grupo aplicado de uma vez
+    usuario: str
+    cena: str
+    mudancas: list  # [Mudanca]
+    origem: str
+    acao: bool = None
+    atrasado: bool = False
+
+
+@dataclass
+class AgendamentoCriado:
+    usuario: str
+    agendamento: object  # agendador.Agendamento
+
+
+@dataclass
+class AgendamentoCancelado:
+    usuario: str
+    agendamento: object
+
+
+@dataclass
+class AgendamentoExecutado:
+    usuario: str
+    agendamento: object
+    ok: bool = True  # False: o aparelho não confirmou
+
+
+@dataclass
+class IntervaloUso:
+    # trecho ligado que acabou de fechar (o aparelho foi desligado)
+    usuario: str
+    dispositivo: str
+    comodo: str
+    inicio_ms: int
+    fim_ms: int
+    kwh: float
+    custo: float
+
+
+@dataclass
+class Perdidos:
+    # eventos descartados nesta assinatura por fila cheia
+    usuario: str
+    quantidade: int
+
+
+class Assinatura:
+    def __init__(self, barramento, chaves, fn, usuario, loop, maximo, espera, lote):
+        self.barramento = barramento
+        self.chaves = chaves
+        self.fn = fn
+        self.usuario = usuario
+        self.loop = loop
+        self.maximo = max(1, maximo)
+        self.espera = espera
+        self.lote = lote
+        self.ativa = True
+        self._fila = collections.deque()
+        self._cond = threading.Condition()
+        self._agendada = False  # já há um _drenar a caminho do loop
+        self._perdidos = 0
+        self.entregues = 0
+        self.descartados = 0
+
+    def cancelar(self):
+        with self._cond:
+            self.ativa = False
+            self._fila.clear()
+            self._cond.notify_all()
+        self.barramento._remover(self)
+
+    def _entregar(self, evento):
+        if self.loop is None:
+            self._chamar([evento])
+            return
+        with self._cond:
+            if len(self._fila) >= self.maximo and self.espera and not self._no_loop():
+                self._cond.wait_for(lambda: len(self._fila) < self.maximo or not self.ativa, self.espera)
+            if not self.ativa:
+                return
+            if len(self._fila) >= self.maximo:
+                self._fila.popleft()
+                self._perdidos += 1
+                self.descartados += 1
+            self._fila.append(evento)
+            if self._agendada:
+                return
+            self._agendada = True
+        try:
+            self.loop.call_soon_threadsafe(self._drenar)
+        except RuntimeError:
+            # loop fechado: a sessão acabou
+            self.cancelar()
+
+    def _no_loop(self):
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _drenar(self):
+        # na thread do loop: tudo o que acumulou desde o último lote
+        with self._cond:
+            eventos = list(self._fila)
+            self._fila.clear()
+            perdidos, self._perdidos = self._perdidos, 0
+            self._agendada = False
+            self._cond.notify_all()
+        if perdidos:
+            eventos.insert(0, Perdidos(self.usuario, perdidos))
+        if eventos and self.ativa:
+            self._chamar(eventos)
+
+    def _chamar(self, eventos):
+        self.entregues += len(eventos)
+        try:
+            if self.lote:
+                self.fn(eventos)
+            else:
+                for evento in eventos:
+                    self.fn(evento)
+        except Exception:
+            log.exception("assinante de eventos falhou")
+
+
+class Barramento:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (tipo, usuario ou None) -> tupla de assinaturas; trocada inteira a
+        # cada mudança, então publicar lê sem lock
+        self._assinaturas = {}
+
+    def assinar(self, tipos, fn, usuario: str = None, loop: asyncio.AbstractEventLoop = None,
+                maximo: int = MAXIMO_FILA, espera: float = ESPERA_VAGA, lote: bool = False) -> Assinatura:
+        # tipos: classe ou tupla de classes de evento; usuario None = de todos
+        # lote: fn recebe a lista de eventos entregues juntos (só com loop faz diferença)
+        tipos = tipos if isinstance(tipos, tuple) else (tipos,)
+        chaves = [(t, usuario) for t in tipos]
+        a = Assinatura(self, chaves, fn, usuario, loop, maximo, espera, lote)
+        with self._lock:
+            for chave in chaves:
+                self._assinaturas[chave] = self._assinaturas.get(chave, ()) + (a,)
+        return a
+
+    def _remover(self, a: Assinatura):
+        with self._lock:
+            for chave in a.chaves:
+                restantes = tuple(x for x in self._assinaturas.get(chave, ()) if x is not a)
+                if restantes:
+                    self._assinaturas[chave] = restantes
+                else:
+                    self._assinaturas.pop(chave, None)
+
+    def publicar(self, evento):
+        tipo = type(evento)
+        alvos = self._assinaturas.get((tipo, None), ())
+        usuario = getattr(evento, "usuario", None)
+        if usuario is not None:
+            alvos += self._assinaturas.get((tipo, usuario), ())
+        for a in alvos:
+            a._entregar(evento)
+
+    def assinantes(self) -> int:
+        with self._lock:
+            return len({id(a) for assinaturas in self._assinaturas.values() for a in assinaturas})
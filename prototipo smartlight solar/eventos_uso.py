@@ -0,0 +1,206 @@
+# eventos_uso.py
+# Log append-only de eventos liga/desliga (tabela usage_events).
+# Os eventos entram num buffer circular em memória e são gravados em lote
+# (executemany numa única transação) por uma thread de flush.
+import atexit
+import logging
+import threading
+import time
+
+import banco
+
+log = logging.getLogger(__name__)
+
+SQL_INSERIR = "INSERT INTO usage_events (usuario, dispositivo, comodo, ligado, ts) VALUES (?, ?, ?, ?, ?)"
+SQL_INTERVALO = (
+    "SELECT usuario, dispositivo, comodo, ligado, ts FROM usage_events"
+    " WHERE ts >= ? AND ts < ? ORDER BY ts, id"
+)
+SQL_INTERVALO_USUARIO = (
+    "SELECT usuario, dispositivo, comodo, ligado, ts FROM usage_events"
+    " WHERE usuario = ? AND ts >= ? AND ts < ? ORDER BY ts, id"
+)
+
+
+def agora_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+class BufferCircular:
+    # capacidade fixa; quando enche, o produtor força um flush síncrono
+    # em vez de sobrescrever eventos que ainda não foram gravados. Se a
+    # gravação falha, o atraso cabe até `limite` (a capacidade volta ao normal
+    # quando o buffer esvazia); além disso os mais antigos são descartados e
+    # contados em `descartados`
+
+    def __init__(self, capacidade: int, limite: int = None):
+        self.capacidade = self._base = capacidade
+        self.limite = max(limite or capacidade * 16, capacidade)
+        self.descartados = 0
+        self._itens = [None] * capacidade
+        self._inicio = 0
+        self._tamanho = 0
+
+    def __len__(self):
+        return self._tamanho
+
+    def cheio(self):
+        return self._tamanho == self.capacidade
+
+    def adicionar(self, item):
+        fim = (self._inicio + self._tamanho) % self.capacidade
+        self._itens[fim] = item
+        self._tamanho += 1
+
+    def drenar(self):
+        n, i, cap = self._tamanho, self._inicio, self.capacidade
+        if i + n <= cap:
+            itens = self._itens[i:i + n]
+        else:
+            itens = self._itens[i:] + self._itens[:(i + n) % cap]
+        self._inicio = (i + n) % cap
+        self._tamanho = 0
+        if cap != self._base:
+            # atraso gravado: volta ao tamanho normal
+            self.capacidade = self._base
+            self._itens = [None] * self._base
+            self._inicio = 0
+        return itens
+
+    def devolver(self, itens):
+        # põe `itens` de volta na frente (gravação falhou), antes do que entrou
+        # nesse meio tempo
+        self._refazer(list(itens) + self.drenar())
+
+    def forcar(self, item):
+        # entra mesmo com o buffer cheio (a gravação está falhando)
+        self._refazer(self.drenar() + [item])
+
+    def _refazer(self, itens):
+        # cresce até o limite; passando dele, saem os mais antigos
+        if len(itens) > self.limite:
+            self.descartados += len(itens) - self.limite
+            itens = itens[-self.limite:]
+        self.capacidade = max(self._base, len(itens))
+        self._itens = itens + [None] * (self.capacidade - len(itens))
+        self._inicio = 0
+        self._tamanho = len(itens)
+
+
+class LogUso:
+    def __init__(self, capacidade: int = 4096, intervalo_flush: float = 1.0, limite: int = None):
+        self.intervalo_flush = intervalo_flush
+        self._buffer = BufferCircular(capacidade, limite)
+        self._lock = threading.Lock()
+        self._lock_gravacao = threading.Lock()  # mantém a ordem dos lotes
+        self._acordar = threading.Event()
+        self._parar = False
+        self._thread = None
+        self.lotes_gravados = 0
+        self.eventos_gravados = 0
+
+    @property
+    def eventos_descartados(self):
+        # perdidos por falha de gravação longa demais (buffer no limite)
+        return self._buffer.descartados
+
+    def _iniciar_thread(self):
+        if self._thread is None:
+            self._parar = False
+            self._thread = threading.Thread(target=self._laco, name="uso-flush", daemon=True)
+            self._thread.start()
+
+    def registrar(self, usuario: str, dispositivo: str, comodo: str, ligado: bool, ts: int = None):
+        evento = (usuario, dispositivo, comodo, int(ligado), agora_ms() if ts is None else ts)
+        while True:
+            with self._lock:
+                if not self._buffer.cheio():
+                    self._buffer.adicionar(evento)
+                    self._iniciar_thread()
+                    return
+            # buffer cheio: grava na thread do produtor (backpressure)
+            try:
+                self.flush()
+            except Exception:
+                # banco travado: quem clicou não pode quebrar por isso; o
+                # evento fica na memória e a thread de flush tenta de novo
+                log.exception("falha ao gravar eventos de uso")
+                with self._lock:
+                    self._buffer.forcar(evento)
+                    self._iniciar_thread()
+                return
+
+    def registrar_varios(self, eventos):
+        # [(usuario, dispositivo, comodo, ligado, ts)] juntos no buffer, e daí no mesmo lote
+        lote = [(u, d, c, int(v), agora_ms() if ts is None else ts) for u, d, c, v, ts in eventos]
+        with self._lock:
+            if self._buffer.capacidade - len(self._buffer) >= len(lote):
+                for evento in lote:
+                    self._buffer.adicionar(evento)
+                self._iniciar_thread()
+                return
+        # não cabe: grava o pendente e o lote juntos, mantendo a ordem
+        with self._lock_gravacao:
+            with self._lock:
+                pendente = self._buffer.drenar()
+            try:
+                self._gravar_ou_devolver(pendente + lote)
+            except Exception:
+                # o lote já voltou para o buffer; a thread de flush tenta de novo
+                log.exception("falha ao gravar eventos de uso")
+                with self._lock:
+                    self._iniciar_thread()
+
+    def flush(self):
+        with self._lock_gravacao:
+            with self._lock:
+                lote = self._buffer.drenar()
+            if lote:
+                self._gravar_ou_devolver(lote)
+        return len(lote)
+
+    def _gravar_ou_devolver(self, lote):
+        # chamado com _lock_gravacao; se a gravação falhar, o lote volta para a
+        # frente do buffer (como as linhas sujas em estado.RepositorioEstado)
+        # e o próximo flush tenta de novo, na mesma ordem
+        try:
+            self._gravar_lote(lote)
+        except Exception:
+            with self._lock:
+                self._buffer.devolver(lote)
+            raise
+
+    def _gravar_lote(self, lote):
+        with banco.conexao() as conn:
+            conn.executemany(SQL_INSERIR, lote)
+        self.lotes_gravados += 1
+        self.eventos_gravados += len(lote)
+
+    def eventos(self, inicio_ms: int, fim_ms: int, usuario: str = None):
+        # grava o que estiver pendente para a consulta enxergar tudo
+        self.flush()
+        with banco.conexao() as conn:
+            if usuario is None:
+                return conn.execute(SQL_INTERVALO, (inicio_ms, fim_ms)).fetchall()
+            return conn.execute(SQL_INTERVALO_USUARIO, (usuario, inicio_ms, fim_ms)).fetchall()
+
+    def _laco(self):
+        while not self._parar:
+            self._acordar.wait(self.intervalo_flush)
+            self._acordar.clear()
+            try:
+                self.flush()
+            except Exception:
+                log.exception("falha ao gravar eventos de uso")
+
+    def fechar(self):
+        self._parar = True
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+
+log_uso = LogUso()
+atexit.register(log_uso.fechar)
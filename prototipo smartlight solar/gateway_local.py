@@ -0,0 +1,89 @@
+# gateway_local.py
+# Broker + gateway MQTT em memória, no lugar do hardware: cada conexão é um
+# canal com uma fila de entrada; o gateway aplica os publishes no estado dos
+# aparelhos e confirma num puback só tudo o que chegou na mesma escrita.
+# Latência, perda de pacotes e queda de conexão podem ser simuladas, para
+# exercitar pipelining, reenvio e backoff do adaptador sem rede.
+import asyncio
+import random
+
+
+class Canal:
+    # ponta do cliente de uma conexão (o que adaptador._Conexao usa)
+    def __init__(self, gateway: "GatewayLocal", nome: str):
+        self.gateway = gateway
+        self.nome = nome
+        self.aberto = True
+        self._entrada = asyncio.Queue()
+
+    def escrever(self, pacotes: list):
+        # não espera nada: como escrever num socket, o gateway responde depois
+        if not self.aberto:
+            raise ConnectionResetError("conexão com o gateway fechada")
+        self.gateway._receber(self, pacotes)
+
+    async def ler(self):
+        msg = await self._entrada.get()
+        if msg is None:
+            raise ConnectionResetError("o gateway derrubou a conexão")
+        return msg
+
+    def fechar(self):
+        if self.aberto:
+            self.aberto = False
+            self._entrada.put_nowait(None)
+            self.gateway._canais.discard(self)
+
+
+class GatewayLocal:
+    # uma instância atende todas as casas; o estado fica por tópico
+    def __init__(self, latencia: float = 0.0, perda: float = 0.0, semente: int = None):
+        self.latencia = latencia  # segundos até o publish chegar (e o puback sai na hora)
+        self.perda = perda        # probabilidade de um publish sumir no caminho
+        self.estado = {}          # tópico -> bool
+        self._ultimo_id = {}      # tópico -> id da ordem aplicada
+        self._canais = set()
+        self._rnd = random.Random(semente)
+        self.conexoes = 0
+        self.publicados = 0
+        self.descartados = 0      # reenvio que chegou depois de uma ordem mais nova
+        self.confirmacoes = 0     # pubacks enviados (cada um confirma um lote)
+
+    async def conectar(self, gateway: str) -> Canal:
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        canal = Canal(self, gateway)
+        self._canais.add(canal)
+        self.conexoes += 1
+        return canal
+
+    def derrubar(self):
+        # fecha todas as conexões abertas (queda do broker)
+        for canal in list(self._canais):
+            canal.fechar()
+
+    def _receber(self, canal: Canal, pacotes: list):
+        if self.perda:
+            pacotes = [p for p in pacotes if self._rnd.random() >= self.perda]
+        if not pacotes:
+            return
+        loop = asyncio.get_running_loop()
+        if self.latencia:
+            loop.call_later(self.latencia, self._aplicar, canal, pacotes)
+        else:
+            loop.call_soon(self._aplicar, canal, pacotes)
+
+    def _aplicar(self, canal: Canal, pacotes: list):
+        ids = []
+        for _, ident, topico, payload, _dup in pacotes:
+            self.publicados += 1
+            # ids crescem com a ordem em que foram dadas: um reenvio atrasado não desfaz a mais nova
+            if ident > self._ultimo_id.get(topico, 0):
+                self._ultimo_id[topico] = ident
+                self.estado[topico] = payload == "1"
+            else:
+                self.descartados += 1
+            ids.append(ident)
+        if canal.aberto:
+            self.confirmacoes += 1
+            canal._entrada.put_nowait(("puback", ids))
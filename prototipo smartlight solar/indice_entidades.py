@@ -0,0 +1,194 @@
+# indice_entidades.py
+# Índice dos nomes de dispositivos e cômodos para o assistente virtual.
+# Os nomes são normalizados uma vez e compilados num autômato Aho-Corasick,
+# que encontra todas as ocorrências numa única passada pela frase. Para erros
+# de digitação há um índice de trigramas de caracteres como alternativa.
+from collections import deque
+
+from texto import normalize_text
+
+CATEGORIA = 0
+COMODO = 1
+OUTRO = 2  # dispositivo de "outros" citado pelo nome completo
+
+LIMIAR_TRIGRAMAS = 0.6  # Dice mínimo para aceitar um nome com erro de digitação
+MAX_CANDIDATOS = 32
+
+
+class AhoCorasick:
+    def __init__(self, padroes):
+        # padroes: [(texto, valor)]; valor é devolvido em cada ocorrência
+        self._goto = [{}]
+        self._falha = [0]
+        self._saida = [[]]
+        for texto, valor in padroes:
+            self._inserir(texto, valor)
+        self._construir()
+
+    def _inserir(self, texto, valor):
+        estado = 0
+        for ch in texto:
+            prox = self._goto[estado].get(ch)
+            if prox is None:
+                prox = len(self._goto)
+                self._goto[estado][ch] = prox
+                self._goto.append({})
+                self._falha.append(0)
+                self._saida.append([])
+            estado = prox
+        self._saida[estado].append((len(texto), valor))
+
+    def _construir(self):
+        fila = deque(self._goto[0].values())
+        while fila:
+            estado = fila.popleft()
+            for ch, prox in self._goto[estado].items():
+                fila.append(prox)
+                f = self._falha[estado]
+                while f and ch not in self._goto[f]:
+                    f = self._falha[f]
+                destino = self._goto[f].get(ch, 0)
+                self._falha[prox] = destino if destino != prox else 0
+                self._saida[prox] = self._saida[prox] + self._saida[self._falha[prox]]
+
+    def buscar(self, texto):
+        # [(inicio, fim, valor)] de todas as ocorrências
+        achados = []
+        goto, falha, saida = self._goto, self._falha, self._saida
+        estado = 0
+        for i, ch in enumerate(texto):
+            while estado and ch not in goto[estado]:
+                estado = falha[estado]
+            estado = goto[estado].get(ch, 0)
+            for tamanho, valor in saida[estado]:
+                achados.append((i + 1 - tamanho, i + 1, valor))
+        return achados
+
+
+def trigramas(texto: str):
+    grams = set()
+    for palavra in texto.split():
+        p = f" {palavra} "
+        grams.update(p[i:i + 3] for i in range(len(p) - 2))
+    return grams
+
+
+class IndiceEntidades:
+    def __init__(self, dispositivos: dict):
+        # dispositivos: {categoria: {comodo_ou_nome: bool}} (mesmo formato do estado)
+        self.categorias = list(dispositivos.keys())
+        self._ordem_categoria = {c: i for i, c in enumerate(self.categorias)}
+        self._comodos = {c: set(dispositivos[c].keys()) for c in self.categorias}
+        self._ordem_comodo = {c: {n: i for i, n in enumerate(dispositivos[c])} for c in self.categorias}
+        self._entidades = []  # (tipo, categoria, nome, texto normalizado)
+        vistos = set()
+        for cat in self.categorias:
+            self._entidades.append((CATEGORIA, cat, cat, normalize_text(cat)))
+            for nome in dispositivos[cat]:
+                tipo = OUTRO if cat == "outros" else COMODO
+                chave = (tipo, normalize_text(nome))
+                if tipo == COMODO and chave in vistos:
+                    continue  # mesmo cômodo em várias categorias: uma entrada basta
+                vistos.add(chave)
+                self._entidades.append((tipo, cat, nome, chave[1]))
+        # primeira palavra de cada cômodo: "quarto" cita todos os quartos num grupo
+        self._inicios_comodo = {texto.split()[0] for tipo, _, _, texto in self._entidades if tipo == COMODO and texto}
+        self._automato = AhoCorasick(
+            [(texto, i) for i, (_, _, _, texto) in enumerate(self._entidades) if texto]
+        )
+        # trigramas -> ids das entidades que os contêm
+        self._trigramas = {}
+        self._grams = []
+        for i, (_, _, _, texto) in enumerate(self._entidades):
+            grams = trigramas(texto)
+            self._grams.append(grams)
+            for g in grams:
+                self._trigramas.setdefault(g, []).append(i)
+
+    def _exatos(self, norm):
+        return [(ini, fim, self._entidades[i]) for ini, fim, i in self._automato.buscar(norm)]
+
+    def _aproximados(self, norm, tipos):
+        # candidatos pelo índice de trigramas; a nota é o Dice entre a entidade
+        # e o trecho da frase com o mesmo número de palavras que mais se parece
+        palavras = norm.split()
+        grams_palavra = [trigramas(p) for p in palavras]
+        contagem = {}
+        for g in set().union(*grams_palavra):
+            for i in self._trigramas.get(g, ()):
+                contagem[i] = contagem.get(i, 0) + 1
+        melhores = sorted(
+            (i for i, n in contagem.items() if n >= 2 and self._entidades[i][0] in tipos),
+            key=lambda i: -contagem[i],
+        )[:MAX_CANDIDATOS]
+        candidatos = []
+        for i in melhores:
+            texto = self._entidades[i][3]
+            alvo = self._grams[i]
+            n = max(1, min(len(texto.split()), len(palavras)))
+            nota = 0.0
+            for j in range(len(palavras) - n + 1):
+                janela = set().union(*grams_palavra[j:j + n])
+                nota = max(nota, 2 * len(alvo & janela) / (len(alvo) + len(janela)))
+            if nota >= LIMIAR_TRIGRAMAS:
+                candidatos.append((nota, len(alvo), self._entidades[i]))
+        candidatos.sort(key=lambda c: (-c[0], -c[1]))
+        return [e for _, _, e in candidatos]
+
+    def resolver(self, texto: str, normalizado: bool = False):
+        # (categoria, comodo) — qualquer um pode ser None se não for encontrado
+        norm = texto if normalizado else normalize_text(texto)
+        achados = self._exatos(norm)
+
+        # dispositivo de "outros" citado pelo nome: o mais longo vence
+        outros = [(fim - ini, -ini, e) for ini, fim, e in achados if e[0] == OUTRO]
+        if outros:
+            e = max(outros)[2]
+            return e[1], e[2]
+
+        cats = sorted(
+            ((ini, self._ordem_categoria[e[1]], e[1]) for ini, fim, e in achados if e[0] == CATEGORIA)
+        )
+        if cats:
+            categoria = cats[0][2]
+        else:
+            # categoria com erro de digitação; senão, um dos "outros" pelo nome
+            aprox = self._aproximados(norm, (CATEGORIA,)) or self._aproximados(norm, (OUTRO,))
+            if not aprox:
+                return None, None
+            if aprox[0][0] == OUTRO:
+                return aprox[0][1], aprox[0][2]
+            categoria = aprox[0][1]
+
+        if categoria == "outros":
+            aprox = self._aproximados(norm, (OUTRO,))
+            return categoria, aprox[0][2] if aprox else None
+
+        comodos = self._comodos[categoria]
+        ordem = self._ordem_comodo[categoria]
+        candidatos = sorted(
+            (-(fim - ini), ordem[e[2]], e[2]) for ini, fim, e in achados if e[0] == COMODO and e[2] in comodos
+        )
+        if candidatos:
+            return categoria, candidatos[0][2]
+        for e in self._aproximados(norm, (COMODO,)):
+            if e[2] in comodos:
+                return categoria, e[2]
+        return categoria, None
+
+    def resolver_grupo(self, texto: str, normalizado: bool = False):
+        # (categoria, cômodo) de comandos de grupo ("desligue tudo do quarto",
+        # "apague todas as lâmpadas"); o cômodo volta normalizado e pode ser só
+        # o começo do nome ("quarto"), casando com todos os cômodos assim
+        norm = texto if normalizado else normalize_text(texto)
+        achados = self._exatos(norm)
+        cats = sorted((ini, e[1]) for ini, fim, e in achados if e[0] == CATEGORIA)
+        categoria = cats[0][1] if cats else None
+        comodos = sorted((-(fim - ini), ini, e[3]) for ini, fim, e in achados if e[0] == COMODO)
+        if comodos:
+            return categoria, comodos[0][2]
+        for palavra in norm.split():
+            if palavra in self._inicios_comodo:
+                return categoria, palavra
+        aprox = self._aproximados(norm, (COMODO,))
+        return categoria, aprox[0][3] if aprox else None
@@ -0,0 +1,258 @@
+# interpretador.py
+# Interpretação dos comandos em linguagem natural do assistente virtual,
+# sem depender do Flet: texto -> tokens (lexico.py) -> Comando -> resposta.
+import datetime
+import random
+from dataclasses import dataclass
+
+import cenas
+import lexico
+import recorrencia
+from indice_entidades import IndiceEntidades
+
+respostas_ligar = [
+    "Pronto, já liguei {disp} do {comodo} ✅",
+    "O {disp} do {comodo} foi ativado 🚀",
+    "Pode deixar! {disp} do {comodo} está ligado agora 😉"
+]
+respostas_desligar = [
+    "Certo, desliguei {disp} do {comodo} ❌",
+    "{disp} do {comodo} foi desativado 🔌",
+    "Tudo bem, {disp} do {comodo} está desligado 👍"
+]
+respostas_agendado = [
+    "Feito — agendei para {hora}: {acao} {disp} do {comodo}.",
+    "Agendado: às {hora} eu vou {acao} o {disp} do {comodo}.",
+    "Anotado! Às {hora} eu {acao}rei o {disp} do {comodo}."
+]
+respostas_cena = [
+    "Pronto: {cena} ✅ ({n} dispositivo(s) alterado(s))",
+    "Feito — {cena}. {n} dispositivo(s) mudaram de estado 👍",
+]
+respostas_cena_agendada = [
+    "Agendado para {hora}: {cena}.",
+    "Anotado! Às {hora}: {cena}.",
+]
+respostas_recorrente = [
+    "Combinado — {regra} eu vou {acao} o {disp} do {comodo}. 🔁",
+    "Feito! {regra_cap}: {acao} {disp} do {comodo}.",
+]
+
+ERRO_ACAO = "Não entendi se devo ligar ou desligar 🤔"
+ERRO_DISPOSITIVO = "Não entendi qual dispositivo você quer controlar 🤔"
+ERRO_COMODO = "Não encontrei o cômodo para o {disp} 🔍"
+ERRO_RECORRENCIA = "Para repetir preciso de um horário, por exemplo: todo dia às 22:00 ⏰"
+ERRO_HORARIO = "Para quando? Diga também o horário, por exemplo: amanhã às 7h ⏰"
+ERRO_DURACAO_CENA = "Não sei desfazer a cena {cena} sozinho; agende a volta com outra cena 🔁"
+ERRO_PRAZO = ("Não dá tempo de deixar {disp} do {comodo} ligado por {dur} até {prazo} ⏳ "
+              "Tente um prazo mais longo ou menos tempo.")
+
+SINONIMOS_CATEGORIA = {"luz": "lâmpada", **lexico.PLURAIS}
+
+
+def _com_periodo(tokens, i):
+    # (hora, minuto) do token i; "7h30 da noite": o período vem colado no horário
+    hora, minuto = tokens[i].valor[:2]
+    if i + 1 < len(tokens) and tokens[i + 1].tipo == lexico.PERIODO and tokens[i + 1].inicio == tokens[i].fim:
+        periodo = tokens[i + 1].valor
+        if periodo in ("pm", "tarde", "noite") and hora < 12:
+            hora += 12
+        elif periodo in ("am", "manha") and hora == 12:
+            hora = 0
+    return hora, minuto
+
+
+def _prazo(tokens, i, inicio: datetime.datetime) -> datetime.datetime:
+    # "até as 7h": a próxima vez que der 7h depois do início ("até amanhã às 7h": amanhã)
+    hora, minuto = _com_periodo(tokens, i)
+    dias = tokens[i].valor[2]
+    prazo = datetime.datetime.combine(inicio.date() + datetime.timedelta(days=dias or 0), datetime.time(hora, minuto))
+    if dias is None and prazo <= inicio:
+        prazo += datetime.timedelta(days=1)
+    return prazo
+
+
+def _quando(tokens, agora: datetime.datetime):
+    # (datetime ou None, erro ou None) a partir dos tokens de tempo
+    primeiro = {}
+    for i, t in enumerate(tokens):
+        primeiro.setdefault(t.tipo, i)
+    if lexico.RELATIVO in primeiro:
+        minutos = tokens[primeiro[lexico.RELATIVO]].valor
+        return agora.replace(microsecond=0) + datetime.timedelta(minutes=minutos), None
+    i = primeiro.get(lexico.HORA)
+    if i is None:
+        if lexico.DIA in primeiro or lexico.SEMANA in primeiro:
+            return None, ERRO_HORARIO
+        return None, None
+    hora, minuto = _com_periodo(tokens, i)
+    if lexico.SEMANA in primeiro:
+        # próxima segunda (hoje, se ainda não passou da hora)
+        regra = recorrencia.criar(1 << tokens[primeiro[lexico.SEMANA]].valor, hora, minuto)
+        return datetime.datetime.fromtimestamp(recorrencia.proxima(regra, agora.timestamp())), None
+    dias = tokens[primeiro[lexico.DIA]].valor if lexico.DIA in primeiro else 0
+    return datetime.datetime.combine(agora.date() + datetime.timedelta(days=dias), datetime.time(hora, minuto)), None
+
+
+def parse_time_from_text(text: str, agora: datetime.datetime = None):
+    # horário citado na frase: "10:00", "7h30 da noite", "amanhã às 7h",
+    # "segunda às 18h", "daqui a 30 minutos"; None se não houver
+    quando, _ = _quando(lexico.tokens(lexico.normalizar(text)), agora or datetime.datetime.now())
+    return quando
+
+
+def descrever_duracao(duracao: datetime.timedelta) -> str:
+    horas, minutos = divmod(int(duracao.total_seconds() // 60), 60)
+    partes = []
+    if horas:
+        partes.append(f"{horas} hora{'s' if horas > 1 else ''}")
+    if minutos:
+        partes.append(f"{minutos} minuto{'s' if minutos > 1 else ''}")
+    return " e ".join(partes)
+
+
+@dataclass
+class Comando:
+    acao: bool = None
+    dispositivo: str = None
+    comodo: str = None
+    quando: datetime.datetime = None
+    erro: str = None
+    recorrencia: int = 0  # regra de recorrencia.criar; 0 = não repete
+    cena: str = None  # cena ou grupo (cenas.obter) no lugar de dispositivo/cômodo
+    duracao: datetime.timedelta = None  # desfaz a ação depois desse tempo ("por 2 horas")
+    prazo: datetime.datetime = None  # "por 2 horas até as 7h": o núcleo escolhe quando (otimizador.py)
+    trechos: list = None  # [(liga, desliga)] que o núcleo agendou para a carga flexível
+
+    @property
+    def ok(self):
+        return self.erro is None
+
+
+def interpretar(texto: str, indice: IndiceEntidades, agora: datetime.datetime = None) -> Comando:
+    # uma passada do léxico dá ação, tempo, recorrência, grupo e cena; o índice
+    # de entidades acha dispositivo e cômodo no mesmo texto normalizado
+    norm = lexico.normalizar(texto)
+    tokens = lexico.tokens(norm)
+    acao = cena = None
+    grupo = False
+    mascara = 0
+    duracao = prazo = None
+    for i, t in enumerate(tokens):
+        if acao is None and t.tipo in (lexico.LIGAR, lexico.DESLIGAR):
+            acao = t.tipo == lexico.LIGAR  # vale o primeiro verbo
+        elif t.tipo == lexico.CENA and cena is None:
+            cena = t.valor
+        elif t.tipo == lexico.GRUPO:
+            grupo = True
+        elif t.tipo == lexico.RECORRENCIA:
+            mascara |= t.valor
+        elif t.tipo == lexico.DURACAO and duracao is None:
+            duracao = datetime.timedelta(minutes=t.valor)
+        elif t.tipo == lexico.PRAZO and prazo is None:
+            prazo = i
+
+    # ação (uma cena já diz o que fazer)
+    if acao is None:
+        if not cena:
+            return Comando(erro=ERRO_ACAO)
+        acao = True
+
+    if cena is None and grupo:
+        categoria, comodo = indice.resolver_grupo(norm, normalizado=True)
+        if categoria is None:
+            categoria = next((c for p, c in SINONIMOS_CATEGORIA.items() if p in norm.split()), None)
+        cena = cenas.nome_grupo(categoria, comodo)
+
+    if cena is not None:
+        cmd = Comando(acao, cena=cena)
+    else:
+        # dispositivo e comodo
+        dispositivo, comodo = indice.resolver(norm, normalizado=True)
+        if not dispositivo:
+            return Comando(acao=acao, erro=ERRO_DISPOSITIVO)
+        if not comodo:
+            return Comando(acao=acao, dispositivo=dispositivo, erro=ERRO_COMODO.format(disp=dispositivo))
+        cmd = Comando(acao, dispositivo, comodo)
+
+    # horário? repete? por quanto tempo? até quando?
+    agora = agora or datetime.datetime.now()
+    cmd.quando, cmd.erro = _quando(tokens, agora)
+    if mascara and cmd.erro is None:
+        if cmd.quando is None:
+            cmd.erro = ERRO_RECORRENCIA
+        else:
+            cmd.recorrencia = recorrencia.criar(mascara, cmd.quando.hour, cmd.quando.minute)
+            # o primeiro disparo de verdade (hoje já pode ter passado ou não estar na regra)
+            cmd.quando = datetime.datetime.fromtimestamp(recorrencia.proxima(cmd.recorrencia, agora.timestamp()))
+    if prazo is not None and cmd.erro is None and not cmd.recorrencia:
+        limite = _prazo(tokens, prazo, cmd.quando or agora)
+        if duracao is None:
+            # "ligue a luz até as 7h": desfaz no prazo
+            duracao = limite - (cmd.quando or agora).replace(microsecond=0)
+        elif cmd.acao and cmd.quando is None and cena is None:
+            # carga flexível: N horas em qualquer momento antes do prazo
+            cmd.prazo = limite
+    if duracao and cmd.erro is None:
+        if cena in cenas.CENAS:
+            cmd.erro = ERRO_DURACAO_CENA.format(cena=cena)
+        else:
+            cmd.duracao = duracao
+    return cmd
+
+
+def responder(cmd: Comando, rnd=random, alterados: int = 0) -> str:
+    if cmd.prazo and not cmd.erro:
+        return _frase_flexivel(cmd)
+    texto = _frase(cmd, rnd, alterados)
+    if cmd.duracao and not cmd.erro:
+        texto += f" Depois de {descrever_duracao(cmd.duracao)} eu {'desligo' if cmd.acao else 'religo'} sozinho ⏱️"
+    return texto
+
+
+def erro_prazo(cmd: Comando) -> str:
+    # a carga flexível não cabe entre agora e o prazo
+    return ERRO_PRAZO.format(disp=cmd.dispositivo.capitalize(), comodo=cmd.comodo.capitalize(),
+                             dur=descrever_duracao(cmd.duracao), prazo=cmd.prazo.strftime("%d/%m %H:%M"))
+
+
+def _frase_flexivel(cmd: Comando) -> str:
+    disp, comodo = cmd.dispositivo.capitalize(), cmd.comodo.capitalize()
+    dur = descrever_duracao(cmd.duracao)
+    prazo = cmd.prazo.strftime("%d/%m %H:%M")
+    if not cmd.trechos:
+        return f"Vou deixar {disp} do {comodo} ligado por {dur} no horário mais barato até {prazo} ☀️"
+    if len(cmd.trechos) == 1:
+        (liga, desliga), = cmd.trechos
+        return (f"Para terminar até {prazo}, vou ligar {disp} do {comodo} em {liga:%d/%m} às {liga:%H:%M} e "
+                f"desligar em {desliga:%d/%m} às {desliga:%H:%M}, quando a energia sai mais barata "
+                f"(sol ou tarifa) ☀️")
+    lista = "; ".join(f"{liga:%d/%m %H:%M}–{desliga:%H:%M}" for liga, desliga in cmd.trechos)
+    return (f"Para terminar até {prazo}, vou deixar {disp} do {comodo} ligado por {dur} em "
+            f"{len(cmd.trechos)} trechos ({lista}), quando a energia sai mais barata (sol ou tarifa) ☀️")
+
+
+def _frase(cmd: Comando, rnd, alterados: int) -> str:
+    if cmd.erro:
+        return cmd.erro
+    if cmd.cena:
+        cena = cenas.descrever(cmd.cena, cmd.acao)
+        if cmd.recorrencia:
+            regra = recorrencia.descrever(cmd.recorrencia)
+            return f"Combinado — {regra}: {cena}. 🔁"
+        if cmd.quando:
+            return rnd.choice(respostas_cena_agendada).format(hora=cmd.quando.strftime("%Y-%m-%d %H:%M"), cena=cena)
+        return rnd.choice(respostas_cena).format(cena=cena, n=alterados)
+    disp, comodo = cmd.dispositivo.capitalize(), cmd.comodo.capitalize()
+    if cmd.recorrencia:
+        regra = recorrencia.descrever(cmd.recorrencia)
+        acao_text = "ligar" if cmd.acao else "desligar"
+        return rnd.choice(respostas_recorrente).format(regra=regra, regra_cap=regra.capitalize(), acao=acao_text,
+                                                       disp=disp, comodo=comodo)
+    if cmd.quando:
+        hora_str = cmd.quando.strftime("%Y-%m-%d %H:%M")
+        acao_text = "ligar" if cmd.acao else "desligar"
+        return rnd.choice(respostas_agendado).format(hora=hora_str, acao=acao_text, disp=disp, comodo=comodo)
+    if cmd.acao:
+        return rnd.choice(respostas_ligar).format(disp=disp, comodo=comodo)
+    return rnd.choice(respostas_desligar).format(disp=disp, comodo=comodo)
@@ -0,0 +1,314 @@
+# lexico.py
+# Analisador léxico do assistente. A frase normalizada é percorrida uma vez,
+# palavra a palavra; cada palavra que pode abrir um token (verbo, "daqui",
+# "por", "amanha", dia da semana, "todo"...) é despachada por um dicionário
+# para a regra que consome o resto da expressão. Sai uma lista de tokens com
+# ação, horário, dia, duração, recorrência, grupo e cena. Dispositivos e
+# cômodos ficam com o IndiceEntidades (Aho-Corasick) sobre o mesmo texto.
+import re
+from typing import NamedTuple
+
+import cenas
+import recorrencia
+from texto import normalize_text
+
+PALAVRAS_LIGAR = ["ligue", "acenda", "ative", "ligar", "ativar", "acender", "liga", "acende", "ativa"]
+PALAVRAS_DESLIGAR = ["desligue", "apague", "desative", "desligar", "desativar", "apagar", "desliga", "apaga",
+                     "desativa"]
+
+# tipos de token
+LIGAR = "ligar"
+DESLIGAR = "desligar"
+HORA = "hora"              # (hora, minuto)
+PERIODO = "periodo"        # "am", "pm", "manha", "tarde" ou "noite"
+DIA = "dia"                # dias a partir de hoje (hoje = 0, amanhã = 1)
+SEMANA = "semana"          # dia da semana avulso ("segunda às 18h"), 0 = segunda
+RELATIVO = "relativo"      # minutos a partir de agora ("daqui a 30 minutos")
+DURACAO = "duracao"        # minutos até desfazer a ação ("por 2 horas")
+PRAZO = "prazo"            # (hora, minuto, dias ou None) limite ("até as 7h", "antes das 7h")
+RECORRENCIA = "recorrencia"  # máscara de dias (recorrencia.py)
+GRUPO = "grupo"            # "tudo", "as luzes", "todas as lâmpadas", "os ares"
+CENA = "cena"              # nome da cena
+
+
+class Token(NamedTuple):
+    tipo: str
+    valor: object
+    inicio: int  # índice da primeira palavra
+    fim: int     # índice depois da última palavra
+
+
+_DIAS = {}  # "segunda", "segundas", "segundafeira" (o hífen some na normalização)...
+for _i, _nome in enumerate(recorrencia.NOMES_DIAS):
+    for _forma in ("", "s", "feira", "sfeiras"):
+        _DIAS[normalize_text(_nome) + _forma] = _i
+_NUMEROS = {"um": 1, "uma": 1, "dois": 2, "duas": 2, "tres": 3, "quatro": 4, "cinco": 5, "seis": 6,
+            "dez": 10, "quinze": 15, "vinte": 20, "trinta": 30, "quarenta": 40, "meia": 0.5}
+_UNIDADES = {"minuto": 1, "minutos": 1, "min": 1, "hora": 60, "horas": 60, "h": 60}
+_PERIODOS = {"am", "pm", "manha", "tarde", "noite"}
+_ARTIGOS = {"a", "o", "as", "os"}
+# plural solto ("desligue as lâmpadas") é grupo da categoria inteira
+PLURAIS = {"lampadas": "lâmpada", "luzes": "lâmpada", "cameras": "câmera", "ares": "ar condicionado"}
+_numero_unidade = re.compile(r'(\d+)(min|h)$')   # "30min", "2h"
+_hora_colada = re.compile(r'(\d{1,2})h(\d{2})?$')  # "7h", "7h30", "10h00" (de "10:00")
+
+
+def normalizar(texto: str) -> str:
+    # "10:00" vira "10h00" antes de a pontuação sumir
+    return normalize_text(texto.replace(":", "h"))
+
+
+def _hora(h, m=0):
+    return (h, m) if 0 <= h < 24 and 0 <= m < 60 else None
+
+
+# quantidades: "30 minutos", "2h", "meia hora", "uma hora e meia", "1 hora e 30 minutos"
+
+def _parcela(p, j):
+    if j >= len(p):
+        return None, j
+    m = _numero_unidade.match(p[j])
+    if m:
+        return int(m.group(1)) * (60 if m.group(2) == "h" else 1), j + 1
+    n = int(p[j]) if p[j].isdigit() else _NUMEROS.get(p[j])
+    unidade = _UNIDADES.get(p[j + 1]) if j + 1 < len(p) else None
+    if n is None or unidade is None:
+        return None, j
+    return int(n * unidade), j + 2
+
+
+def _quantidade(p, j):
+    total, j = _parcela(p, j)
+    if total is None:
+        return None, j
+    if j + 1 < len(p) and p[j] == "e":
+        if p[j + 1] == "meia":
+            return total + 30, j + 2
+        mais, k = _parcela(p, j + 1)
+        if mais is not None:
+            return total + mais, k
+    return total, j
+
+
+def _dias_em_lista(p, j):
+    # "segunda e quarta", "as tercas quintas e sabados" -> (máscara, próximo índice)
+    mascara = 0
+    while True:
+        k = j
+        if k < len(p) and p[k] == "e":
+            k += 1
+        if k < len(p) and p[k] in _ARTIGOS:
+            k += 1
+        dia = _DIAS.get(p[k]) if k < len(p) else None
+        if dia is None:
+            return mascara, j
+        mascara |= 1 << dia
+        j = k + 1
+        if j < len(p) and p[j] in ("feira", "feiras"):
+            j += 1
+
+
+# regras: (palavras, i) -> (tipo, valor, fim) ou None
+
+def _verbo(tipo):
+    return lambda p, i: (tipo, p[i], i + 1)
+
+
+def _relativo(p, i):
+    j = i + 1
+    if p[i] == "daqui" and j < len(p) and p[j] == "a":
+        j += 1
+    elif p[i] == "dentro":
+        if j >= len(p) or p[j] != "de":
+            return None
+        j += 1
+    minutos, fim = _quantidade(p, j)
+    return (RELATIVO, minutos, fim) if minutos else None
+
+
+def _duracao(p, i):
+    minutos, fim = _quantidade(p, i + 1)
+    return (DURACAO, minutos, fim) if minutos else None
+
+
+def _todos(p, i):
+    # "todo dia", "todos os dias", "toda segunda e quarta" (recorrência) ou
+    # "todas as lâmpadas" (grupo)
+    j = i + 1
+    if p[i] == "todo" and j < len(p) and p[j] == "dia":
+        return RECORRENCIA, recorrencia.TODO_DIA, j + 1
+    if j < len(p) and p[j] in ("as", "os"):
+        j += 1
+    if j < len(p) and p[j] == "dias" and p[i] == "todos":
+        return RECORRENCIA, recorrencia.TODO_DIA, j + 1
+    mascara, fim = _dias_em_lista(p, j)
+    if mascara:
+        return RECORRENCIA, mascara, fim
+    if p[i] in ("todos", "todas") and j < len(p) and p[j] not in ("dia", "dias"):
+        return GRUPO, " ".join(p[i:j + 1]), j + 1
+    return None
+
+
+def _cada(p, i):
+    return (RECORRENCIA, recorrencia.TODO_DIA, i + 2) if p[i + 1:i + 2] == ["dia"] else None
+
+
+def _dia_util(p, i):
+    return (RECORRENCIA, recorrencia.DIAS_UTEIS, i + 2) if p[i + 1:i + 2] in (["util"], ["uteis"]) else None
+
+
+def _fim_de_semana(p, i):
+    return (RECORRENCIA, recorrencia.FIM_DE_SEMANA, i + 3) if p[i + 1:i + 3] == ["de", "semana"] else None
+
+
+def _de(p, i):
+    # "de segunda a sexta" ou "de manhã"
+    seguinte = p[i + 1] if i + 1 < len(p) else None
+    if seguinte in _PERIODOS:
+        return PERIODO, seguinte, i + 2
+    a = _DIAS.get(seguinte)
+    if a is None or p[i + 2:i + 3] != ["a"] or i + 3 >= len(p) or p[i + 3] not in _DIAS:
+        return None
+    b = _DIAS[p[i + 3]]
+    return RECORRENCIA, sum(1 << d for d in range(7) if (d - a) % 7 <= (b - a) % 7), i + 4
+
+
+def _semana(p, i):
+    fim = i + 2 if p[i + 1:i + 2] in (["feira"], ["feiras"]) else i + 1
+    return SEMANA, _DIAS[p[i]], fim
+
+
+def _hoje(p, i):
+    return DIA, 0, i + 1
+
+
+def _amanha(p, i):
+    return DIA, 1, i + 1
+
+
+def _depois(p, i):
+    return (DIA, 2, i + 3) if p[i + 1:i + 3] == ["de", "amanha"] else None
+
+
+def _meio(p, i):
+    if p[i + 1:i + 2] == ["dia"] and p[i] == "meio":
+        return HORA, (12, 0), i + 2
+    if p[i + 1:i + 2] == ["noite"] and p[i] == "meia":
+        return HORA, (0, 0), i + 2
+    return None
+
+
+def _as(p, i):
+    # "às 7 horas", "às 7 da noite", "às 7" no fim da frase ("às 7h" é _numero)
+    if i + 1 >= len(p) or not p[i + 1].isdigit():
+        return None
+    hora = _hora(int(p[i + 1]))
+    seguinte = p[i + 2] if i + 2 < len(p) else None
+    if seguinte in ("hora", "horas"):
+        return HORA, hora, i + 3
+    if seguinte is None or seguinte in ("da", "de") and p[i + 3:i + 4] and p[i + 3] in _PERIODOS:
+        return HORA, hora, i + 2
+    return None
+
+
+def _prazo(p, i):
+    # "até as 7h", "até amanhã às 7 horas", "antes das 7h"; o período ("da
+    # manhã") vem depois. dias None = a próxima vez que der esse horário
+    j = i + 1
+    dias = None
+    if p[j:j + 1] == ["amanha"]:
+        dias, j = 1, j + 1
+    if j < len(p) and p[j] in (("as", "a") if p[i] == "ate" else ("das", "da", "de")):
+        j += 1
+    if j >= len(p):
+        return None
+    achado = _numero(p, j)
+    if achado is None and p[j].isdigit() and p[j + 1:j + 2] in (["hora"], ["horas"]):
+        achado = HORA, _hora(int(p[j])), j + 2
+    if achado is None or achado[1] is None:
+        return None
+    return PRAZO, achado[1] + (dias,), achado[2]
+
+
+def _periodo(p, i):
+    return PERIODO, p[i], i + 1
+
+
+def _da(p, i):
+    return (PERIODO, p[i + 1], i + 2) if i + 1 < len(p) and p[i + 1] in _PERIODOS else None
+
+
+def _grupo(p, i):
+    return GRUPO, p[i], i + 1
+
+
+def _plural(p, i):
+    # "as lâmpadas", "os ares" (com artigo, para não pegar "lâmpadas" dentro de outro nome)
+    return (GRUPO, " ".join(p[i:i + 2]), i + 2) if p[i + 1:i + 2] and p[i + 1] in PLURAIS else None
+
+
+def _numero(p, i):
+    m = _hora_colada.match(p[i])
+    return (HORA, _hora(int(m.group(1)), int(m.group(2) or 0)), i + 1) if m else None
+
+
+def _cena(palavras, nome):
+    n = len(palavras)
+    return lambda p, i: (CENA, nome, i + n) if p[i:i + n] == palavras else None
+
+
+# primeira palavra -> regras tentadas em ordem (cenas primeiro: "modo noite" não é período)
+_REGRAS = {}
+
+
+def _registrar(palavras, regra):
+    for palavra in palavras:
+        _REGRAS.setdefault(palavra, []).append(regra)
+
+
+for _nome in cenas.CENAS:
+    _palavras = normalize_text(_nome).split()
+    _registrar([_palavras[0]], _cena(_palavras, _nome))
+_registrar(PALAVRAS_LIGAR, _verbo(LIGAR))
+_registrar(PALAVRAS_DESLIGAR, _verbo(DESLIGAR))
+_registrar(["daqui", "dentro", "em"], _relativo)
+_registrar(["por", "durante"], _duracao)
+_registrar(["ate", "antes"], _prazo)
+_registrar(["todo", "todos", "toda", "todas"], _todos)
+_registrar(["diariamente"], lambda p, i: (RECORRENCIA, recorrencia.TODO_DIA, i + 1))
+_registrar(["cada"], _cada)
+_registrar(["dia", "dias"], _dia_util)
+_registrar(["fim", "fins"], _fim_de_semana)
+_registrar(["de"], _de)
+_registrar(list(_DIAS), _semana)
+_registrar(["hoje"], _hoje)
+_registrar(["amanha"], _amanha)
+_registrar(["depois"], _depois)
+_registrar(["meio", "meia"], _meio)
+_registrar(["as"], _as)
+_registrar(["as", "os"], _plural)
+_registrar(["da"], _da)
+_registrar(sorted(_PERIODOS), _periodo)
+_registrar(["tudo", "luzes"], _grupo)
+
+
+def tokens(norm: str):
+    # norm: texto de normalizar(); uma passada, tokens em ordem
+    p = norm.split()
+    saida = []
+    i, n = 0, len(p)
+    while i < n:
+        achado = None
+        for regra in _REGRAS.get(p[i], ()):
+            achado = regra(p, i)
+            if achado is not None:
+                break
+        if achado is None and p[i][0].isdigit():
+            achado = _numero(p, i)
+        if achado is None or achado[1] is None:  # nada aqui, ou horário inválido ("25h")
+            i += 1
+            continue
+        tipo, valor, fim = achado
+        saida.append(Token(tipo, valor, i, fim))
+        i = fim
+    return saida
@@ -1,65 +1,33 @@
 # menu.py
 import flet as ft
-import sqlite3
-import hashlib
-import threading
+import asyncio
+import dataclasses
 import datetime
-import re
-import unicodedata
-import random
-
-# Consumo médio por dispositivo
-
-CONSUMO_PADRAO = {
-    "ar condicionado": 1.2,   # kWh por hora
-    "lâmpada": 0.06,          # kWh por hora
-    "câmera": 0.02,           # kWh por hora
-    "outros": 0.1
-}
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable
+import banco
+import cenas
+import credenciais
+import recorrencia
+import solar
+from eventos_uso import agora_ms
+from tarifa import reais
+from adaptador import FalhaDispositivo
+from eventos import (AgendamentoCancelado, AgendamentoCriado, AgendamentoExecutado, IntervaloUso, Mudanca,
+                     Perdidos)
+from nucleo import Controlador, MudancaLote, ORIGEM_AGENDADOR
+from atualizacoes import Coalescedor
 
 # Tela de Outros dispositivos
 
 def tela_outros(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Outros Dispositivos"
-    dispositivos = page.session.get("dispositivos") or {}
-    outros = dispositivos.get("outros", {})
-    lista = []
-
-    for chave, estado in outros.items():
-        def toggle(e, nome=chave):
-            dispositivos = page.session.get("dispositivos")
-            dispositivos["outros"][nome] = e.control.value
-            page.session.set("dispositivos", dispositivos)
-            registrar_uso(page, "outros", nome, e.control.value)
-            page.snack_msg(f"{nome.capitalize()}: {'Ligado' if e.control.value else 'Desligado'}")
-
-        lista.append(
-            ft.Row(
-                [
-                    ft.Text(chave.capitalize(), size=18, color="white", expand=True),
-                    ft.Switch(value=estado, on_change=toggle),
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-            )
-        )
-
-    if not lista:
-        lista = [ft.Text("Nenhum dispositivo adicionado ainda.", color="white")]
-
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Controle de Outros Dispositivos", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                *lista,
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white")),
-            ],
-            spacing=12,
-            expand=True
-        )
-    )
+    mostrar_tela(page, "outros", "Outros Dispositivos", lambda: construir_tela_categoria(
+        page, "outros", "Controle de Outros Dispositivos",
+        lambda nome, ligado: f"{nome.capitalize()}: {'Ligado' if ligado else 'Desligado'}",
+        vazio="Nenhum dispositivo adicionado ainda.",
+        acoes=[ft.ElevatedButton("Adicionar Dispositivo", on_click=lambda e: adicionar_dispositivo_dialog(page))],
+    ))
 
 # Adicionar dispositivo
 
@@ -70,21 +38,17 @@ def adicionar_dispositivo_dialog(page: ft.Page):
     tipo_dd = ft.Dropdown(label="Tipo de dispositivo", options=[ft.dropdown.Option(t) for t in tipos])
     comodo_dd = ft.Dropdown(label="Cômodo", options=[ft.dropdown.Option(c) for c in comodos])
 
-    def confirmar(ev):
+    async def confirmar(ev):
         tipo = tipo_dd.value
         comodo = comodo_dd.value
         if not tipo or not comodo:
             page.snack_msg("Selecione tipo e cômodo antes de adicionar!")
             return
         chave = f"{tipo} ({comodo})"
-        dispositivos = page.session.get("dispositivos") or {}
-        outros = dispositivos.get("outros", {})
-        outros[chave] = False
-        dispositivos["outros"] = outros
-        page.session.set("dispositivos", dispositivos)
-        page.snack_msg(f"Dispositivo '{chave}' adicionado em Outros.")
+        await banco.executar(controlador.adicionar_dispositivo, usuario_da_pagina(page), chave)
         dlg.open = False
-        page.update()
+        tela_outros(page)  # a lista já com o novo
+        page.snack_msg(f"Dispositivo '{chave}' adicionado em Outros.")
 
     def cancelar(ev):
         dlg.open = False
@@ -103,539 +67,468 @@ def adicionar_dispositivo_dialog(page: ft.Page):
     dlg.open = True
     page.update()
 
-# Dashboard principal
-
-def carregar_dashboard(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "SmartLight Solar - Dashboard"
-
-    header = ft.Row(
-        [
-            ft.Text("🌞 SmartLight Solar", size=22, weight="bold", color="white"),
-            ft.Row(
-                [
-                    ft.ElevatedButton("Relatório", on_click=lambda e: tela_relatorio(page)),
-                    ft.ElevatedButton("Adicionar Dispositivo", on_click=lambda e: adicionar_dispositivo_dialog(page)),
-                    ft.ElevatedButton("Sair", bgcolor="red", color="white", on_click=lambda e: page.go("/")),
-                ],
-                spacing=8,
-            ),
-        ],
-        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-    )
-
-    estilo = ft.ButtonStyle(
-        padding=50,
-        text_style=ft.TextStyle(size=20),
-        bgcolor="#1E2A3A",
-        color="white",
-    )
-
-    dispositivos_grid = ft.Column(
-        [
-            ft.Row(
-                [
-                    ft.ElevatedButton("Ar Condicionado", expand=True, style=estilo, on_click=lambda e: tela_ar_condicionado(page)),
-                    ft.ElevatedButton("Lâmpada", expand=True, style=estilo, on_click=lambda e: tela_lampada(page)),
-                ],
-                expand=True,
-                spacing=20,
-            ),
-            ft.Row(
-                [
-                    ft.ElevatedButton("Câmera", expand=True, style=estilo, on_click=lambda e: tela_camera(page)),
-                    ft.ElevatedButton("Outros", expand=True, style=estilo, on_click=lambda e: tela_outros(page)),
-                ],
-                expand=True,
-                spacing=20,
-            ),
-        ],
-        spacing=20,
-        expand=True,
-    )
-
-    botoes_inferiores = ft.Row(
-        [
-            ft.TextButton("Suporte", on_click=lambda e: tela_suporte(page), style=ft.ButtonStyle(color="white")),
-            ft.TextButton("Assistente Virtual", on_click=lambda e: tela_assistente(page), style=ft.ButtonStyle(color="white")),
-            ft.TextButton("Conta", on_click=lambda e: tela_conta(page), style=ft.ButtonStyle(color="white")),
-        ],
-        alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-        spacing=20,
-    )
-
-    def snack_msg(msg):
-        page.snack_bar = ft.SnackBar(content=ft.Text(msg, color="white"), bgcolor="blue", open=True)
-        page.update()
-
-    page.snack_msg = snack_msg
-
-    page.add(
-        ft.Column(
-            [
-                header,
-                ft.Divider(color="white"),
-                ft.Text("Dispositivos", size=20, weight="bold", color="white"),
-                dispositivos_grid,
-                ft.Divider(color="white"),
-                botoes_inferiores,
-            ],
-            spacing=18,
-            expand=True,
-        )
-    )
-
-def normalize_text(s: str) -> str:
-    if not s:
-        return ""
-    s = s.lower()
-    s = unicodedata.normalize("NFD", s)
-    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
-    s = re.sub(r'[^a-z0-9\s]', '', s)
-    return s
-
 def hash_senha(senha: str) -> str:
-    return hashlib.sha256(senha.encode()).hexdigest()
+    return credenciais.gerar_hash(senha)
 
 # sqlite: buscar e atualizar usuário
 
-DB = "usuarios.db"
-
 def buscar_usuario(email):
-    with sqlite3.connect(DB, timeout=5, check_same_thread=False) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT nome, email FROM usuarios WHERE email = ?", (email,))
-        return cursor.fetchone()
+    with banco.conexao() as conn:
+        return conn.execute(banco.SQL_USUARIO_POR_EMAIL, (email,)).fetchone()
 
 def atualizar_usuario(email, novo_nome=None, nova_senha_hashed=None):
-    with sqlite3.connect(DB, timeout=5, check_same_thread=False) as conn:
-        cursor = conn.cursor()
+    with banco.conexao() as conn:
         if novo_nome and nova_senha_hashed:
-            cursor.execute("UPDATE usuarios SET nome=?, senha=? WHERE email=?", (novo_nome, nova_senha_hashed, email))
+            conn.execute(banco.SQL_ATUALIZAR_NOME_SENHA, (novo_nome, nova_senha_hashed, email))
         elif novo_nome:
-            cursor.execute("UPDATE usuarios SET nome=? WHERE email=?", (novo_nome, email))
+            conn.execute(banco.SQL_ATUALIZAR_NOME, (novo_nome, email))
         elif nova_senha_hashed:
-            cursor.execute("UPDATE usuarios SET senha=? WHERE email=?", (nova_senha_hashed, email))
-        conn.commit()
+            conn.execute(banco.SQL_ATUALIZAR_SENHA, (nova_senha_hashed, email))
 
 # Inicio de sessão
-
-def init_dispositivos_session(page: ft.Page):
-    if page.session.get("dispositivos") is None:
-        page.session.set("dispositivos", {
-            "ar condicionado": {
-                "sala de estar": False,
-                "quarto do amom": False,
-                "quarto do victor": False,
-                "quarto do fernando": False
-            },
-            "lâmpada": {
-                "sala de estar": False,
-                "quarto do amom": False,
-                "quarto do victor": False,
-                "quarto do fernando": False
-            },
-            "câmera": {
-                "quintal": False,
-                "garagem": False,
-                "lavanderia": False,
-                "sala de estar": False
-            },
-            "outros": {}
-        })
-    if page.session.get("schedules") is None:
-        page.session.set("schedules", [])
-    if page.session.get("uso") is None:
-        page.session.set("uso", {})
-
-# Agendamento
-
-def schedule_action(page: ft.Page, dispositivo: str, comodo: str, acao: bool, target_dt: datetime.datetime):
-    now = datetime.datetime.now()
-    delay = (target_dt - now).total_seconds()
-    if delay < 0:
-        # agenda para o próximo dia se o horário ja passou
-        delay += 24 * 3600
-
-    def task():
-        dispositivos = page.session.get("dispositivos")
-        if not dispositivos:
-            return
-        # aplica ação
-        dispositivos[dispositivo][comodo] = acao
-        page.session.set("dispositivos", dispositivos)
-        # registra uso (se for ligar ou desligar)
-        registrar_uso(page, dispositivo, comodo, acao)
+# Handlers que tocam o banco são corrotinas: rodam no event loop do Flet e
+# mandam o SQLite para banco.executar, sem uma thread por clique.
+
+def usuario_da_pagina(page: ft.Page) -> str:
+    return page.session.get("usuario_email") or ""
+
+def atualizacoes_da_pagina(page: ft.Page) -> Coalescedor:
+    # um por sessão: rajadas de toggles e agendamentos viram um update por quadro
+    atualizacoes = page.session.get("atualizacoes")
+    if atualizacoes is None:
+        def mostrar_aviso(msg):
+            page.snack_bar = ft.SnackBar(content=ft.Text(msg, color="white"), bgcolor="blue", open=True)
+        atualizacoes = Coalescedor(page.update, mostrar_aviso, loop=page.loop)
+        page.session.set("atualizacoes", atualizacoes)
+    return atualizacoes
+
+def dispositivos_da_pagina(page: ft.Page) -> dict:
+    # mesmo dicionário para todas as sessões do usuário; não alterar direto,
+    # usar controlador.definir/adicionar_dispositivo para que a mudança seja gravada
+    return controlador.dispositivos(usuario_da_pagina(page))
+
+# página ativa de cada usuário, para avisar quando um agendamento é executado
+# (todas as abas abertas do usuário; páginas fechadas somem sozinhas)
+_paginas_ativas = {}
+_usuario_da_aba = weakref.WeakKeyDictionary()
+
+def notificar_agendamento(m):
+    if m.origem != ORIGEM_AGENDADOR:
+        return
+    prefixo = "Agendamento atrasado executado" if m.atrasado else "Agendamento executado"
+    if isinstance(m, MudancaLote):
+        msg = f"{prefixo}: {cenas.descrever(m.cena, m.acao)} ({len(m.mudancas)} dispositivos)."
+    else:
+        msg = f"{prefixo}: {m.dispositivo.capitalize()} do {m.comodo.capitalize()} {'ligado' if m.ligado else 'desligado'}."
+    for page in list(_paginas_ativas.get(m.usuario, ())):
         # notifica (se der kkk)
         try:
-            page.snack_msg(f"Agendamento executado: {dispositivo.capitalize()} do {comodo.capitalize()} {'ligado' if acao else 'desligado'}.")
-            page.update()
+            page.snack_msg(msg)
         except Exception:
             pass
-        # remove schedule da lista
-        schedules = page.session.get("schedules")
-        if schedules is None:
-            schedules = []
-        for i, s in enumerate(schedules):
-            if s.get("device") == dispositivo and s.get("comodo") == comodo and s.get("time") == target_dt.isoformat():
-                schedules.pop(i)
-                break
-        page.session.set("schedules", schedules)
-
-    t = threading.Timer(delay, task)
-    t.daemon = True
-    t.start()
-
-    schedules = page.session.get("schedules")
-    if schedules is None:
-        schedules = []
-    schedules.append({
-        "device": dispositivo,
-        "comodo": comodo,
-        "action": acao,
-        "time": target_dt.isoformat()
-    })
-    page.session.set("schedules", schedules)
-    # Atualizar UI
-    try:
-        page.update()
-    except Exception:
-        pass
-
-
-time_pattern = re.compile(
-    r'(\d{1,2})[:h](\d{2})(?:\s*(am|pm|da manhã|da tarde|da noite|manhã|tarde|noite))?',
-    flags=re.IGNORECASE
-)
-
-def parse_time_from_text(text: str):
-    m = time_pattern.search(text)
-    if not m:
-        return None
-    hour = int(m.group(1))
-    minute = int(m.group(2))
-    suffix = (m.group(3) or "").lower()
-    if any(x in suffix for x in ["pm", "tarde", "noite", "da tarde", "da noite"]) and hour < 12:
-        hour += 12
-    if any(x in suffix for x in ["am", "manhã", "da manhã"]) and hour == 12:
-        hour = 0
-    now = datetime.datetime.now()
-    try:
-        return datetime.datetime(now.year, now.month, now.day, hour, minute)
-    except ValueError:
-        return None
+
+controlador = Controlador()
+controlador.ouvir(notificar_agendamento)
+
+def init_dispositivos_session(page: ft.Page):
+    usuario = usuario_da_pagina(page)
+    anterior = _usuario_da_aba.get(page)
+    if anterior is not None and anterior != usuario:
+        # a aba trocou de conta
+        _paginas_ativas.get(anterior, weakref.WeakSet()).discard(page)
+    _usuario_da_aba[page] = usuario
+    _paginas_ativas.setdefault(usuario, weakref.WeakSet()).add(page)
+    # aba fechada: as telas dela deixam de receber eventos
+    page.on_close = lambda e: encerrar_telas(page)
+    # o agendador vira uma tarefa do loop do Flet (um só para o processo)
+    controlador.iniciar(page.loop)
+
+# Cache de telas
+# Cada tela é montada uma vez por sessão e fica na página, escondida quando
+# não está em uso. Ao voltar para ela só os valores que mudaram (switches,
+# totais, agendamentos) são ajustados, e o Flet envia apenas essa diferença.
+# Com a tela aberta, ela assina os eventos do controlador (eventos.py) e
+# ajusta na hora só os controles afetados; escondida, ignora e acerta tudo
+# no atualizar() da volta.
+
+@dataclass
+class Tela:
+    raiz: ft.Control
+    atualizar: Callable[[], None] = None
+    assinaturas: list = field(default_factory=list)
+
+def assinar_na_tela(page: ft.Page, tipos, fn):
+    # eventos do usuário da página, entregues em lote na thread do loop do Flet
+    return controlador.eventos.assinar(tipos, fn, usuario=usuario_da_pagina(page), loop=page.loop, lote=True)
+
+def mudancas_de(eventos):
+    # Mudanca soltas e as de dentro de cada MudancaLote, na ordem
+    for ev in eventos:
+        if isinstance(ev, MudancaLote):
+            yield from ev.mudancas
+        elif isinstance(ev, Mudanca):
+            yield ev
+
+def encerrar_telas(page: ft.Page):
+    cache = page.session.get("telas")
+    if cache is not None:
+        for t in cache["telas"].values():
+            for a in t.assinaturas:
+                a.cancelar()
+
+def telas_da_sessao(page: ft.Page) -> dict:
+    cache = page.session.get("telas")
+    usuario = usuario_da_pagina(page)
+    # outra conta logou ou alguém limpou a página (login, page.clean): recomeça
+    if (cache is None or cache["usuario"] != usuario
+            or any(t.raiz not in page.controls for t in cache["telas"].values())):
+        encerrar_telas(page)
+        page.controls.clear()
+        cache = {"usuario": usuario, "telas": {}}
+        page.session.set("telas", cache)
+    return cache["telas"]
+
+def mostrar_tela(page: ft.Page, nome: str, titulo: str, construir: Callable[[], Tela]):
+    init_dispositivos_session(page)
+    telas = telas_da_sessao(page)
+    tela = telas.get(nome)
+    if tela is None:
+        tela = telas[nome] = construir()
+        page.controls.append(tela.raiz)
+    elif tela.atualizar:
+        tela.atualizar()
+    for t in telas.values():
+        t.raiz.visible = t is tela
+    page.title = titulo
+    page.update()
+
+def botao_voltar(page: ft.Page):
+    return ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
 
 # Registro de uso (para relatório)
 
 def registrar_uso(page: ft.Page, dispositivo: str, comodo: str, ligado: bool):
-    uso = page.session.get("uso")
-    if uso is None:
-        uso = {}
-    key = f"{dispositivo}::{comodo}"
-    if ligado:
-        # inicia contado de tempo
-        uso.setdefault(key, {})
-        uso[key]["inicio"] = datetime.datetime.now().isoformat()
-        uso[key]["horas"] = uso[key].get("horas", 0)
-    else:
-        # finaliza e junta horas
-        if key in uso and "inicio" in uso[key]:
-            inicio = datetime.datetime.fromisoformat(uso[key]["inicio"])
-            dur = (datetime.datetime.now() - inicio).total_seconds() / 3600
-            uso[key]["horas"] = uso[key].get("horas", 0) + dur
-            uso[key].pop("inicio", None)
-    page.session.set("uso", uso)
+    controlador.registrar_uso(usuario_da_pagina(page), dispositivo, comodo, ligado)
 
 # Telas de dispositivos
 
-def tela_ar_condicionado(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Ar Condicionado"
-    dispositivos = page.session.get("dispositivos") or {}
-    lista = []
-    for c in dispositivos.get("ar condicionado", {}).keys():
-        def toggle(e, nome=c):
-            dispositivos = page.session.get("dispositivos")
-            dispositivos["ar condicionado"][nome] = e.control.value
-            page.session.set("dispositivos", dispositivos)
-            registrar_uso(page, "ar condicionado", nome, e.control.value)
-            page.snack_msg(f"{nome.capitalize()}: {'Ligado' if e.control.value else 'Desligado'}")
-        lista.append(
-            ft.Row(
-                [
-                    ft.Text(c.capitalize(), size=18, color="white", expand=True),
-                    ft.Switch(value=dispositivos["ar condicionado"][c], on_change=toggle),
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-            )
-        )
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Controle de Ar Condicionado", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                *lista,
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
-            ],
-            spacing=12,
-            expand=True
-        )
+def construir_tela_categoria(page: ft.Page, categoria: str, cabecalho: str, mensagem, vazio: str = None,
+                             acoes: list = ()) -> Tela:
+    switches = {}
+    linhas = ft.Column(spacing=12)
+    aviso = ft.Text(vazio or "", color="white", visible=False)
+
+    async def toggle(e):
+        # a ordem vai ao aparelho sem segurar o loop; sem confirmação, o switch volta
+        nome, ligado = e.control.data, e.control.value
+        try:
+            await controlador.acionar(usuario_da_pagina(page), categoria, nome, ligado)
+        except FalhaDispositivo:
+            e.control.value = not ligado
+            page.snack_msg(f"{nome.capitalize()} não respondeu; tente de novo.")
+            return
+        page.snack_msg(mensagem(nome, ligado))
+
+    def atualizar():
+        estados = dispositivos_da_pagina(page).get(categoria, {})
+        for nome, ligado in list(estados.items()):
+            sw = switches.get(nome)
+            if sw is None:
+                # dispositivo novo desde a última visita
+                sw = switches[nome] = ft.Switch(value=ligado, data=nome, on_change=toggle)
+                linhas.controls.append(
+                    ft.Row(
+                        [
+                            ft.Text(nome.capitalize(), size=18, color="white", expand=True),
+                            sw,
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    )
+                )
+            elif sw.value != ligado:
+                sw.value = ligado
+        aviso.visible = bool(vazio) and not switches
+
+    def ao_mudar(eventos):
+        # aberta: só os switches desta categoria que mudaram vão ao navegador
+        if not raiz.visible:
+            return
+        if any(isinstance(ev, Perdidos) for ev in eventos):
+            atualizar()
+            atualizacoes_da_pagina(page).pedir()
+            return
+        mudados = []
+        for m in mudancas_de(eventos):
+            if m.dispositivo != categoria:
+                continue
+            sw = switches.get(m.comodo)
+            if sw is None:
+                # dispositivo novo: a lista inteira muda
+                atualizar()
+                mudados.append(linhas)
+            elif sw.value != m.ligado:
+                sw.value = m.ligado
+                mudados.append(sw)
+        if mudados:
+            atualizacoes_da_pagina(page).pedir(*mudados)
+
+    atualizar()
+    raiz = ft.Column(
+        [
+            ft.Text(cabecalho, size=22, weight="bold", color="white"),
+            ft.Divider(color="white"),
+            aviso,
+            linhas,
+            *acoes,
+            botao_voltar(page),
+        ],
+        spacing=12,
+        expand=True
     )
+    return Tela(raiz, atualizar, [assinar_na_tela(page, (Mudanca, MudancaLote), ao_mudar)])
+
+def tela_ar_condicionado(page: ft.Page):
+    mostrar_tela(page, "ar condicionado", "Ar Condicionado", lambda: construir_tela_categoria(
+        page, "ar condicionado", "Controle de Ar Condicionado",
+        lambda nome, ligado: f"{nome.capitalize()}: {'Ligado' if ligado else 'Desligado'}",
+    ))
 
 def tela_lampada(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Lâmpadas"
-    dispositivos = page.session.get("dispositivos") or {}
-    lista = []
-    for c in dispositivos.get("lâmpada", {}).keys():
-        def toggle(e, nome=c):
-            dispositivos = page.session.get("dispositivos")
-            dispositivos["lâmpada"][nome] = e.control.value
-            page.session.set("dispositivos", dispositivos)
-            registrar_uso(page, "lâmpada", nome, e.control.value)
-            page.snack_msg(f"{nome.capitalize()}: {'Ligada' if e.control.value else 'Desligada'}")
-        lista.append(
-            ft.Row(
-                [
-                    ft.Text(c.capitalize(), size=18, color="white", expand=True),
-                    ft.Switch(value=dispositivos["lâmpada"][c], on_change=toggle),
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-            )
-        )
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Controle de Lâmpadas", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                *lista,
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
-            ],
-            spacing=12,
-            expand=True
-        )
-    )
+    mostrar_tela(page, "lâmpada", "Lâmpadas", lambda: construir_tela_categoria(
+        page, "lâmpada", "Controle de Lâmpadas",
+        lambda nome, ligado: f"{nome.capitalize()}: {'Ligada' if ligado else 'Desligada'}",
+    ))
 
 def tela_camera(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Câmeras"
-    dispositivos = page.session.get("dispositivos") or {}
-    lista = []
-    for l in dispositivos.get("câmera", {}).keys():
-        def toggle(e, nome=l):
-            dispositivos = page.session.get("dispositivos")
-            dispositivos["câmera"][nome] = e.control.value
-            page.session.set("dispositivos", dispositivos)
-            registrar_uso(page, "câmera", nome, e.control.value)
-            page.snack_msg(f"Câmera {nome.capitalize()}: {'Ativa' if e.control.value else 'Inativa'}")
-        lista.append(
-            ft.Row(
-                [
-                    ft.Text(l.capitalize(), size=18, color="white", expand=True),
-                    ft.Switch(value=dispositivos["câmera"][l], on_change=toggle),
-                ],
-                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
-            )
-        )
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Monitoramento de Câmeras", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                *lista,
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
-            ],
-            spacing=12,
-            expand=True
-        )
-    )
+    mostrar_tela(page, "câmera", "Câmeras", lambda: construir_tela_categoria(
+        page, "câmera", "Monitoramento de Câmeras",
+        lambda nome, ligado: f"Câmera {nome.capitalize()}: {'Ativa' if ligado else 'Inativa'}",
+    ))
 
 # Relatório de energia
 
-def tela_relatorio(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Relatório de Energia"
-    uso = page.session.get("uso") or {}
-    lines = []
-    total_kwh = 0.0
-    for chave, dados in uso.items():
-        try:
-            disp, comodo = chave.split("::")
-        except ValueError:
-            continue
-        horas = dados.get("horas", 0.0)
-        if "inicio" in dados:
-            inicio = datetime.datetime.fromisoformat(dados["inicio"])
-            horas += (datetime.datetime.now() - inicio).total_seconds() / 3600
-        consumo = horas * CONSUMO_PADRAO.get(disp, CONSUMO_PADRAO["outros"])
-        total_kwh += consumo
-        lines.append(ft.Text(f"{disp.capitalize()} - {comodo.capitalize()}: {consumo:.2f} kWh", color="white"))
-    co2_ev = total_kwh * 0.084  # 84 g CO2 per kWh => 0.084 kg
-    if not lines:
-        lines = [ft.Text("Nenhum consumo registrado ainda.", color="white")]
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Relatório de Consumo de Energia", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                *lines,
-                ft.Divider(color="white"),
-                ft.Text(f"Total: {total_kwh:.2f} kWh", size=18, color="yellow"),
-                ft.Text(f"Estimativa de CO₂ evitada: {co2_ev:.2f} kg", size=16, color="green"),
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
-            ],
-            spacing=12
-        )
+def construir_relatorio(page: ft.Page) -> Tela:
+    textos = {}
+    textos_comodo = {}
+    linhas = ft.Column(spacing=12)
+    linhas_comodo = ft.Column(spacing=6)
+    vazio = ft.Text("Nenhum consumo registrado ainda.", color="white")
+    total = ft.Text(size=18, color="yellow")
+    periodo = ft.Text(size=16, color="yellow")
+    solar_txt = ft.Text(size=16, color="orange")
+    co2_txt = ft.Text(size=16, color="green")
+
+    def linha(tabela, coluna, chave, valor):
+        # devolve o controle a reenviar: o texto, ou a coluna se a linha é nova
+        t = tabela.get(chave)
+        if t is None:
+            t = tabela[chave] = ft.Text(valor, color="white")
+            coluna.controls.append(t)
+            return coluna
+        t.value = valor
+        return t
+
+    def linha_dispositivo(disp, comodo, kwh, custo):
+        return linha(textos, linhas, (disp, comodo),
+                     f"{disp.capitalize()} - {comodo.capitalize()}: {kwh:.2f} kWh · {reais(custo)}")
+
+    def linha_comodo(comodo, custo):
+        return linha(textos_comodo, linhas_comodo, comodo, f"{comodo.capitalize()}: {reais(custo)}")
+
+    def totais(uso, agora, custo_total):
+        hoje = datetime.date.today()
+        vazio.visible = not textos
+        total.value = f"Total: {uso.total(agora):.2f} kWh · {reais(custo_total)} (tarifa {uso.tarifa.nome})"
+        periodo.value = (f"Hoje: {reais(uso.custo_desde(hoje, agora))} · "
+                         f"Este mês: {reais(uso.custo_desde(hoje.replace(day=1), agora))}")
+
+    def balanco_solar(usuario, uso, agora):
+        # CO₂ evitado = consumo coberto pelos painéis, casado quarto de hora a quarto de hora
+        b = solar.balanco_consumo(uso, controlador.instalacao(usuario), agora)
+        solar_txt.value = (f"Solar: {b.geracao_kwh:.2f} kWh gerados · {b.autoconsumo_kwh:.2f} kWh usados na hora "
+                           f"({b.fracao_solar:.0%} do consumo)")
+        co2_txt.value = f"CO₂ evitado pelos painéis: {b.co2_evitado_kg:.2f} kg"
+
+    def atualizar():
+        usuario = usuario_da_pagina(page)
+        uso = controlador.consumo(usuario)
+        agora = agora_ms()
+        custo_disp, custo_comodo, custo_total = uso.custos(agora)
+        for disp, comodo, consumo in uso.dispositivos(agora):
+            linha_dispositivo(disp, comodo, consumo, custo_disp.get((disp, comodo), 0.0))
+        for comodo, valor in sorted(custo_comodo.items()):
+            linha_comodo(comodo, valor)
+        totais(uso, agora, custo_total)
+        balanco_solar(usuario, uso, agora)
+
+    def ao_consumir(eventos):
+        # chega no loop do Flet: a leitura vai para o executor do banco, porque
+        # um consumo que saiu do cache é refeito do usage_events
+        if raiz.visible:
+            page.run_task(consumir, eventos)
+
+    async def consumir(eventos):
+        if any(isinstance(ev, Perdidos) for ev in eventos):
+            await banco.executar(atualizar)
+            atualizacoes_da_pagina(page).pedir()
+            return
+        atualizacoes_da_pagina(page).pedir(*await banco.executar(refazer_linhas, eventos))
+
+    def refazer_linhas(eventos):
+        # refaz só as linhas dos aparelhos/cômodos que mudaram e os totais; o
+        # balanço solar (o mais caro) só quando um trecho fecha
+        usuario = usuario_da_pagina(page)
+        uso = controlador.consumo(usuario)
+        agora = agora_ms()
+        chaves = {(ev.dispositivo, ev.comodo) for ev in eventos if isinstance(ev, IntervaloUso)}
+        chaves.update((m.dispositivo, m.comodo) for m in mudancas_de(eventos))
+        mudados = [linha_dispositivo(disp, comodo, *uso.linha(disp, comodo, agora)) for disp, comodo in chaves]
+        mudados += [linha_comodo(comodo, uso.custo_comodo(comodo, agora)) for comodo in {c for _, c in chaves}]
+        totais(uso, agora, uso.custo(agora))
+        mudados += [vazio, total, periodo]
+        if any(isinstance(ev, IntervaloUso) for ev in eventos):
+            balanco_solar(usuario, uso, agora)
+            mudados += [solar_txt, co2_txt]
+        return mudados
+
+    atualizar()
+    raiz = ft.Column(
+        [
+            ft.Text("Relatório de Consumo de Energia", size=22, weight="bold", color="white"),
+            ft.Divider(color="white"),
+            vazio,
+            linhas,
+            ft.Divider(color="white"),
+            ft.Text("Custo por cômodo", size=16, weight="bold", color="white"),
+            linhas_comodo,
+            ft.Divider(color="white"),
+            total,
+            periodo,
+            solar_txt,
+            co2_txt,
+            botao_voltar(page),
+        ],
+        spacing=12
     )
+    return Tela(raiz, atualizar, [assinar_na_tela(page, (IntervaloUso, Mudanca, MudancaLote), ao_consumir)])
 
-# Assistente Virtual chat e agendamento
+def tela_relatorio(page: ft.Page):
+    mostrar_tela(page, "relatorio", "Relatório de Energia", lambda: construir_relatorio(page))
 
-def tela_assistente(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "Assistente Virtual"
+# Assistente Virtual chat e agendamento
 
+def construir_assistente(page: ft.Page) -> Tela:
     mensagens = ft.ListView(expand=True, spacing=10, auto_scroll=True)
     entrada = ft.TextField(hint_text="Digite sua mensagem...", expand=True)
-
-    respostas_ligar = [
-        "Pronto, já liguei {disp} do {comodo} ✅",
-        "O {disp} do {comodo} foi ativado 🚀",
-        "Pode deixar! {disp} do {comodo} está ligado agora 😉"
-    ]
-    respostas_desligar = [
-        "Certo, desliguei {disp} do {comodo} ❌",
-        "{disp} do {comodo} foi desativado 🔌",
-        "Tudo bem, {disp} do {comodo} está desligado 👍"
-    ]
-    respostas_agendado = [
-        "Feito — agendei para {hora}: {acao} {disp} do {comodo}.",
-        "Agendado: às {hora} eu vou {acao} o {disp} do {comodo}.",
-        "Anotado! Às {hora} eu {acao}rei o {disp} do {comodo}."
-    ]
-
-    def processar_comando(texto):
-        texto_lower = texto.lower()
-        dispositivos = page.session.get("dispositivos") or {}
-
-        # ação
-        if any(p in texto_lower for p in ["ligue", "acenda", "ative", "ligar", "ativar", "acender"]):
-            acao_bool = True
-            acao_text = "ligar"
-        elif any(p in texto_lower for p in ["desligue", "apague", "desative", "desligar", "desativar", "apagar"]):
-            acao_bool = False
-            acao_text = "desligar"
-        else:
-            return "Não entendi se devo ligar ou desligar 🤔"
-
-        norm_text = normalize_text(texto_lower)
-
-        # dispositivo
-        dispositivo = None
-        for d in dispositivos.keys():
-            if normalize_text(d) in norm_text:
-                dispositivo = d
-                break
-        if not dispositivo:
-            return "Não entendi qual dispositivo você quer controlar 🤔"
-
-        # comodo
-        comodo = None
-        for c in dispositivos[dispositivo].keys():
-            if normalize_text(c) in norm_text:
-                comodo = c
-                break
-        if not comodo:
-            return f"Não encontrei o cômodo para o {dispositivo} 🔍"
-
-        # horário?
-        target = parse_time_from_text(texto_lower)
-        if target:
-            schedule_action(page, dispositivo, comodo, acao_bool, target)
-            hora_str = target.strftime("%Y-%m-%d %H:%M")
-            resposta = random.choice(respostas_agendado).format(hora=hora_str, acao=acao_text, disp=dispositivo.capitalize(), comodo=comodo.capitalize())
-            return resposta
-
-        # ação imediata
-        dispositivos[dispositivo][comodo] = acao_bool
-        page.session.set("dispositivos", dispositivos)
-        registrar_uso(page, dispositivo, comodo, acao_bool)
-        if acao_bool:
-            return random.choice(respostas_ligar).format(disp=dispositivo.capitalize(), comodo=comodo.capitalize())
+    agendamentos = ft.Column()
+    exibidos = [None]
+
+    async def processar_comando(texto):
+        resultado = await controlador.executar_comando_async(usuario_da_pagina(page), texto)
+        return resultado.mensagem
+
+    # Listar agendamentos (só refaz a lista se ela mudou)
+    def atualizar_agendamentos():
+        textos = tuple(
+            (f"Cena: {cenas.descrever(s.comodo, s.acao)} @ {datetime.datetime.fromtimestamp(s.quando).isoformat()}"
+             if s.dispositivo == cenas.CENA else
+             f"{s.dispositivo.capitalize()} - {s.comodo.capitalize()} @ "
+             f"{datetime.datetime.fromtimestamp(s.quando).isoformat()} -> {'ligar' if s.acao else 'desligar'}")
+            + (f" ({recorrencia.descrever(s.regra)})" if s.regra else "")
+            for s in controlador.agendamentos(usuario_da_pagina(page))
+        )
+        if textos == exibidos[0]:
+            return False
+        exibidos[0] = textos
+        if not textos:
+            agendamentos.controls = [ft.Text("Sem agendamentos", color="white")]
         else:
-            return random.choice(respostas_desligar).format(disp=dispositivo.capitalize(), comodo=comodo.capitalize())
+            agendamentos.controls = [ft.Text("Agendamentos:", color="white")] + [ft.Text(t, color="white") for t in textos]
+        return True
+
+    def ao_agendar(eventos):
+        # criado/cancelado/executado (inclusive por outra aba ou pelo agendador)
+        if raiz.visible and atualizar_agendamentos():
+            atualizacoes_da_pagina(page).pedir(agendamentos)
 
-    def enviar_msg(e):
+    async def enviar_msg(e):
         if entrada.value.strip() == "":
             return
         user_msg = entrada.value.strip()
         mensagens.controls.append(ft.Text(f"Você: {user_msg}", color="white"))
-        resp = processar_comando(user_msg)
+        resp = await processar_comando(user_msg)
         mensagens.controls.append(ft.Text(f"Assistente: {resp}", color="cyan"))
         entrada.value = ""
+        atualizar_agendamentos()
         page.update()
 
-    # Listar agendamentos
-    def listar_agendamentos_control():
-        schedules = page.session.get("schedules")
-        if schedules is None or len(schedules) == 0:
-            return ft.Text("Sem agendamentos", color="white")
-        textos = []
-        for s in schedules:
-            dt = s.get("time")
-            textos.append(f"{s.get('device').capitalize()} - {s.get('comodo').capitalize()} @ {dt} -> {'ligar' if s.get('action') else 'desligar'}")
-        return ft.Column([ft.Text("Agendamentos:", color="white")] + [ft.Text(t, color="white") for t in textos])
-
     enviar_btn = ft.ElevatedButton("Enviar", on_click=enviar_msg)
 
-    page.add(
-        ft.Column(
-            [
-                ft.Text("Chat com Assistente Virtual", size=22, weight="bold", color="white"),
-                ft.Divider(color="white"),
-                mensagens,
-                ft.Row([entrada, enviar_btn]),
-                ft.Divider(color="white"),
-                listar_agendamentos_control(),
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
-            ],
-            spacing=12,
-            expand=True
-        )
+    atualizar_agendamentos()
+    raiz = ft.Column(
+        [
+            ft.Text("Chat com Assistente Virtual", size=22, weight="bold", color="white"),
+            ft.Divider(color="white"),
+            mensagens,
+            ft.Row([entrada, enviar_btn]),
+            ft.Divider(color="white"),
+            agendamentos,
+            botao_voltar(page),
+        ],
+        spacing=12,
+        expand=True
     )
+    tipos = (AgendamentoCriado, AgendamentoCancelado, AgendamentoExecutado)
+    return Tela(raiz, atualizar_agendamentos, [assinar_na_tela(page, tipos, ao_agendar)])
 
-# Conta
+def tela_assistente(page: ft.Page):
+    mostrar_tela(page, "assistente", "Assistente Virtual", lambda: construir_assistente(page))
 
-def tela_conta(page: ft.Page):
-    page.clean()
-    page.title = "Conta"
-    usuario_email = page.session.get("usuario_email")
-    if not usuario_email:
-        page.add(ft.Text("Usuário não identificado. Faça login novamente.", color="white"))
-        page.add(ft.TextButton("Voltar ao login", on_click=lambda e: page.go("/"), style=ft.ButtonStyle(color="white")))
-        return
-    usuario = buscar_usuario(usuario_email)
-    nome_atual = usuario[0] if usuario else ""
-    email_atual = usuario[1] if usuario else usuario_email
+# Conta
 
-    nome = ft.TextField(label="Nome", value=nome_atual, width=300)
-    email = ft.TextField(label="E-mail", value=email_atual, disabled=True, width=300)
+def construir_conta(page: ft.Page, usuario_email: str) -> Tela:
+    nome = ft.TextField(label="Nome", width=300)
+    email = ft.TextField(label="E-mail", disabled=True, width=300)
     senha = ft.TextField(label="Nova Senha (deixe vazio para manter)", password=True, can_reveal_password=True, width=300)
-
-    def salvar(e):
+    # instalação solar (relatório: geração, autoconsumo e CO₂ evitado)
+    campos_solar = {
+        "potencia_kwp": ft.TextField(label="Painéis (kWp)", width=145),
+        "inclinacao": ft.TextField(label="Inclinação (°)", width=145),
+        "latitude": ft.TextField(label="Latitude", width=145),
+        "longitude": ft.TextField(label="Longitude", width=145),
+    }
+
+    def atualizar():
+        # linha e instalação lidas por tela_conta antes de mostrar (fora do loop)
+        usuario = page.session.get("conta")
+        nome.value = usuario[0] if usuario else ""
+        email.value = usuario[1] if usuario else usuario_email
+        senha.value = ""
+        inst = page.session.get("instalacao") or solar.INSTALACAO_PADRAO
+        for campo, t in campos_solar.items():
+            t.value = f"{getattr(inst, campo):g}"
+
+    async def salvar(e):
+        try:
+            valores = {c: float(t.value.replace(",", ".")) for c, t in campos_solar.items()}
+        except ValueError:
+            page.snack_msg("Dados dos painéis inválidos: use números, ex.: 3,5")
+            return
+        inst = dataclasses.replace(page.session.get("instalacao") or solar.INSTALACAO_PADRAO, **valores)
         novo_nome = nome.value.strip()
         nova_senha_val = senha.value.strip()
-        nova_hash = hash_senha(nova_senha_val) if nova_senha_val else None
-        atualizar_usuario(email_atual, novo_nome if novo_nome else None, nova_hash)
+        nova_hash = None
+        if nova_senha_val:
+            # hash da nova senha no pool de credenciais
+            nova_hash = await asyncio.wrap_future(credenciais.servico.gerar_hash(nova_senha_val))
+        await banco.executar(atualizar_usuario, email.value, novo_nome if novo_nome else None, nova_hash)
+        if inst != page.session.get("instalacao"):
+            await banco.executar(controlador.definir_instalacao, usuario_email, inst)
+            page.session.set("instalacao", inst)
         page.snack_msg("Alterações salvas com sucesso!")
-        page.update()
 
-    page.add(
+    atualizar()
+    return Tela(
         ft.Column(
             [
                 ft.Text("Configurações da Conta", size=22, weight="bold", color="white"),
@@ -643,22 +536,35 @@ def tela_conta(page: ft.Page):
                 nome,
                 email,
                 senha,
+                ft.Text("Instalação solar", color="white"),
+                ft.Row(list(campos_solar.values())[:2], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row(list(campos_solar.values())[2:], alignment=ft.MainAxisAlignment.CENTER),
                 ft.ElevatedButton("Salvar Alterações", on_click=salvar),
                 ft.ElevatedButton("Sair da Conta", bgcolor="red", color="white", on_click=lambda e: page.go("/")),
-                ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white")),
+                botao_voltar(page),
             ],
             spacing=12,
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
-        )
+        ),
+        atualizar,
     )
 
-# Suporte
+async def tela_conta(page: ft.Page):
+    usuario_email = page.session.get("usuario_email")
+    if not usuario_email:
+        page.clean()
+        page.title = "Conta"
+        page.add(ft.Text("Usuário não identificado. Faça login novamente.", color="white"))
+        page.add(ft.TextButton("Voltar ao login", on_click=lambda e: page.go("/"), style=ft.ButtonStyle(color="white")))
+        return
+    page.session.set("conta", await banco.executar(buscar_usuario, usuario_email))
+    page.session.set("instalacao", await banco.executar(controlador.instalacao, usuario_email))
+    mostrar_tela(page, "conta", "Conta", lambda: construir_conta(page, usuario_email))
 
-def tela_suporte(page: ft.Page):
-    page.clean()
-    page.title = "Suporte"
+# Suporte
 
-    page.add(
+def construir_suporte(page: ft.Page) -> Tela:
+    return Tela(
         ft.Column(
             [
                 ft.Text("Suporte", size=22, weight="bold", color="white"),
@@ -671,7 +577,7 @@ def tela_suporte(page: ft.Page):
                 ),
                 ft.Row(
                     [
-                        ft.TextButton("⬅ Voltar", on_click=lambda e: carregar_dashboard(page), style=ft.ButtonStyle(color="white"))
+                        botao_voltar(page)
                     ],
                     alignment=ft.MainAxisAlignment.START
                 )
@@ -681,22 +587,21 @@ def tela_suporte(page: ft.Page):
         )
     )
 
-# Dashboard principal
+def tela_suporte(page: ft.Page):
+    mostrar_tela(page, "suporte", "Suporte", lambda: construir_suporte(page))
 
-def carregar_dashboard(page: ft.Page):
-    init_dispositivos_session(page)
-    page.clean()
-    page.title = "SmartLight Solar - Dashboard"
+# Dashboard principal
 
+def construir_dashboard(page: ft.Page) -> Tela:
     def abrir_adicionar(e):
         nome_field = ft.TextField(label="Nome do dispositivo", width=300)
 
-        def adicionar_ev(ev):
+        async def adicionar_ev(ev):
             nome_val = nome_field.value.strip()
-            if nome_val:
-                adicionar_dispositivo(page, nome_val)
             dlg.open = False
-            page.update()
+            if nome_val:
+                await banco.executar(adicionar_dispositivo, page, nome_val)
+            atualizacoes_da_pagina(page).pedir()
 
         def cancelar_ev(ev):
             dlg.open = False
@@ -715,12 +620,16 @@ def carregar_dashboard(page: ft.Page):
         dlg.open = True
         page.update()
 
+    async def abrir_relatorio(e):
+        # montar/atualizar o relatório lê o consumo, que pode vir do usage_events
+        await banco.executar(tela_relatorio, page)
+
     header = ft.Row(
         [
             ft.Text("🌞 SmartLight Solar", size=22, weight="bold", color="white"),
             ft.Row(
                 [
-                    ft.ElevatedButton("Relatório", on_click=lambda e: tela_relatorio(page)),
+                    ft.ElevatedButton("Relatório", on_click=abrir_relatorio),
                     ft.ElevatedButton("Adicionar Dispositivo", on_click=abrir_adicionar),
                     ft.ElevatedButton("Sair", bgcolor="red", color="white", on_click=lambda e: page.go("/")),
                 ],
@@ -745,7 +654,7 @@ def carregar_dashboard(page: ft.Page):
             ft.Row(
                 [
                     ft.ElevatedButton("Câmera", expand=True, style=estilo, on_click=lambda e: tela_camera(page)),
-                    ft.ElevatedButton("Outros", expand=True, style=estilo, on_click=lambda e: page.snack_msg("Outros dispositivos")),
+                    ft.ElevatedButton("Outros", expand=True, style=estilo, on_click=lambda e: tela_outros(page)),
                 ],
                 expand=True,
                 spacing=20
@@ -755,29 +664,41 @@ def carregar_dashboard(page: ft.Page):
         expand=True
     )
 
+    async def aplicar_cena(e):
+        nome = e.control.data
+        alterados = await controlador.acionar_cena(usuario_da_pagina(page), nome)
+        page.snack_msg(f"Cena '{nome}': {len(alterados)} dispositivo(s) alterado(s).")
+
+    async def abrir_conta(e):
+        await tela_conta(page)
+
+    cenas_row = ft.Row(
+        [ft.OutlinedButton(nome.capitalize(), data=nome, on_click=aplicar_cena) for nome in cenas.CENAS],
+        alignment=ft.MainAxisAlignment.CENTER,
+        spacing=12,
+    )
+
     botoes_inferiores = ft.Row(
         [
             ft.TextButton("Suporte", on_click=lambda e: tela_suporte(page), style=ft.ButtonStyle(color="white")),
             ft.TextButton("Assistente Virtual", on_click=lambda e: tela_assistente(page), style=ft.ButtonStyle(color="white")),
-            ft.TextButton("Conta", on_click=lambda e: tela_conta(page), style=ft.ButtonStyle(color="white")),
+            ft.TextButton("Conta", on_click=abrir_conta, style=ft.ButtonStyle(color="white")),
         ],
         alignment=ft.MainAxisAlignment.SPACE_EVENLY,
         spacing=20
     )
 
-    def snack_msg(msg):
-        page.snack_bar = ft.SnackBar(content=ft.Text(msg, color="white"), bgcolor="blue", open=True)
-        page.update()
+    page.snack_msg = atualizacoes_da_pagina(page).avisar
 
-    page.snack_msg = snack_msg
-
-    page.add(
+    return Tela(
         ft.Column(
             [
                 header,
                 ft.Divider(color="white"),
                 ft.Text("Dispositivos", size=20, weight="bold", color="white"),
                 dispositivos_grid,
+                ft.Text("Cenas", size=20, weight="bold", color="white"),
+                cenas_row,
                 ft.Divider(color="white"),
                 botoes_inferiores
             ],
@@ -786,13 +707,11 @@ def carregar_dashboard(page: ft.Page):
         )
     )
 
+def carregar_dashboard(page: ft.Page):
+    mostrar_tela(page, "dashboard", "SmartLight Solar - Dashboard", lambda: construir_dashboard(page))
+
 def adicionar_dispositivo(page: ft.Page, nome: str):
     if not nome.strip():
         return
-    dispositivos = page.session.get("dispositivos") or {}
-    outros = dispositivos.get("outros", {})
-    outros[nome.strip().lower()] = False
-    dispositivos["outros"] = outros
-    page.session.set("dispositivos", dispositivos)
-    page.snack_msg(f"Dispositivo '{nome}' adicionado em Outros.")
-    page.update()
\ No newline at end of file
+    controlador.adicionar_dispositivo(usuario_da_pagina(page), nome.strip().lower())
+    page.snack_msg(f"Dispositivo '{nome}' adicionado em Outros.")
\ No newline at end of file
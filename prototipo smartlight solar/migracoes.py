@@ -0,0 +1,129 @@
+# migracoes.py
+# Esquema do banco versionado por PRAGMA user_version. Cada migração roda uma
+# única vez por banco, quando o pool é criado (banco.pool()/banco.configurar()),
+# e nunca no caminho de uma sessão ou de uma consulta.
+# Bancos antigos (user_version 0) podem já ter parte das tabelas, criadas pelo
+# código de antes; por isso as migrações iniciais checam o que já existe.
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+def _colunas(conn, tabela):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _v1_usuarios(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT,
+            email TEXT UNIQUE NOT NULL,
+            senha TEXT NOT NULL
+        )
+    """)
+    # o usuarios.db original não tinha nome
+    if "nome" not in _colunas(conn, "usuarios"):
+        conn.execute("ALTER TABLE usuarios ADD COLUMN nome TEXT")
+
+
+def _v2_eventos_uso(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS usage_events (
+            id INTEGER PRIMARY KEY,
+            usuario TEXT NOT NULL,
+            dispositivo TEXT NOT NULL,
+            comodo TEXT NOT NULL,
+            ligado INTEGER NOT NULL,
+            ts INTEGER NOT NULL
+        )
+    """)
+    # relatório por período e replay do consumo de um usuário
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_events_ts ON usage_events (ts)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_events_usuario_ts ON usage_events (usuario, ts)")
+
+
+def _v3_estado(conn):
+    # a chave primária (usuario, ...) já atende a leitura por usuário
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS estado_dispositivos (
+            usuario TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            ligado INTEGER NOT NULL,
+            PRIMARY KEY (usuario, categoria, nome)
+        ) WITHOUT ROWID
+    """)
+
+
+def _v4_agendamentos(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agendamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario TEXT NOT NULL,
+            dispositivo TEXT NOT NULL,
+            comodo TEXT NOT NULL,
+            acao INTEGER NOT NULL,
+            quando REAL NOT NULL,
+            regra INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    # bancos criados antes das regras recorrentes
+    if "regra" not in _colunas(conn, "agendamentos"):
+        conn.execute("ALTER TABLE agendamentos ADD COLUMN regra INTEGER NOT NULL DEFAULT 0")
+
+
+def _v5_instalacao_solar(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS instalacao_solar (
+            usuario TEXT PRIMARY KEY,
+            potencia_kwp REAL NOT NULL,
+            inclinacao REAL NOT NULL,
+            azimute REAL NOT NULL,
+            latitude REAL NOT NULL,
+            longitude REAL NOT NULL,
+            perdas REAL NOT NULL
+        )
+    """)
+
+
+# (versão, descrição, função); a versão do banco é a da última aplicada.
+# Nunca altere uma migração publicada: acrescente outra no fim.
+MIGRACOES = [
+    (1, "usuarios com nome", _v1_usuarios),
+    (2, "usage_events e índices", _v2_eventos_uso),
+    (3, "estado_dispositivos", _v3_estado),
+    (4, "agendamentos com regra", _v4_agendamentos),
+    (5, "instalacao_solar", _v5_instalacao_solar),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+
+def versao(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conn) -> int:
+    # aplica as migrações pendentes, cada uma na sua transação; devolve quantas
+    if versao(conn) >= VERSAO_ATUAL:
+        return 0
+    aplicadas = 0
+    for numero, descricao, fn in MIGRACOES:
+        # BEGIN IMMEDIATE: dois processos subindo juntos não migram duas vezes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao(conn) >= numero:
+                conn.rollback()
+                continue
+            t0 = time.perf_counter()
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(numero)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        aplicadas += 1
+        log.info("migração %d (%s) aplicada em %.1f ms", numero, descricao, (time.perf_counter() - t0) * 1e3)
+    return aplicadas
@@ -0,0 +1,330 @@
+# motor_energia.py
+# Cálculo vetorizado (NumPy) de kWh, custo e CO2 para históricos longos:
+# os intervalos liga/desliga viram arrays, a potência é buscada por código de
+# categoria e os totais saem de bincount sobre dispositivo, cômodo e período.
+# O custo integra cada intervalo contra a curva de preço da tarifa pela
+# integral acumulada hora a hora, sem quebrar o intervalo em pedaços.
+# Horário local como em consumo.Consumo: cada hora UTC usa o deslocamento que
+# time.localtime dá no início dela, então o horário de verão muda o preço e
+# os dias de 23 ou 25 h caem nas mesmas bordas (fusos de hora cheia; em fuso
+# de meia hora o Consumo arredonda a borda do dia para a hora UTC seguinte).
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from consumo import CONSUMO_PADRAO, FATOR_CO2, MS_POR_HORA
+from tarifa import Tarifa, tarifa_padrao
+
+MS_POR_DIA = 24 * MS_POR_HORA
+
+
+class Interning:
+    # nome -> código inteiro estável (ordem de chegada)
+
+    def __init__(self):
+        self.codigos = {}
+        self.nomes = []
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def codigo(self, nome) -> int:
+        c = self.codigos.get(nome)
+        if c is None:
+            c = self.codigos[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return c
+
+    def codificar(self, nomes) -> np.ndarray:
+        codigo = self.codigo
+        return np.fromiter((codigo(n) for n in nomes), dtype=np.int32, count=len(nomes))
+
+
+@dataclass
+class Intervalos:
+    categorias: Interning   # "lâmpada", "ar condicionado", ...
+    comodos: Interning
+    pares: Interning        # (dispositivo, comodo)
+    categoria: np.ndarray   # int32 por intervalo
+    comodo: np.ndarray      # int32 por intervalo
+    par: np.ndarray         # int32 por intervalo
+    inicio: np.ndarray      # int64, epoch ms
+    fim: np.ndarray         # int64, epoch ms
+
+    def __len__(self):
+        return len(self.inicio)
+
+    @classmethod
+    def de_listas(cls, dispositivos, comodos, inicio, fim):
+        categorias, tab_comodos, pares = Interning(), Interning(), Interning()
+        cod_par = pares.codificar(list(zip(dispositivos, comodos)))
+        # categoria e cômodo derivam do par: codifica só os pares distintos
+        cat_do_par = np.array([categorias.codigo(d) for d, _ in pares.nomes], dtype=np.int32)
+        com_do_par = np.array([tab_comodos.codigo(c) for _, c in pares.nomes], dtype=np.int32)
+        return cls(
+            categorias, tab_comodos, pares,
+            cat_do_par[cod_par] if len(cod_par) else np.zeros(0, np.int32),
+            com_do_par[cod_par] if len(cod_par) else np.zeros(0, np.int32),
+            cod_par,
+            np.asarray(inicio, dtype=np.int64),
+            np.asarray(fim, dtype=np.int64),
+        )
+
+    @classmethod
+    def de_eventos(cls, eventos, agora_ms: int = None):
+        # eventos: [(usuario, dispositivo, comodo, ligado, ts)] em ordem de ts.
+        # Mesma regra do Consumo: ligar um dispositivo já ligado não reinicia
+        # o intervalo e desligar um já desligado é ignorado.
+        if not eventos:
+            return cls.de_listas([], [], [], [])
+        usuarios, disps, comodos, ligado, ts = zip(*eventos)
+        chaves = Interning().codificar(list(zip(usuarios, disps, comodos)))
+        ligado = np.asarray(ligado, dtype=np.int8)
+        ts = np.asarray(ts, dtype=np.int64)
+        ordem = np.lexsort((np.arange(len(ts)), ts, chaves))  # por chave, depois tempo
+        chaves, ligado, ts = chaves[ordem], ligado[ordem], ts[ordem]
+        # estado anterior de cada evento na mesma chave (0 no primeiro)
+        anterior = np.empty_like(ligado)
+        anterior[0] = 0
+        anterior[1:] = ligado[:-1]
+        nova_chave = np.empty(len(chaves), dtype=bool)
+        nova_chave[0] = True
+        nova_chave[1:] = chaves[1:] != chaves[:-1]
+        anterior[nova_chave] = 0
+        # só as transições reais: como alternam, cada início é seguido pelo
+        # seu fim na mesma chave (ou é o último evento dela, se ainda ligado)
+        transicao = ligado != anterior
+        chaves, ligado, ts = chaves[transicao], ligado[transicao], ts[transicao]
+        inicios = np.flatnonzero(ligado == 1)
+        prox = inicios + 1
+        tem_fim = prox < len(ts)
+        tem_fim[tem_fim] = chaves[prox[tem_fim]] == chaves[inicios[tem_fim]]
+        if agora_ms is None:
+            inicios = inicios[tem_fim]
+            fins = ts[prox[tem_fim]]
+        else:
+            fins = np.full(len(inicios), agora_ms, dtype=np.int64)
+            fins[tem_fim] = ts[prox[tem_fim]]
+        idx = ordem[transicao][inicios]
+        return cls.de_listas(
+            [disps[i] for i in idx], [comodos[i] for i in idx], ts[inicios], fins,
+        )
+
+
+def fusos_locais(primeira_hora: int, ultima_hora: int) -> np.ndarray:
+    # deslocamento do horário local (ms) no início de cada hora UTC entre as
+    # duas; consulta uma hora por dia e hora a hora só nos dias em que o
+    # deslocamento muda (horário de verão)
+    n = ultima_hora - primeira_hora + 1
+    amostras = np.arange(0, n, 24, dtype=np.int64)
+    desloc = np.array([time.localtime((primeira_hora + int(a)) * 3600).tm_gmtoff * 1000 for a in amostras]
+                      + [time.localtime(ultima_hora * 3600).tm_gmtoff * 1000], dtype=np.int64)
+    fusos = np.repeat(desloc[:-1], np.diff(np.append(amostras, n)))
+    for i in np.flatnonzero(desloc[1:] != desloc[:-1]):
+        for j in range(int(amostras[i]), int(amostras[i + 1]) if i + 1 < len(amostras) else n):
+            fusos[j] = time.localtime((primeira_hora + j) * 3600).tm_gmtoff * 1000
+    return fusos
+
+
+def bordas_periodos(inicio_ms: int, fim_ms: int, periodo_ms: int, fuso_ms: int = None) -> np.ndarray:
+    # inícios (epoch ms) dos períodos locais que cobrem [inicio_ms, fim_ms),
+    # mais a borda do fim. Com fuso_ms fixo, período k começa em k * periodo
+    # - fuso; com None, no primeiro instante cujo horário local (da hora UTC,
+    # como em fusos_locais) já chegou a k * periodo
+    if fuso_ms is not None:
+        k = np.arange((inicio_ms + fuso_ms) // periodo_ms, (fim_ms - 1 + fuso_ms) // periodo_ms + 2, dtype=np.int64)
+        return k * periodo_ms - fuso_ms
+    margem = 30 * MS_POR_HORA  # cobre qualquer fuso (até ±14 h) dos dois lados
+    h0 = (inicio_ms - periodo_ms - margem) // MS_POR_HORA
+    fusos = fusos_locais(h0, (fim_ms + periodo_ms + margem) // MS_POR_HORA)
+
+    def fuso(t):
+        return fusos[t // MS_POR_HORA - h0]
+    k = np.arange((inicio_ms + int(fusos.min())) // periodo_ms - 1,
+                  (fim_ms - 1 + int(fusos.max())) // periodo_ms + 2, dtype=np.int64)
+    local = k * periodo_ms
+    # dois candidatos: com o fuso de antes e o de depois de uma mudança; fica
+    # o mais cedo que já está no período (na hora pulada ou repetida, só um está)
+    c1 = local - fuso(local)
+    c2 = local - fuso(c1)
+    ok1, ok2 = c1 + fuso(c1) >= local, c2 + fuso(c2) >= local
+    bordas = np.maximum.accumulate(np.where(ok1 & ok2, np.minimum(c1, c2), np.where(ok1, c1, c2)))
+    i0 = np.searchsorted(bordas, inicio_ms, "right") - 1
+    i1 = np.searchsorted(bordas, fim_ms - 1, "right")
+    return bordas[i0:i1 + 1]
+
+
+class CurvaTarifa:
+    # preço (R$/kWh) de cada hora UTC (epoch ms // MS_POR_HORA) entre duas,
+    # pelo horário local dela, e sua integral acumulada. fuso_ms fixo ou
+    # None: o deslocamento local de cada hora (fusos_locais)
+
+    def __init__(self, tarifa: Tarifa, primeira_hora: int, ultima_hora: int, fuso_ms: int = None):
+        self.h0 = primeira_hora
+        horas = np.arange(primeira_hora, ultima_hora + 1, dtype=np.int64)
+        if fuso_ms is None:
+            fusos = fusos_locais(primeira_hora, ultima_hora)
+        else:
+            fusos = np.full(len(horas), fuso_ms, dtype=np.int64)
+        locais = (horas * MS_POR_HORA + fusos) // MS_POR_HORA  # hora local contada desde 1970
+        dias = locais // 24
+        meses = dias.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)  # desde 1970-01
+        fim_de_semana = (dias + 3) % 7 >= 5  # 1970-01-01 foi quinta
+        tabela = np.asarray(tarifa.tabela, dtype=np.float64)
+        unicos, qual = np.unique(meses, return_inverse=True)
+        adicional = np.array([tarifa.adicional(1970 + int(m) // 12, int(m) % 12 + 1) for m in unicos])
+        self.preco = tabela[meses % 12, fim_de_semana.astype(np.int64), locais % 24] + adicional[qual]
+        self.acumulado = np.zeros(len(horas) + 1)
+        np.cumsum(self.preco * MS_POR_HORA, out=self.acumulado[1:])
+
+    @classmethod
+    def cobrindo(cls, tarifa: Tarifa, inicio_ms: int, fim_ms: int, fuso_ms: int = None) -> "CurvaTarifa":
+        # curva para instantes (epoch ms) em [inicio_ms, fim_ms]
+        return cls(tarifa, int(inicio_ms) // MS_POR_HORA, int(fim_ms) // MS_POR_HORA, fuso_ms)
+
+    def integral(self, t: np.ndarray) -> np.ndarray:
+        # soma de duração (ms) x preço desde o início da curva até t (epoch ms)
+        h = t // MS_POR_HORA - self.h0
+        return self.acumulado[h] + (t - (h + self.h0) * MS_POR_HORA) * self.preco[h]
+
+    def entre(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return self.integral(b) - self.integral(a)
+
+
+@dataclass
+class Resultado:
+    total_kwh: float
+    total_co2: float
+    por_par: dict        # (dispositivo, comodo) -> kWh
+    por_comodo: dict     # comodo -> kWh
+    por_periodo: dict    # início do período (epoch ms) -> kWh
+    custo_total: float = 0.0
+    custo_por_par: dict = field(default_factory=dict)      # (dispositivo, comodo) -> R$
+    custo_por_comodo: dict = field(default_factory=dict)   # comodo -> R$
+    custo_por_periodo: dict = field(default_factory=dict)  # início do período (epoch ms) -> R$
+
+
+class MotorEnergia:
+    def __init__(self, consumo_padrao: dict = None, fator_co2: float = FATOR_CO2, tarifa: Tarifa = None):
+        self.consumo_padrao = consumo_padrao or CONSUMO_PADRAO
+        self.fator_co2 = fator_co2
+        self.tarifa = tarifa or tarifa_padrao()
+
+    def potencias(self, categorias: Interning) -> np.ndarray:
+        padrao = self.consumo_padrao["outros"]
+        return np.array([self.consumo_padrao.get(n, padrao) for n in categorias.nomes], dtype=np.float64)
+
+    def kwh(self, iv: Intervalos) -> np.ndarray:
+        # potência por intervalo via tabela indexada pelo código da categoria
+        p = self.potencias(iv.categorias)[iv.categoria] if len(iv) else np.zeros(0)
+        dur = np.maximum(iv.fim - iv.inicio, 0)
+        return dur * (p / MS_POR_HORA)
+
+    def curva(self, iv: Intervalos, fuso_ms: int = None, periodo_ms: int = MS_POR_HORA) -> CurvaTarifa:
+        # cobre todos os intervalos, até o fim do último período que eles tocam
+        inicio = int(iv.inicio.min())
+        bordas = bordas_periodos(inicio, max(int(iv.fim.max()), inicio + 1), periodo_ms, fuso_ms)
+        return CurvaTarifa.cobrindo(self.tarifa, int(bordas[0]), int(bordas[-1]), fuso_ms)
+
+    def custo(self, iv: Intervalos, curva: CurvaTarifa) -> np.ndarray:
+        # R$ por intervalo: kWh por ms x integral do preço no intervalo
+        p = self.potencias(iv.categorias)[iv.categoria] / MS_POR_HORA
+        fim = np.maximum(iv.fim, iv.inicio)
+        return p * curva.entre(iv.inicio, fim)
+
+    def _periodos(self, iv: Intervalos, periodo_ms: int, fuso_ms: int):
+        # (válidos, início e fim dos válidos, bordas dos períodos, período do
+        # início e do fim de cada válido)
+        valido = iv.fim > iv.inicio
+        inicio, fim = iv.inicio[valido], iv.fim[valido]
+        if not len(inicio):
+            vazio = np.zeros(0, dtype=np.int64)
+            return valido, inicio, fim, np.zeros(1, dtype=np.int64), vazio, vazio
+        bordas = bordas_periodos(int(inicio.min()), int(fim.max()), periodo_ms, fuso_ms)
+        primeiro = np.searchsorted(bordas, inicio, "right") - 1
+        ultimo = np.searchsorted(bordas, fim - 1, "right") - 1
+        return valido, inicio, fim, bordas, primeiro, ultimo
+
+    def _repartir(self, iv: Intervalos, periodos, acumulados):
+        # reparte cada intervalo válido pelos períodos (_periodos) que ele
+        # cruza. Cada item de `acumulados` é o peso acumulado até t: o próprio
+        # t (kWh) ou a integral do preço (R$), avaliado só nas pontas dos
+        # intervalos e nas bordas dos períodos. Retorna
+        # [(soma por período, valor por intervalo válido)]
+        valido, inicio, fim, bordas, primeiro, ultimo = periodos
+        p = self.potencias(iv.categorias)[iv.categoria[valido]] / MS_POR_HORA
+        if not len(inicio):
+            return [(np.zeros(0), np.zeros(0)) for _ in acumulados]
+        tamanho = len(bordas) - 1
+        varios = ultimo > primeiro
+        seguinte = primeiro + 1
+        u, pv = ultimo[varios], p[varios]
+        # potência dos intervalos que cobrem cada período inteiro: array de
+        # diferenças + cumsum, sem expandir cada intervalo em pedaços
+        cobrindo = None
+        if len(u):
+            dif = np.bincount(seguinte[varios], weights=pv, minlength=tamanho + 1)
+            dif -= np.bincount(u, weights=pv, minlength=tamanho + 1)
+            cobrindo = np.cumsum(dif)[:tamanho]
+        saida = []
+        for acumulado in acumulados:
+            a_bordas, a_inicio, a_fim = acumulado(bordas), acumulado(inicio), acumulado(fim)
+            # trecho no primeiro período de cada intervalo
+            ate = np.where(varios, a_bordas[seguinte], a_fim)
+            soma = np.bincount(primeiro, weights=(ate - a_inicio) * p, minlength=tamanho)
+            if cobrindo is not None:
+                # trecho no último período e períodos inteiros do meio
+                soma += np.bincount(u, weights=(a_fim[varios] - a_bordas[u]) * pv, minlength=tamanho)
+                soma += cobrindo * np.diff(a_bordas)
+            saida.append((soma, (a_fim - a_inicio) * p))
+        return saida
+
+    def por_periodo(self, iv: Intervalos, periodo_ms: int, fuso_ms: int = 0, curva: CurvaTarifa = None):
+        # soma por período; retorna (inícios dos períodos em epoch ms, kWh),
+        # ou R$ com a curva da tarifa
+        periodos = self._periodos(iv, periodo_ms, fuso_ms)
+        [(soma, _)] = self._repartir(iv, periodos, [(lambda t: t) if curva is None else curva.integral])
+        usados = np.flatnonzero(np.abs(soma) > 1e-12)  # descarta resíduo do cumsum
+        return periodos[3][usados], soma[usados]
+
+    def calcular(self, iv: Intervalos, periodo_ms: int = MS_POR_DIA, fuso_ms: int = None) -> Resultado:
+        # fuso_ms None: horário local hora a hora (horário de verão incluso)
+        if not len(iv):
+            return Resultado(0.0, 0.0, {}, {}, {})
+        # kWh e R$ numa passada só: mesmos períodos, mesmas bordas
+        periodos = self._periodos(iv, periodo_ms, fuso_ms)
+        valido, bordas = periodos[0], periodos[3]
+        curva = CurvaTarifa.cobrindo(self.tarifa, int(bordas[0]), int(bordas[-1]), fuso_ms)
+        [(kwh_periodo, kwh), (custo_periodo, custo)] = self._repartir(iv, periodos, [lambda t: t, curva.integral])
+        par, comodo = iv.par[valido], iv.comodo[valido]
+        usados = np.flatnonzero(np.abs(kwh_periodo) > 1e-12)  # descarta resíduo do cumsum
+        periodos = bordas[usados].tolist()
+
+        def por(codigos, nomes, valores):
+            return dict(zip(nomes.nomes, np.bincount(codigos, weights=valores, minlength=len(nomes)).tolist()))
+
+        total = float(kwh.sum())
+        return Resultado(
+            total_kwh=total,
+            total_co2=total * self.fator_co2,
+            por_par=por(par, iv.pares, kwh),
+            por_comodo=por(comodo, iv.comodos, kwh),
+            por_periodo=dict(zip(periodos, kwh_periodo[usados].tolist())),
+            custo_total=float(custo.sum()),
+            custo_por_par=por(par, iv.pares, custo),
+            custo_por_comodo=por(comodo, iv.comodos, custo),
+            custo_por_periodo=dict(zip(periodos, custo_periodo[usados].tolist())),
+        )
+
+
+def relatorio_do_log(usuario: str, inicio_ms: int, fim_ms: int, log=None, motor: MotorEnergia = None,
+                     periodo_ms: int = MS_POR_DIA) -> Resultado:
+    # relatório de um usuário a partir do usage_events; intervalos ainda
+    # abertos são fechados em fim_ms e tudo é recortado a [inicio_ms, fim_ms)
+    if log is None:
+        from eventos_uso import log_uso as log
+    iv = Intervalos.de_eventos(log.eventos(0, fim_ms, usuario), agora_ms=fim_ms)
+    iv.inicio = np.maximum(iv.inicio, inicio_ms)
+    iv.fim = np.minimum(iv.fim, fim_ms)
+    return (motor or MotorEnergia()).calcular(iv, periodo_ms)
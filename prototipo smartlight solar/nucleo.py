@@ -0,0 +1,482 @@
+# nucleo.py
+# Núcleo do SmartLight sem interface: estado dos dispositivos, registro de uso,
+# agendamentos e assistente. As telas Flet (menu.py) só chamam esta API, e o
+# mesmo núcleo pode ser dirigido por scripts, benchmarks e testes de carga.
+# Liga/desliga que vem das telas e do agendador passa pelo adaptador dos
+# aparelhos (adaptador.py) e só vira estado depois da confirmação. Cada
+# mudança, agendamento e trecho de uso fechado sai no barramento de eventos
+# (eventos.py), que as telas assinam.
+import asyncio
+import concurrent.futures
+import datetime
+import logging
+import os
+import random
+import threading
+from dataclasses import dataclass
+
+import banco
+import cenas
+import interpretador
+import otimizador
+import recorrencia
+from adaptador import TENTATIVAS, TIMEOUT, Adaptador, FalhaDispositivo, Ordem, adaptador_padrao
+from agendador import Agendador
+from cache_usuarios import CacheLRU, tamanho_aproximado
+from consumo import Consumo, potencia
+from estado import repositorio as repositorio_estado
+from eventos import (AgendamentoCancelado, AgendamentoCriado, AgendamentoExecutado, Barramento, IntervaloUso,
+                     Mudanca, MudancaLote)
+from eventos_uso import log_uso, agora_ms
+from indice_entidades import IndiceEntidades
+from registro import Registro, montar
+from solar import Instalacao, carregar_instalacao, salvar_instalacao
+from tarifa import Tarifa, tarifa_padrao
+
+log = logging.getLogger(__name__)
+
+ORIGEM_UI = "ui"
+ORIGEM_ASSISTENTE = "assistente"
+ORIGEM_AGENDADOR = "agendador"
+
+ERRO_APARELHO = "{disp} do {comodo} não respondeu; tente de novo em instantes 📡"
+
+# quanto uma thread espera as confirmações do adaptador (segundos); por padrão,
+# um pouco mais que todas as tentativas dele
+ESPERA_ORDENS = float(os.environ.get("SMARTLIGHT_ESPERA_ORDENS", str(TENTATIVAS * TIMEOUT + 2)))
+
+
+@dataclass
+class Resultado:
+    mensagem: str
+    comando: interpretador.Comando
+    agendamento: int = None
+
+
+class Controlador:
+    def __init__(self, estado=None, log_eventos=None, agendador: Agendador = None, tarifa: Tarifa = None,
+                 adaptador: Adaptador = None):
+        self.estado = estado or repositorio_estado
+        self.log = log_eventos or log_uso
+        self.tarifa = tarifa or tarifa_padrao()
+        self.adaptador = adaptador or adaptador_padrao()
+        self.agendador = agendador or Agendador()
+        self.agendador.executor = self._executar_agendamento
+        self.agendador.executor_async = self._executar_agendamentos
+        self._loop = None  # loop do adaptador (o do Flet), quando iniciado com um
+        self._loop_proprio = None  # sem loop do app: loop do adaptador numa thread só dele
+        self._lock_loop = threading.Lock()
+        # caches por usuário, limitados; quem sai é refeito do banco/log de uso
+        self._consumos = CacheLRU()
+        self._indices = CacheLRU()  # usuario -> (versao da lista de dispositivos, índice)
+        self._registros = CacheLRU()  # usuario -> (versao da lista de dispositivos, registro.Registro)
+        self._lock_registros = threading.Lock()
+        self._instalacoes = CacheLRU()  # usuario -> solar.Instalacao
+        self.eventos = Barramento()
+
+    def iniciar(self, loop=None):
+        # loop: event loop onde o agendador e o adaptador rodam (sem loop, o
+        # agendador tem thread própria e o adaptador roda num loop só dele)
+        if loop is not None:
+            # o adaptador não pode ficar com conexões em dois loops
+            self._parar_loop_proprio()
+        self._loop = loop
+        self.agendador.iniciar(loop)
+        return self
+
+    def parar(self):
+        self.agendador.parar()
+        if self._loop is not None and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.adaptador.fechar(), self._loop)
+        self._parar_loop_proprio()
+
+    def _loop_adaptador(self):
+        # o loop do app ou, sem ele, um loop próprio criado na primeira ordem
+        if self._loop is not None:
+            return self._loop
+        with self._lock_loop:
+            if self._loop_proprio is None:
+                loop = self._loop_proprio = asyncio.new_event_loop()
+
+                def rodar():
+                    try:
+                        loop.run_forever()
+                    finally:
+                        loop.close()
+                threading.Thread(target=rodar, name="adaptador", daemon=True).start()
+            return self._loop_proprio
+
+    def _parar_loop_proprio(self):
+        with self._lock_loop:
+            loop, self._loop_proprio = self._loop_proprio, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.adaptador.fechar(), loop).result(ESPERA_ORDENS)
+        except Exception:
+            log.exception("falha ao fechar o adaptador")
+        loop.call_soon_threadsafe(loop.stop)
+
+    def ouvir(self, fn, **opcoes):
+        # fn(Mudanca ou MudancaLote); sem loop nas opções, chamado na thread
+        # de quem aplicou a mudança (handlers assíncronos aplicam no executor
+        # do banco, não no loop). Opções: as de Barramento.assinar
+        return self.eventos.assinar((Mudanca, MudancaLote), fn, **opcoes)
+
+    def _avisar(self, evento):
+        self.eventos.publicar(evento)
+
+    # dispositivos
+
+    def dispositivos(self, usuario: str) -> dict:
+        return self.estado.carregar(usuario)
+
+    def adicionar_dispositivo(self, usuario: str, nome: str, categoria: str = "outros"):
+        nome = nome.strip()
+        if nome:
+            self.estado.adicionar(usuario, categoria, nome)
+        return nome
+
+    def definir(self, usuario: str, dispositivo: str, comodo: str, ligado: bool, origem: str = ORIGEM_UI,
+                atrasado: bool = False):
+        self.estado.definir(usuario, dispositivo, comodo, ligado)
+        ts = agora_ms()
+        self._sincronizar_registro(usuario, [(dispositivo, comodo, ligado)], ts)
+        self.registrar_uso(usuario, dispositivo, comodo, ligado, ts)
+        self._avisar(Mudanca(usuario, dispositivo, comodo, ligado, origem, atrasado))
+
+    def aplicar_cena(self, usuario: str, nome: str, acao: bool = None, origem: str = ORIGEM_UI,
+                     atrasado: bool = False):
+        return self._aplicar_mudancas(usuario, nome, self._mudancas_cena(usuario, nome, acao), acao, origem,
+                                      atrasado)
+
+    def _mudancas_cena(self, usuario, nome, acao):
+        # [(categoria, nome, valor)] que a cena realmente muda
+        return cenas.mudancas(cenas.obter(nome), self.registro(usuario), acao)
+
+    def _aplicar_mudancas(self, usuario, nome, mudancas, acao, origem, atrasado):
+        # tudo num lote: uma escrita de estado, um lote no log de uso e um aviso
+        if not mudancas:
+            return []
+        self.estado.definir_varios(usuario, mudancas)
+        ts = agora_ms()
+        self._sincronizar_registro(usuario, mudancas, ts)
+        consumo = self.consumo(usuario)
+        self.log.registrar_varios([(usuario, c, n, v, ts) for c, n, v in mudancas])
+        self._atualizar_consumo(usuario, consumo, mudancas, ts)
+        lote = [Mudanca(usuario, c, n, v, origem, atrasado) for c, n, v in mudancas]
+        self._avisar(MudancaLote(usuario, nome, lote, origem, acao, atrasado))
+        return lote
+
+    def registro(self, usuario: str) -> Registro:
+        # ids, bitset e arrays dos dispositivos (registro.py); montado de novo
+        # só quando a lista muda, e cada liga/desliga é repassado a ele
+        with self._lock_registros:
+            dispositivos = self.dispositivos(usuario)
+            versao = self.estado.versao(usuario)
+            atual = self._registros.obter(usuario)
+            if atual is None or atual[0] != versao:
+                atual = (versao, montar(dispositivos))
+                self._registros.remover(usuario)
+                self._registros.colocar(usuario, atual, atual[1].memoria())
+                self._registros.despejar(manter=usuario)
+            return atual[1]
+
+    def _sincronizar_registro(self, usuario, mudancas, ts):
+        # depois de gravar no estado; registro velho ou ausente é remontado do estado
+        with self._lock_registros:
+            atual = self._registros.obter(usuario)
+            if atual is not None and atual[0] == self.estado.versao(usuario):
+                for dispositivo, comodo, ligado in mudancas:
+                    atual[1].definir_nome(dispositivo, comodo, ligado, ts)
+
+    # aparelhos: a ordem vai pelo adaptador e o estado muda com a confirmação
+
+    async def acionar(self, usuario: str, dispositivo: str, comodo: str, ligado: bool, origem: str = ORIGEM_UI,
+                      atrasado: bool = False):
+        # no event loop; FalhaDispositivo se o gateway não confirmar (estado fica como estava)
+        await self.adaptador.enviar(Ordem(usuario, dispositivo, comodo, ligado))
+        await banco.executar(self.definir, usuario, dispositivo, comodo, ligado, origem, atrasado)
+
+    async def acionar_cena(self, usuario: str, nome: str, acao: bool = None, origem: str = ORIGEM_UI,
+                           atrasado: bool = False):
+        # as ordens da cena vão juntas; só o que foi confirmado muda de estado
+        mudancas = await banco.executar(self._mudancas_cena, usuario, nome, acao)
+        confirmadas = self._confirmadas(mudancas, await self.adaptador.enviar_varios(self._ordens(usuario, mudancas)))
+        if len(confirmadas) < len(mudancas):
+            log.warning("cena %s de %s: %d de %d aparelho(s) sem confirmação", nome, usuario,
+                        len(mudancas) - len(confirmadas), len(mudancas))
+        return await banco.executar(self._aplicar_mudancas, usuario, nome, confirmadas, acao, origem, atrasado)
+
+    def _enviar_de_thread(self, ordens) -> list:
+        # para quem não está no loop (agendador em thread, modo lote, scripts):
+        # as ordens vão ao adaptador no loop dele e esta thread espera até
+        # ESPERA_ORDENS; o que não confirmou a tempo volta como falha
+        if not ordens:
+            return []
+        loop = self._loop_adaptador()
+        try:
+            rodando = asyncio.get_running_loop()
+        except RuntimeError:
+            rodando = None
+        if rodando is loop:
+            raise RuntimeError("_enviar_de_thread chamado dentro do loop do adaptador; use await")
+        futuro = asyncio.run_coroutine_threadsafe(self.adaptador.enviar_varios(ordens), loop)
+        try:
+            return futuro.result(ESPERA_ORDENS)
+        except concurrent.futures.TimeoutError:
+            futuro.cancel()
+            log.warning("%d ordem(ns) sem confirmação em %.1f s", len(ordens), ESPERA_ORDENS)
+            return [FalhaDispositivo(f"{o.dispositivo} ({o.comodo}) sem confirmação em {ESPERA_ORDENS:.1f} s")
+                    for o in ordens]
+
+    # uso e relatório
+
+    def consumo(self, usuario: str) -> Consumo:
+        c = self._consumos.obter(usuario)
+        if c is None:
+            # primeira vez (ou despejado): refaz os agregados a partir do log de uso
+            c = Consumo(self.tarifa)
+            for _, dispositivo, comodo, ligado, ts in self.log.eventos(0, agora_ms() + 1, usuario):
+                if ligado:
+                    c.ligar(dispositivo, comodo, ts)
+                else:
+                    c.desligar(dispositivo, comodo, ts)
+            c = self._consumos.colocar(usuario, c)
+            self._consumos.despejar(manter=usuario)
+        return c
+
+    def instalacao(self, usuario: str) -> Instalacao:
+        inst = self._instalacoes.obter(usuario)
+        if inst is None:
+            inst = self._instalacoes.colocar(usuario, carregar_instalacao(usuario))
+            self._instalacoes.despejar(manter=usuario)
+        return inst
+
+    def definir_instalacao(self, usuario: str, inst: Instalacao):
+        salvar_instalacao(usuario, inst)
+        self._instalacoes.remover(usuario)
+        self._instalacoes.colocar(usuario, inst)
+
+    def registrar_uso(self, usuario: str, dispositivo: str, comodo: str, ligado: bool, ts: int = None):
+        ts = agora_ms() if ts is None else ts
+        # agregados antes do log: se forem refeitos do log depois, já trazem
+        # este evento e o desligar abaixo não acharia o intervalo aberto
+        consumo = self.consumo(usuario)
+        # histórico bruto (gravado em lote no usage_events)
+        self.log.registrar(usuario, dispositivo, comodo, ligado, ts)
+        # agregados do relatório atualizados na hora
+        self._atualizar_consumo(usuario, consumo, [(dispositivo, comodo, ligado)], ts)
+
+    def _atualizar_consumo(self, usuario, consumo, mudancas, ts):
+        for dispositivo, comodo, ligado in mudancas:
+            if ligado:
+                consumo.ligar(dispositivo, comodo, ts)
+                continue
+            fechado = consumo.desligar(dispositivo, comodo, ts)
+            if fechado is not None:
+                inicio, kwh, custo = fechado
+                self._avisar(IntervaloUso(usuario, dispositivo, comodo, inicio, ts, kwh, custo))
+
+    # agendamentos
+
+    def agendar(self, usuario: str, dispositivo: str, comodo: str, acao: bool, quando: datetime.datetime,
+                regra: int = 0):
+        if regra:
+            # o próximo horário sai da regra (recorrencia.criar)
+            ag = self.agendador.agendar(usuario, dispositivo, comodo, acao, regra=regra)
+        else:
+            if quando < datetime.datetime.now():
+                # agenda para o próximo dia se o horário ja passou
+                quando += datetime.timedelta(days=1)
+            ag = self.agendador.agendar(usuario, dispositivo, comodo, acao, quando.timestamp())
+        self._avisar(AgendamentoCriado(usuario, ag))
+        return ag
+
+    def otimizar_cargas(self, usuario: str, cargas, horas: int = None, agora: int = None) -> list:
+        # põe as cargas flexíveis nos quartos de hora de mais sol / tarifa mais
+        # baixa e agenda o liga/desliga de cada trecho; [otimizador.Colocacao].
+        # Sem `horas`, o horizonte vai até o prazo mais distante. Carga que não
+        # cabe antes do prazo (no_prazo False) volta sem agendamentos
+        agora = agora_ms() if agora is None else agora
+        horas = otimizador.horas_ate_prazo(agora, cargas) if horas is None else horas
+        flexiveis = {(c.dispositivo, c.comodo) for c in cargas}
+        # o que já está ligado (e não vai ser deslocado) come a sobra solar
+        base = sum(potencia(cat) for cat, nomes in self.dispositivos(usuario).items()
+                   for nome, ligado in nomes.items() if ligado and (cat, nome) not in flexiveis)
+        h = otimizador.horizonte(self.instalacao(usuario), self.tarifa, agora, horas, base)
+        colocacoes = otimizador.otimizar(h, cargas)
+        for col in colocacoes:
+            if not col.no_prazo:
+                continue
+            c = col.carga
+            for inicio, fim in col.trechos:
+                col.agendamentos.append(self.agendar(usuario, c.dispositivo, c.comodo, True, h.instante(inicio)))
+                col.agendamentos.append(self.agendar(usuario, c.dispositivo, c.comodo, False, h.instante(fim)))
+        return colocacoes
+
+    def agendamentos(self, usuario: str):
+        return self.agendador.listar(usuario)
+
+    def cancelar_agendamento(self, ident: int):
+        ag = self.agendador.cancelar(ident)
+        if ag is not None:
+            self._avisar(AgendamentoCancelado(ag.usuario, ag))
+        return ag
+
+    async def _executar_agendamentos(self, ags):
+        # vencidos juntos no loop: as ordens de todos seguem em paralelo pelo adaptador
+        await asyncio.gather(*(self._executar_agendamento_async(ag) for ag in ags))
+
+    async def _executar_agendamento_async(self, ag):
+        ok = True
+        try:
+            if ag.dispositivo == cenas.CENA:
+                await self.acionar_cena(ag.usuario, ag.comodo, ag.acao, ORIGEM_AGENDADOR, ag.atrasado)
+            else:
+                dispositivos = await banco.executar(self.estado.carregar, ag.usuario)
+                if ag.comodo in dispositivos.get(ag.dispositivo, {}):
+                    await self.acionar(ag.usuario, ag.dispositivo, ag.comodo, ag.acao, ORIGEM_AGENDADOR,
+                                       ag.atrasado)
+        except FalhaDispositivo as e:
+            ok = False
+            log.warning("agendamento %s não executado: %s", ag.id, e)
+        except Exception:
+            ok = False
+            log.exception("falha ao executar agendamento %s", ag.id)
+        self._avisar(AgendamentoExecutado(ag.usuario, ag, ok))
+
+    def _executar_agendamento(self, ag):
+        # agendador em thread: as mesmas ordens pelo adaptador, esperando aqui
+        ok = True
+        try:
+            if ag.dispositivo == cenas.CENA:
+                mudancas = self._mudancas_cena(ag.usuario, ag.comodo, ag.acao)
+                confirmadas = self._confirmadas(mudancas, self._enviar_de_thread(self._ordens(ag.usuario, mudancas)))
+                if len(confirmadas) < len(mudancas):
+                    log.warning("cena %s de %s: %d de %d aparelho(s) sem confirmação", ag.comodo, ag.usuario,
+                                len(mudancas) - len(confirmadas), len(mudancas))
+                self._aplicar_mudancas(ag.usuario, ag.comodo, confirmadas, ag.acao, ORIGEM_AGENDADOR, ag.atrasado)
+            else:
+                dispositivos = self.estado.carregar(ag.usuario)
+                if ag.comodo in dispositivos.get(ag.dispositivo, {}):
+                    erro, = self._enviar_de_thread([Ordem(ag.usuario, ag.dispositivo, ag.comodo, ag.acao)])
+                    if erro is not None:
+                        raise erro
+                    # aplica ação (mesmo sem sessão aberta, o estado fica salvo)
+                    self.definir(ag.usuario, ag.dispositivo, ag.comodo, ag.acao, ORIGEM_AGENDADOR, ag.atrasado)
+        except FalhaDispositivo as e:
+            ok = False
+            log.warning("agendamento %s não executado: %s", ag.id, e)
+        except Exception:
+            ok = False
+            log.exception("falha ao executar agendamento %s", ag.id)
+        self._avisar(AgendamentoExecutado(ag.usuario, ag, ok))
+
+    # assistente
+
+    def indice(self, usuario: str) -> IndiceEntidades:
+        # refeito só quando a lista de dispositivos do usuário muda
+        dispositivos = self.dispositivos(usuario)
+        versao = self.estado.versao(usuario)
+        atual = self._indices.obter(usuario)
+        if atual is None or atual[0] != versao:
+            atual = (versao, IndiceEntidades(dispositivos))
+            self._indices.remover(usuario)
+            self._indices.colocar(usuario, atual, tamanho_aproximado(atual[1]))
+            self._indices.despejar(manter=usuario)
+        return atual[1]
+
+    # memória
+
+    def memoria(self) -> dict:
+        # bytes aproximados de cada cache; os agregados de consumo crescem com
+        # o uso, então são medidos de novo aqui
+        for usuario in self._consumos.chaves():
+            self._consumos.medir(usuario)
+        partes = {
+            "estado": self.estado.memoria(),
+            "consumo": self._consumos.memoria(),
+            "indices": self._indices.memoria(),
+            "registros": self._registros.memoria(),
+            "instalacoes": self._instalacoes.memoria(),
+        }
+        partes["bytes"] = sum(p["bytes"] for p in partes.values())
+        return partes
+
+    @staticmethod
+    def _ordens(usuario, mudancas):
+        return [Ordem(usuario, c, n, v) for c, n, v in mudancas]
+
+    @staticmethod
+    def _confirmadas(mudancas, erros):
+        return [m for m, erro in zip(mudancas, erros) if erro is None]
+
+    def executar_comando(self, usuario: str, texto: str, rnd=None) -> Resultado:
+        # fora do loop (modo lote, scripts): a thread espera o adaptador
+        cmd, ordens = self._preparar_comando(usuario, texto)
+        return self._concluir_comando(usuario, cmd, ordens, self._enviar_de_thread(ordens), rnd)
+
+    async def executar_comando_async(self, usuario: str, texto: str, rnd=None) -> Resultado:
+        # no event loop (telas): o banco roda no executor e as ordens são
+        # esperadas no loop, sem prender uma thread do banco no gateway
+        cmd, ordens = await banco.executar(self._preparar_comando, usuario, texto)
+        erros = await self.adaptador.enviar_varios(ordens) if ordens else []
+        return await banco.executar(self._concluir_comando, usuario, cmd, ordens, erros, rnd)
+
+    def _preparar_comando(self, usuario, texto):
+        # (comando, ordens a mandar já): só liga/desliga imediato tem ordens
+        cmd = interpretador.interpretar(texto, self.indice(usuario))
+        if not cmd.ok or cmd.prazo or cmd.quando:
+            return cmd, []
+        if cmd.cena:
+            return cmd, self._ordens(usuario, self._mudancas_cena(usuario, cmd.cena, cmd.acao))
+        return cmd, [Ordem(usuario, cmd.dispositivo, cmd.comodo, cmd.acao)]
+
+    def _concluir_comando(self, usuario, cmd, ordens, erros, rnd=None) -> Resultado:
+        # agenda, ou aplica o que o adaptador confirmou, e monta a resposta
+        agendamento = None
+        alterados = 0
+        if cmd.ok:
+            # cenas vão para o agendador como dispositivo "cena" com o nome no cômodo
+            dispositivo, comodo = (cenas.CENA, cmd.cena) if cmd.cena else (cmd.dispositivo, cmd.comodo)
+            inicio = datetime.datetime.now()
+            if cmd.prazo:
+                # "por 2 horas até as 7h": o otimizador escolhe o trecho e agenda liga e desliga
+                carga = otimizador.CargaFlexivel(dispositivo, comodo, potencia(dispositivo), cmd.duracao, cmd.prazo)
+                col = self.otimizar_cargas(usuario, [carga])[0]
+                if not col.no_prazo:
+                    cmd.erro = interpretador.erro_prazo(cmd)
+                    return Resultado(interpretador.responder(cmd, rnd or random), cmd)
+                # a resposta sai dos trechos agendados de fato (liga, desliga, ...)
+                ags = col.agendamentos
+                cmd.trechos = [(datetime.datetime.fromtimestamp(liga.quando),
+                                datetime.datetime.fromtimestamp(desliga.quando))
+                               for liga, desliga in zip(ags[::2], ags[1::2])]
+                cmd.quando = cmd.trechos[0][0]
+                agendamento = ags[0].id
+                return Resultado(interpretador.responder(cmd, rnd or random), cmd, agendamento)
+            if cmd.quando:
+                ag = self.agendar(usuario, dispositivo, comodo, cmd.acao, cmd.quando, cmd.recorrencia)
+                agendamento, inicio = ag.id, datetime.datetime.fromtimestamp(ag.quando)
+                # horário que já passou hoje vai para amanhã: a resposta diz o de verdade
+                cmd.quando = inicio
+            elif cmd.cena:
+                mudancas = self._confirmadas([(o.dispositivo, o.comodo, o.ligado) for o in ordens], erros)
+                alterados = len(self._aplicar_mudancas(usuario, cmd.cena, mudancas, cmd.acao, ORIGEM_ASSISTENTE,
+                                                       False))
+            else:
+                erro, = erros
+                if erro is not None:
+                    cmd.erro = ERRO_APARELHO.format(disp=cmd.dispositivo.capitalize(), comodo=cmd.comodo.capitalize())
+                    return Resultado(interpretador.responder(cmd, rnd or random), cmd)
+                self.definir(usuario, cmd.dispositivo, cmd.comodo, cmd.acao, ORIGEM_ASSISTENTE)
+            if cmd.duracao:
+                # "por 2 horas": a ação contrária vai para o agendador junto
+                minutos = int(cmd.duracao.total_seconds() // 60)
+                if cmd.recorrencia:
+                    self.agendar(usuario, dispositivo, comodo, not cmd.acao, None,
+                                 recorrencia.deslocar(cmd.recorrencia, minutos))
+                else:
+                    self.agendar(usuario, dispositivo, comodo, not cmd.acao, inicio + cmd.duracao)
+        return Resultado(interpretador.responder(cmd, rnd or random, alterados), cmd, agendamento)
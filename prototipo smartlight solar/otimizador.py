@@ -0,0 +1,182 @@
+# otimizador.py
+# Deslocamento de cargas flexíveis: um aparelho que precisa funcionar N horas
+# até um prazo (aquecedor, ar condicionado, bomba) é posto nos quartos de hora
+# em que a energia sai mais barata — sobra de geração solar primeiro, depois
+# a tarifa mais baixa.
+# Guloso sobre as cargas (as de menor folga primeiro) e exato para cada uma:
+# o custo de cada quarto de hora é a energia que viria da rede vezes o preço,
+# a melhor janela contígua sai de somas de prefixo em O(quartos) e os
+# quartos usados descontam a sobra solar para as cargas seguintes.
+import datetime
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import solar
+from motor_energia import CurvaTarifa
+from solar import MS_POR_QUARTO, HORAS_POR_QUARTO
+from tarifa import Tarifa
+
+BLOCO = 256  # domicílios por grade em otimizar_lote
+HORIZONTE_MAXIMO = 7 * 24  # horas; prazo mais distante: a carga é posta dentro da semana
+
+
+@dataclass
+class CargaFlexivel:
+    dispositivo: str
+    comodo: str
+    potencia_kw: float
+    duracao: datetime.timedelta
+    prazo: datetime.datetime   # precisa ter terminado até aqui
+    contigua: bool = True      # False: pode ser fatiada em vários trechos
+
+
+@dataclass
+class Horizonte:
+    inicio_ms: int            # alinhado ao quarto de hora
+    excedente: np.ndarray     # kWh de sobra solar previstos por quarto de hora
+    preco: np.ndarray         # R$/kWh da rede por quarto de hora
+
+    def __len__(self):
+        return len(self.preco)
+
+    def instante(self, quarto: int) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp((self.inicio_ms + quarto * MS_POR_QUARTO) / 1000)
+
+
+@dataclass
+class Colocacao:
+    carga: CargaFlexivel
+    trechos: list              # [(quarto inicial, quarto final exclusivo)] no horizonte
+    custo: float               # R$ da energia comprada da rede
+    solar_kwh: float           # energia coberta pela sobra solar
+    no_prazo: bool = True
+    agendamentos: list = field(default_factory=list)
+
+
+def horizonte(inst: solar.Instalacao, tarifa: Tarifa, inicio_ms: int, horas: int = 24,
+              carga_base_kw: float = 0.0, fuso_ms: int = None) -> Horizonte:
+    # previsão a partir do próximo quarto de hora: geração de céu claro menos
+    # a carga que já fica ligada, e o preço da tarifa em cada quarto (fuso_ms
+    # None: horário local de cada hora, horário de verão incluso)
+    q0 = -(-inicio_ms // MS_POR_QUARTO)
+    n = horas * 4
+    geracao = solar.geracao_entre(inst, q0, q0 + n - 1)
+    excedente = np.maximum(geracao - carga_base_kw * HORAS_POR_QUARTO, 0.0)
+    t = q0 * MS_POR_QUARTO + np.arange(n, dtype=np.int64) * MS_POR_QUARTO
+    curva = CurvaTarifa.cobrindo(tarifa, int(t[0]), int(t[-1]), fuso_ms)
+    preco = curva.preco[t // (4 * MS_POR_QUARTO) - curva.h0]
+    return Horizonte(q0 * MS_POR_QUARTO, excedente, preco)
+
+
+def horas_ate_prazo(inicio_ms: int, cargas) -> int:
+    # horas de horizonte para cobrir o prazo mais distante das cargas (o
+    # horizonte começa no próximo quarto de hora, daí o quarto a mais)
+    prazo_ms = max(c.prazo.timestamp() * 1000 for c in cargas)
+    horas = -(-(prazo_ms - inicio_ms + MS_POR_QUARTO) // (4 * MS_POR_QUARTO))
+    return int(min(HORIZONTE_MAXIMO, max(1, horas)))
+
+
+def _pedidos(h: Horizonte, cargas):
+    # arrays de cada carga (quartos, prazo em quartos, energia por quarto,
+    # contígua, no prazo) já na ordem de colocação: menor folga primeiro;
+    # empate: mais energia primeiro, depois a ordem de chegada
+    n, m = len(h), len(cargas)
+    duracao = np.fromiter((c.duracao.total_seconds() for c in cargas), np.float64, m)
+    limite = np.fromiter((c.prazo.timestamp() for c in cargas), np.float64, m)
+    potencia = np.fromiter((c.potencia_kw for c in cargas), np.float64, m)
+    contigua = np.fromiter((c.contigua for c in cargas), bool, m)
+    quartos = np.maximum(np.ceil(duracao * 1000 / MS_POR_QUARTO), 1).astype(np.int64)
+    prazo = np.minimum(np.floor((limite * 1000 - h.inicio_ms) / MS_POR_QUARTO), n).astype(np.int64)
+    folga = prazo - quartos
+    ordem = np.lexsort((np.arange(m), -potencia * quartos, folga))
+    no_prazo = folga >= 0
+    # não cabe antes do prazo: começa já e termina o quanto antes
+    quartos = np.where(no_prazo, quartos, np.minimum(quartos, n))
+    prazo = np.where(no_prazo, prazo, quartos)
+    return (ordem, quartos[ordem], prazo[ordem], potencia[ordem] * HORAS_POR_QUARTO, contigua[ordem],
+            no_prazo[ordem])
+
+
+def otimizar(h: Horizonte, cargas) -> list:
+    # devolve uma Colocacao por carga, na ordem recebida
+    return otimizar_lote([(h, cargas)])[0]
+
+
+def otimizar_lote(casos) -> list:
+    # casos: [(Horizonte, [CargaFlexivel])], um por domicílio; devolve
+    # [[Colocacao]] na mesma ordem. Os domicílios andam juntos: no passo k,
+    # a k-ésima carga de cada um é colocada de uma vez numa grade
+    # (domicílios x quartos de hora)
+    saida = [[None] * len(cargas) for _, cargas in casos]
+    grupos = {}
+    for d, (h, _) in enumerate(casos):
+        grupos.setdefault(len(h), []).append(d)
+    for n, doms in grupos.items():
+        # em blocos: as grades de trabalho ficam no cache do processador
+        for b in range(0, len(doms), BLOCO):
+            bloco = doms[b:b + BLOCO]
+            _otimizar_grupo([casos[d] for d in bloco], [saida[d] for d in bloco], n)
+    return saida
+
+
+def _otimizar_grupo(casos, saida, n):
+    pedidos = [_pedidos(h, cargas) for h, cargas in casos]
+    passos = max((len(cargas) for _, cargas in casos), default=0)
+    nd = len(casos)
+    # pedido do passo k de cada domicílio (sem carga nesse passo: inativo)
+    quartos = np.zeros((passos, nd), np.int64)
+    prazo = np.zeros((passos, nd), np.int64)
+    energia = np.zeros((passos, nd))
+    contigua = np.ones((passos, nd), bool)
+    ativo = np.zeros((passos, nd), bool)
+    for d, (_, q, pz, e, cont, _) in enumerate(pedidos):
+        m = len(q)
+        quartos[:m, d], prazo[:m, d], energia[:m, d], contigua[:m, d], ativo[:m, d] = q, pz, e, cont, True
+    excedente = np.stack([h.excedente for h, _ in casos]).astype(np.float64) if nd else None
+    preco = np.stack([h.preco for h, _ in casos]) if nd else None
+
+    t = np.arange(n)
+    linhas = np.arange(nd)[:, None]
+    acumulado = np.zeros((nd, n + 1))
+    inicio = np.zeros((passos, nd), np.int64)
+    custo_k = np.zeros((passos, nd))
+    solar_k = np.zeros((passos, nd))
+    fatiados = {}  # (passo, domicílio) -> [(início, fim)]
+    for k in range(passos if n else 0):
+        q, pz, e = quartos[k][:, None], prazo[k][:, None], energia[k][:, None]
+        # custo de cada quarto de hora: energia que viria da rede x preço
+        custo = np.maximum(e - excedente, 0.0) * preco
+        np.cumsum(custo, axis=1, out=acumulado[:, 1:])
+        # melhor janela contígua [a, a + q) com a + q <= prazo: somas de prefixo
+        fim = t + q
+        janelas = acumulado[linhas, np.minimum(fim, n)] - acumulado[:, :n]
+        janelas[fim > pz] = np.inf
+        a = np.argmin(janelas, axis=1)
+        usados = (t >= a[:, None]) & (t < a[:, None] + q)
+        soltos = np.flatnonzero(~contigua[k] & ativo[k])
+        if len(soltos):
+            # fatiável: os q quartos mais baratos antes do prazo
+            ordem = np.argsort(np.where(t < pz[soltos], custo[soltos], np.inf), axis=1, kind="stable")
+            posicao = np.empty_like(ordem)
+            np.put_along_axis(posicao, ordem, np.broadcast_to(t, ordem.shape), axis=1)
+            escolhidos = posicao < q[soltos]
+            usados[soltos] = escolhidos
+            # trechos de todos os fatiados do passo de uma vez: bordas 0->1 e 1->0
+            bordas = np.diff(escolhidos.astype(np.int8), prepend=0, append=0, axis=1)
+            linha_ini, col_ini = np.nonzero(bordas == 1)
+            _, col_fim = np.nonzero(bordas == -1)
+            cortes = np.cumsum(np.bincount(linha_ini, minlength=len(soltos)))[:-1]
+            for d, ini, fim_ in zip(soltos.tolist(), np.split(col_ini, cortes), np.split(col_fim, cortes)):
+                fatiados[(k, d)] = list(zip(ini.tolist(), fim_.tolist()))
+        usados &= ativo[k][:, None]
+        inicio[k] = a
+        custo_k[k] = (custo * usados).sum(axis=1)
+        solar_k[k] = (np.minimum(e, excedente) * usados).sum(axis=1)
+        excedente = np.where(usados, np.maximum(excedente - e, 0.0), excedente)
+
+    inicio, fim, custo_k, solar_k = inicio.T.tolist(), (inicio + quartos).T.tolist(), custo_k.T.tolist(), solar_k.T.tolist()
+    for d, ((_, cargas), (ordem, _, _, _, _, no_prazo), out) in enumerate(zip(casos, pedidos, saida)):
+        for k, (i, ok) in enumerate(zip(ordem.tolist(), no_prazo.tolist())):
+            trechos = fatiados.get((k, d)) or ([(inicio[d][k], fim[d][k])] if n else [])
+            out[i] = Colocacao(cargas[i], trechos, custo_k[d][k], solar_k[d][k], ok)
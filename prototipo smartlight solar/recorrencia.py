@@ -0,0 +1,74 @@
+# recorrencia.py
+# Regras de repetição dos agendamentos ("todo dia às 22:00", "dias úteis às 7:00").
+# Uma regra cabe num inteiro: 7 bits de dias da semana (bit 0 = segunda) e o
+# minuto do dia nos 11 bits de baixo. O próximo disparo sai em O(1) girando a
+# máscara até o dia de hoje e pegando o bit ligado mais baixo.
+import datetime
+
+TODO_DIA = 0b1111111
+DIAS_UTEIS = 0b0011111
+FIM_DE_SEMANA = 0b1100000
+
+_BITS_MINUTO = 11
+_MASCARA_MINUTO = (1 << _BITS_MINUTO) - 1
+
+NOMES_DIAS = ["segunda", "terça", "quarta", "quinta", "sexta", "sábado", "domingo"]
+
+
+def criar(mascara: int, hora: int, minuto: int) -> int:
+    if not 0 < mascara <= TODO_DIA:
+        raise ValueError("regra sem dias da semana")
+    if not (0 <= hora < 24 and 0 <= minuto < 60):
+        raise ValueError("horário inválido")
+    return (mascara << _BITS_MINUTO) | (hora * 60 + minuto)
+
+
+def mascara_de(regra: int) -> int:
+    return regra >> _BITS_MINUTO
+
+
+def horario_de(regra: int):
+    minuto = regra & _MASCARA_MINUTO
+    return divmod(minuto, 60)
+
+
+def proxima(regra: int, depois: float) -> float:
+    # primeiro disparo estritamente depois de `depois` (epoch em segundos, hora local)
+    mascara = mascara_de(regra)
+    hora, minuto = horario_de(regra)
+    ref = datetime.datetime.fromtimestamp(depois)
+    hoje = ref.replace(hour=hora, minute=minuto, second=0, microsecond=0)
+    dia = ref.weekday()
+    # bit k da máscara girada = dia (hoje + k)
+    girada = ((mascara >> dia) | (mascara << (7 - dia))) & TODO_DIA
+    if hoje.timestamp() <= depois:
+        girada &= ~1  # hoje já passou
+    k = (girada & -girada).bit_length() - 1 if girada else 7
+    return (hoje + datetime.timedelta(days=k)).timestamp()
+
+
+def descrever(regra: int) -> str:
+    mascara = mascara_de(regra)
+    hora, minuto = horario_de(regra)
+    if mascara == TODO_DIA:
+        dias = "todo dia"
+    elif mascara == DIAS_UTEIS:
+        dias = "dias úteis"
+    elif mascara == FIM_DE_SEMANA:
+        dias = "fim de semana"
+    else:
+        nomes = [n for i, n in enumerate(NOMES_DIAS) if mascara >> i & 1]
+        dias = ("todo " if nomes[0] in ("sábado", "domingo") else "toda ") + (
+            ", ".join(nomes[:-1]) + " e " + nomes[-1] if len(nomes) > 1 else nomes[0])
+    return f"{dias} às {hora:02d}:{minuto:02d}"
+
+
+def deslocar(regra: int, minutos: int) -> int:
+    # mesma regra `minutos` depois (o desligar de "todo dia às 23h por 2 horas"
+    # cai no dia seguinte: a máscara gira junto)
+    hora, minuto = horario_de(regra)
+    dias, minuto = divmod(hora * 60 + minuto + minutos, 24 * 60)
+    dias %= 7
+    mascara = mascara_de(regra)
+    mascara = ((mascara << dias) | (mascara >> (7 - dias))) & TODO_DIA
+    return criar(mascara, *divmod(minuto, 60))
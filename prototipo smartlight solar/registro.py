@@ -0,0 +1,244 @@
+# registro.py
+# Registro compacto dos dispositivos de uma casa grande (condomínio,
+# escritório, milhares de aparelhos). Categorias e cômodos são internados em
+# ids inteiros; cada dispositivo é um id denso (0, 1, 2...) com a categoria e
+# o cômodo em arrays tipados, o liga/desliga num bitset (1 bit por aparelho),
+# a potência em float32 e o instante da última mudança em int64.
+# Nome -> id por uma tabela densa cômodo x categoria (int32, -1 = não
+# existe): as categorias são poucas, então a linha de cada cômodo é curta.
+# Busca por id ou por nome em O(1); consultas em massa ("tudo ligado no
+# cômodo X", "quais cômodos têm a palavra sala") são operações NumPy sobre
+# esses arrays, sem percorrer dicionários de strings.
+# O estado gravado continua em estado.py ({categoria: {comodo: bool}}); o
+# registro é montado a partir dele (montar) e acompanha cada mudança.
+import array
+import threading
+
+import numpy as np
+
+from cache_usuarios import tamanho_aproximado
+from consumo import potencia
+from texto import normalize_text
+
+
+class Internador:
+    # str <-> id denso, na ordem em que os nomes aparecem
+    def __init__(self):
+        self.ids = {}
+        self.nomes = []
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def id(self, nome: str) -> int:
+        # cria o id na primeira vez
+        i = self.ids.get(nome)
+        if i is None:
+            i = self.ids[nome] = len(self.nomes)
+            self.nomes.append(nome)
+        return i
+
+    def buscar(self, nome: str):
+        return self.ids.get(nome)
+
+
+class Registro:
+    def __init__(self):
+        # os arrays não podem crescer com uma view NumPy aberta sobre eles,
+        # então leitura em massa e escrita passam pelo mesmo lock
+        self._lock = threading.Lock()
+        self.categorias = Internador()
+        self.comodos = Internador()
+        # (largura, tabela): id cômodo * largura + id categoria -> id do
+        # dispositivo; a largura (colunas por cômodo) dobra se faltar, e as
+        # duas trocam juntas para quem lê sem lock
+        self._grade = (8, array.array("i"))
+        self.categoria = array.array("H")    # id -> id da categoria
+        self.comodo = array.array("I")       # id -> id do cômodo
+        self.potencia_kw = array.array("f")  # id -> kW quando ligado
+        self.mudou_ms = array.array("q")     # id -> último liga/desliga (ms epoch; 0 = nunca)
+        self._bits = bytearray()             # bit i = dispositivo i ligado
+        self._normalizados = []              # id cômodo -> " nome normalizado " (feito na 1ª cena)
+        self._trechos = {}                   # trecho normalizado -> ids dos dispositivos (cache)
+
+    def __len__(self):
+        return len(self.categoria)
+
+    # cadastro
+
+    def adicionar(self, categoria: str, comodo: str, ligado: bool = False, potencia_kw: float = None,
+                  ts_ms: int = 0) -> int:
+        # id do dispositivo; se já existe, só devolve o id
+        with self._lock:
+            c = self.categorias.id(categoria)
+            m = self.comodos.id(comodo)
+            largura, tabela = self._grade
+            if c == largura:
+                largura, tabela = self._alargar()
+            if len(tabela) == m * largura:
+                tabela.extend(array.array("i", [-1]) * largura)
+            i = tabela[m * largura + c]
+            if i >= 0:
+                return i
+            i = tabela[m * largura + c] = len(self.categoria)
+            self.categoria.append(c)
+            self.comodo.append(m)
+            self.potencia_kw.append(potencia(categoria) if potencia_kw is None else potencia_kw)
+            self.mudou_ms.append(ts_ms)
+            if i % 8 == 0:
+                self._bits.append(0)
+            if ligado:
+                self._bits[i >> 3] |= 1 << (i & 7)
+            self._trechos.clear()
+            return i
+
+    def _alargar(self):
+        # categoria nova além da largura: refaz a tabela com o dobro de colunas
+        largura = self._grade[0] * 2
+        tabela = array.array("i", [-1]) * (len(self.comodos) * largura)
+        for i, (c, m) in enumerate(zip(self.categoria, self.comodo)):
+            tabela[m * largura + c] = i
+        self._grade = (largura, tabela)
+        return self._grade
+
+    # busca pontual, O(1)
+
+    def id(self, categoria: str, comodo: str):
+        # None se o dispositivo não existe
+        c = self.categorias.ids.get(categoria)
+        m = self.comodos.ids.get(comodo)
+        if c is None or m is None:
+            return None
+        largura, tabela = self._grade
+        try:
+            i = tabela[m * largura + c]
+        except IndexError:
+            # cômodo entrando agora, linha ainda não criada
+            return None
+        return i if i >= 0 else None
+
+    def nome(self, i: int):
+        # (categoria, comodo) do id
+        return self.categorias.nomes[self.categoria[i]], self.comodos.nomes[self.comodo[i]]
+
+    def ligado(self, i: int) -> bool:
+        return bool(self._bits[i >> 3] >> (i & 7) & 1)
+
+    def definir(self, i: int, ligado: bool, ts_ms: int = 0):
+        with self._lock:
+            if ligado:
+                self._bits[i >> 3] |= 1 << (i & 7)
+            else:
+                self._bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+            self.mudou_ms[i] = ts_ms
+
+    def definir_nome(self, categoria: str, comodo: str, ligado: bool, ts_ms: int = 0):
+        # o dispositivo entra no registro se ainda não estava
+        i = self.id(categoria, comodo)
+        if i is None:
+            i = self.adicionar(categoria, comodo, ligado, ts_ms=ts_ms)
+        self.definir(i, ligado, ts_ms)
+        return i
+
+    # consultas em massa (devolvem arrays NumPy de ids)
+
+    def _estados(self, ids):
+        # bit de cada id, sem desempacotar o bitset inteiro
+        bits = np.frombuffer(self._bits, dtype=np.uint8)
+        return ((bits[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def estados(self, ids) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            return self._estados(ids)
+
+    def ligados(self) -> np.ndarray:
+        # todos os ligados da casa
+        with self._lock:
+            bits = np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), bitorder="little")
+            return np.flatnonzero(bits[:len(self.categoria)])
+
+    def _linha(self, comodo):
+        # ids do cômodo (no máximo uma linha da tabela: NumPy não compensa)
+        m = self.comodos.buscar(comodo)
+        if m is None:
+            return []
+        largura, tabela = self._grade
+        return [i for i in tabela[m * largura:(m + 1) * largura] if i >= 0]
+
+    def do_comodo(self, comodo: str) -> np.ndarray:
+        return np.array(self._linha(comodo), dtype=np.int64)
+
+    def ligados_no_comodo(self, comodo: str) -> np.ndarray:
+        bits = self._bits
+        return np.array([i for i in self._linha(comodo) if bits[i >> 3] >> (i & 7) & 1], dtype=np.int64)
+
+    def da_categoria(self, categoria: str) -> np.ndarray:
+        c = self.categorias.buscar(categoria)
+        if c is None:
+            return np.empty(0, dtype=np.int64)
+        with self._lock:
+            return np.flatnonzero(np.frombuffer(self.categoria, dtype=np.uint16) == c)
+
+    def com_trecho(self, trecho: str) -> np.ndarray:
+        # dispositivos cujo cômodo contém `trecho` (já normalizado) em palavras
+        # inteiras, como em cenas ("quarto" pega todos os quartos); cada
+        # trecho é resolvido uma vez até entrar um dispositivo novo
+        with self._lock:
+            ids = self._trechos.get(trecho)
+            if ids is None:
+                for comodo in self.comodos.nomes[len(self._normalizados):]:
+                    self._normalizados.append(f" {normalize_text(comodo)} ")
+                alvo = f" {trecho} "
+                casam = np.zeros(len(self._normalizados), dtype=bool)
+                casam[[m for m, nome in enumerate(self._normalizados) if alvo in nome]] = True
+                ids = np.flatnonzero(casam[np.frombuffer(self.comodo, dtype=np.uint32)])
+                ids.flags.writeable = False  # fica no cache: quem recebe não altera
+                self._trechos[trecho] = ids
+            return ids
+
+    def selecionar(self, categoria: str = None, trecho: str = None, exceto: tuple = ()) -> np.ndarray:
+        # ids da categoria (None = todas) com o cômodo casando `trecho` (None = qualquer)
+        ids = self.com_trecho(trecho) if trecho is not None else np.arange(len(self), dtype=np.int64)
+        if categoria is None and not exceto:
+            return ids
+        with self._lock:
+            cats = np.frombuffer(self.categoria, dtype=np.uint16)[ids]
+        fica = np.ones(len(ids), dtype=bool)
+        if categoria is not None:
+            c = self.categorias.buscar(categoria)
+            if c is None:
+                return ids[:0]
+            fica &= cats == c
+        for categoria_fora in exceto:
+            c = self.categorias.buscar(categoria_fora)
+            if c is not None:
+                fica &= cats != c
+        return ids[fica]
+
+    def potencia_ligada(self, ids=None) -> float:
+        # kW somados dos ligados (de `ids` ou da casa toda)
+        ids = self.ligados() if ids is None else np.asarray(ids, dtype=np.int64)
+        if ids.size == 0:
+            return 0.0
+        with self._lock:
+            kw = np.frombuffer(self.potencia_kw, dtype=np.float32)[ids]
+            return float(kw[self._estados(ids)].sum(dtype=np.float64))
+
+    def memoria(self) -> int:
+        # bytes aproximados: arrays, bitset e tabelas de nomes
+        arrays = sum(a.buffer_info()[1] * a.itemsize for a in (self.categoria, self.comodo, self.potencia_kw,
+                                                                self.mudou_ms))
+        tabela = self._grade[1]
+        return (arrays + tabela.buffer_info()[1] * tabela.itemsize + len(self._bits)
+                + tamanho_aproximado(self.categorias.ids) + tamanho_aproximado(self.comodos.ids)
+                + tamanho_aproximado(self._normalizados))
+
+
+def montar(dispositivos: dict, ts_ms: int = 0) -> Registro:
+    # registro a partir do estado de estado.py ({categoria: {comodo: bool}})
+    reg = Registro()
+    for categoria, aparelhos in list(dispositivos.items()):
+        for comodo, ligado in list(aparelhos.items()):
+            reg.adicionar(categoria, comodo, ligado, ts_ms=ts_ms)
+    return reg
@@ -0,0 +1,231 @@
+# solar.py
+# Geração fotovoltaica estimada por um modelo de céu claro, vetorizada (NumPy)
+# sobre um ano inteiro em intervalos de 15 minutos, e o balanço com o consumo:
+# quanto do consumo foi coberto pelos painéis (autoconsumo), quanto sobrou
+# para a rede e o CO2 que a rede deixou de emitir.
+# A geração de um ano fica em cache por configuração da instalação.
+import functools
+import threading
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+import banco
+from consumo import FATOR_CO2
+
+MS_POR_QUARTO = 15 * 60 * 1000
+QUARTOS_POR_DIA = 96
+HORAS_POR_QUARTO = 0.25
+
+SQL_CARREGAR = ("SELECT potencia_kwp, inclinacao, azimute, latitude, longitude, perdas "
+                "FROM instalacao_solar WHERE usuario = ?")
+SQL_GRAVAR = ("INSERT OR REPLACE INTO instalacao_solar "
+              "(usuario, potencia_kwp, inclinacao, azimute, latitude, longitude, perdas) "
+              "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+@dataclass(frozen=True)
+class Instalacao:
+    # imutável e comparável por valor: é a chave do cache da geração
+    potencia_kwp: float = 3.0
+    inclinacao: float = 23.0    # graus a partir da horizontal
+    azimute: float = 0.0        # graus a partir do norte, sentido horário (0 = voltado ao norte)
+    latitude: float = -23.55    # graus, sul negativo (padrão: São Paulo)
+    longitude: float = -46.63   # graus, oeste negativo
+    perdas: float = 0.14        # inversor, cabos, sujeira e temperatura
+    albedo: float = 0.2
+
+
+INSTALACAO_PADRAO = Instalacao()
+
+
+def _inicio_ano_ms(ano: int) -> int:
+    return int(np.datetime64(f"{ano}-01-01", "ms").astype(np.int64))
+
+
+@functools.lru_cache(maxsize=256)
+def geracao_ano(inst: Instalacao, ano: int) -> np.ndarray:
+    # kWh gerados em cada quarto de hora do ano (UTC), em céu claro.
+    # Posição do sol pelas séries de Spencer (declinação e equação do tempo),
+    # massa de ar de Kasten-Young, irradiância direta de Meinel e difusa como
+    # 10% da direta; o plano dos painéis recebe a direta pelo cosseno do
+    # ângulo de incidência, a difusa e o reflexo do solo pelo fator de vista.
+    dias = int((_inicio_ano_ms(ano + 1) - _inicio_ano_ms(ano)) // (QUARTOS_POR_DIA * MS_POR_QUARTO))
+    # declinação e equação do tempo mudam de um dia para o outro (valor do
+    # meio-dia); o ângulo horário de cada quarto de hora é somado a elas por
+    # broadcasting numa grade dias x quartos, sem trigonometria por elemento
+    dia = np.arange(dias)[:, None]                                   # 0 = 1º de janeiro
+    hora = (np.arange(QUARTOS_POR_DIA) + 0.5) * HORAS_POR_QUARTO     # meio do intervalo, UTC
+    g = 2 * np.pi / dias * dia
+    eq_tempo = 229.18 * (0.000075 + 0.001868 * np.cos(g) - 0.032077 * np.sin(g)
+                         - 0.014615 * np.cos(2 * g) - 0.040849 * np.sin(2 * g))
+    decl = (0.006918 - 0.399912 * np.cos(g) + 0.070257 * np.sin(g) - 0.006758 * np.cos(2 * g)
+            + 0.000907 * np.sin(2 * g) - 0.002697 * np.cos(3 * g) + 0.00148 * np.sin(3 * g))
+    # ângulo horário = a (quarto) + b (dia): cos/sin pela soma de arcos
+    a = np.radians(hora * 15 + inst.longitude - 180)
+    b = np.radians(eq_tempo / 4)
+    cos_h = np.cos(a) * np.cos(b) - np.sin(a) * np.sin(b)
+    sin_h = np.sin(a) * np.cos(b) + np.cos(a) * np.sin(b)
+    lat = np.radians(inst.latitude)
+    # direção do sol em coordenadas locais (leste, norte, zênite)
+    cos_decl, sin_decl = np.cos(decl), np.sin(decl)
+    leste = -cos_decl * sin_h
+    norte = sin_decl * np.cos(lat) - cos_decl * np.sin(lat) * cos_h
+    cos_zen = np.sin(lat) * sin_decl + np.cos(lat) * cos_decl * cos_h
+
+    geracao = np.zeros(dias * QUARTOS_POR_DIA)
+    dia_claro = (cos_zen > 0.01).ravel()
+    cz = cos_zen.ravel()[dia_claro]
+    zenite = np.degrees(np.arccos(cz))
+    massa_ar = 1 / (cz + 0.50572 * (96.07995 - zenite) ** -1.6364)
+    extra = 1361 * (1 + 0.033 * np.cos(g))
+    direta = np.broadcast_to(extra, cos_zen.shape).ravel()[dia_claro] * 0.7 ** (massa_ar ** 0.678)
+    difusa = 0.1 * direta
+    global_h = direta * cz + difusa
+
+    beta, gama = np.radians(inst.inclinacao), np.radians(inst.azimute)
+    cos_incid = (leste.ravel()[dia_claro] * (np.sin(beta) * np.sin(gama))
+                 + norte.ravel()[dia_claro] * (np.sin(beta) * np.cos(gama)) + cz * np.cos(beta))
+    plano = (direta * np.maximum(cos_incid, 0) + difusa * ((1 + np.cos(beta)) / 2)
+             + global_h * (inst.albedo * (1 - np.cos(beta)) / 2))  # W/m²
+    geracao[dia_claro] = plano * (inst.potencia_kwp / 1000 * (1 - inst.perdas) * HORAS_POR_QUARTO)
+    geracao.setflags(write=False)  # compartilhado pelo cache
+    return geracao
+
+
+def geracao_entre(inst: Instalacao, primeiro: int, ultimo: int) -> np.ndarray:
+    # kWh por quarto de hora para os quartos epoch [primeiro, ultimo]
+    partes = []
+    q = primeiro
+    while q <= ultimo:
+        ano = int(np.datetime64(q * MS_POR_QUARTO, "ms").astype("datetime64[Y]").astype(np.int64)) + 1970
+        base = _inicio_ano_ms(ano) // MS_POR_QUARTO
+        ano_todo = geracao_ano(inst, ano)
+        fim = min(ultimo, base + len(ano_todo) - 1)
+        partes.append(ano_todo[q - base:fim - base + 1])
+        q = fim + 1
+    return np.concatenate(partes) if partes else np.zeros(0)
+
+
+@dataclass
+class Balanco:
+    consumo_kwh: float
+    geracao_kwh: float
+    autoconsumo_kwh: float   # consumo coberto pelos painéis, quarto a quarto
+    excedente_kwh: float     # geração que sobrou para a rede
+    co2_evitado_kg: float
+
+    @property
+    def fracao_solar(self) -> float:
+        return self.autoconsumo_kwh / self.consumo_kwh if self.consumo_kwh else 0.0
+
+
+def balanco(quartos: np.ndarray, kwh: np.ndarray, inst: Instalacao, ate_quarto: int = None,
+            fator_co2: float = FATOR_CO2) -> Balanco:
+    # quartos: índice epoch (ms // MS_POR_QUARTO) de cada parcela de consumo,
+    # podendo repetir; a geração é somada do primeiro quarto até ate_quarto
+    if not len(quartos):
+        return Balanco(0.0, 0.0, 0.0, 0.0, 0.0)
+    quartos = np.asarray(quartos, dtype=np.int64)
+    primeiro = int(quartos.min())
+    ultimo = int(quartos.max()) if ate_quarto is None else max(int(quartos.max()), ate_quarto)
+    consumo = np.bincount(quartos - primeiro, weights=kwh, minlength=ultimo - primeiro + 1)
+    geracao = geracao_entre(inst, primeiro, ultimo)
+    auto = np.minimum(consumo, geracao)
+    total_auto = float(auto.sum())
+    total_ger = float(geracao.sum())
+    # o que os painéis cobriram deixou de vir da rede
+    return Balanco(float(consumo.sum()), total_ger, total_auto, total_ger - total_auto, total_auto * fator_co2)
+
+
+class BalancoCorrente:
+    # o mesmo que balanco() sobre os agregados de um consumo.Consumo, mantido
+    # entre leituras: cada leitura refaz só os quartos que mudaram desde a
+    # anterior, soma a geração dos quartos novos e os dos aparelhos ainda
+    # ligados; o custo não cresce com o histórico
+
+    def __init__(self, inst: Instalacao, fator_co2: float = FATOR_CO2):
+        self.inst = inst
+        self.fator_co2 = fator_co2
+        self.primeiro = self.ultimo = None  # quartos com a geração já somada
+        self.consumo_kwh = self.geracao_kwh = self.autoconsumo_kwh = 0.0
+
+    def _estender(self, primeiro, ultimo):
+        if self.primeiro is None:
+            self.primeiro, self.ultimo = primeiro, primeiro - 1
+        if primeiro < self.primeiro:
+            self.geracao_kwh += float(geracao_entre(self.inst, primeiro, self.primeiro - 1).sum())
+            self.primeiro = primeiro
+        if ultimo > self.ultimo:
+            self.geracao_kwh += float(geracao_entre(self.inst, self.ultimo + 1, ultimo).sum())
+            self.ultimo = ultimo
+
+    def ler(self, consumo, agora_ms: int) -> Balanco:
+        ultimo = (agora_ms - 1) // MS_POR_QUARTO
+        mudados, abertos, fechados = consumo.quartos_mudados(ultimo, todos=self.primeiro is None)
+        quartos = np.fromiter(mudados.keys(), np.int64, len(mudados))
+        ligados = [inicio // MS_POR_QUARTO for inicio, _ in abertos if inicio < agora_ms]
+        bordas = ligados + ([int(quartos.min()), int(quartos.max())] if len(quartos) else [])
+        if bordas or self.primeiro is not None:
+            # geração do primeiro quarto com consumo até agora
+            self._estender(min(bordas, default=self.primeiro), max(bordas + [ultimo]))
+        if len(quartos):
+            atual = np.array([kwh for kwh, _ in mudados.values()])
+            somado = np.array([kwh for _, kwh in mudados.values()])
+            q0 = int(quartos.min())
+            g = geracao_entre(self.inst, q0, int(quartos.max()))[quartos - q0]
+            self.consumo_kwh += float(somado.sum())
+            self.autoconsumo_kwh += float((np.minimum(atual, g) - np.minimum(atual - somado, g)).sum())
+        consumo_kwh, auto = self.consumo_kwh, self.autoconsumo_kwh
+        if abertos:
+            # trecho em andamento: entra só nesta leitura, sobre o que já fechou em cada quarto
+            q0 = min(inicio for inicio, _ in abertos) // MS_POR_QUARTO
+            aberto = np.zeros(len(fechados))
+            for inicio, p in abertos:
+                if agora_ms <= inicio:
+                    continue
+                q = np.arange(inicio // MS_POR_QUARTO, ultimo + 1)
+                dur = np.minimum(agora_ms, (q + 1) * MS_POR_QUARTO) - np.maximum(inicio, q * MS_POR_QUARTO)
+                aberto[q - q0] += dur * p
+            if len(aberto):
+                fechado = np.asarray(fechados)
+                g = geracao_entre(self.inst, q0, ultimo)
+                consumo_kwh += float(aberto.sum())
+                auto += float((np.minimum(fechado + aberto, g) - np.minimum(fechado, g)).sum())
+        return Balanco(consumo_kwh, self.geracao_kwh, auto, self.geracao_kwh - auto, auto * self.fator_co2)
+
+
+_correntes = weakref.WeakKeyDictionary()  # consumo.Consumo -> BalancoCorrente
+_lock_correntes = threading.Lock()
+
+
+def balanco_consumo(consumo, inst: Instalacao, agora_ms: int) -> Balanco:
+    # balanço dos agregados do relatório (consumo.Consumo), com o trecho em
+    # andamento; um BalancoCorrente por consumo (refeito se a instalação mudar)
+    with _lock_correntes:
+        corrente = _correntes.get(consumo)
+        if corrente is None or corrente.inst != inst:
+            corrente = _correntes[consumo] = BalancoCorrente(inst)
+        return corrente.ler(consumo, agora_ms)
+
+
+def balanco_intervalos(iv, inst: Instalacao, motor=None) -> Balanco:
+    # balanço de um histórico (motor_energia.Intervalos), repartido em quartos de hora
+    from motor_energia import MotorEnergia
+    inicios, kwh = (motor or MotorEnergia()).por_periodo(iv, MS_POR_QUARTO)
+    return balanco(inicios // MS_POR_QUARTO, kwh, inst)
+
+
+# configuração por usuário
+
+def carregar_instalacao(usuario: str) -> Instalacao:
+    with banco.conexao() as conn:
+        row = conn.execute(SQL_CARREGAR, (usuario,)).fetchone()
+    return Instalacao(*row) if row else INSTALACAO_PADRAO
+
+
+def salvar_instalacao(usuario: str, inst: Instalacao):
+    with banco.conexao() as conn:
+        conn.execute(SQL_GRAVAR, (usuario, inst.potencia_kwp, inst.inclinacao, inst.azimute,
+                                  inst.latitude, inst.longitude, inst.perdas))
@@ -0,0 +1,94 @@
+# tarifa.py
+# Tarifas de energia com preço por hora do dia (postos tarifários), por
+# temporada do ano e com o adicional das bandeiras tarifárias do mês.
+# O preço de uma hora sai de uma tabela [mês][fim de semana][hora], montada
+# uma vez por tarifa; motor_energia.py usa a mesma tabela vetorizada.
+import os
+import time
+from dataclasses import dataclass, field
+
+FORA_PONTA = 0
+INTERMEDIARIO = 1
+PONTA = 2
+
+# adicional em R$/kWh de cada bandeira
+BANDEIRAS = {
+    "verde": 0.0,
+    "amarela": 0.01885,
+    "vermelha 1": 0.04463,
+    "vermelha 2": 0.07877,
+}
+
+MS_POR_HORA = 3_600_000
+
+# tarifa branca: ponta das 18h às 21h, intermediário uma hora antes e depois
+POSTOS_BRANCA = tuple(
+    PONTA if 18 <= h < 21 else INTERMEDIARIO if h in (17, 21) else FORA_PONTA for h in range(24)
+)
+
+
+@dataclass
+class Tarifa:
+    nome: str
+    precos: dict                 # temporada -> (fora ponta, intermediário, ponta) em R$/kWh
+    postos: tuple = (FORA_PONTA,) * 24  # posto de cada hora num dia útil; fim de semana é fora ponta
+    temporadas: tuple = None     # temporada de cada mês (jan..dez); None = a única de precos
+    bandeiras: dict = field(default_factory=dict)  # (ano, mes) -> nome da bandeira
+    bandeira_padrao: str = "verde"
+
+    def __post_init__(self):
+        if self.temporadas is None:
+            self.temporadas = (next(iter(self.precos)),) * 12
+        # tabela[mes - 1][fim de semana][hora] -> R$/kWh sem bandeira
+        self.tabela = tuple(
+            tuple(
+                tuple(self.precos[temporada][FORA_PONTA if fds else self.postos[h]] for h in range(24))
+                for fds in (0, 1)
+            )
+            for temporada in self.temporadas
+        )
+
+    def adicional(self, ano: int, mes: int) -> float:
+        return BANDEIRAS[self.bandeiras.get((ano, mes), self.bandeira_padrao)]
+
+    def definir_bandeira(self, ano: int, mes: int, bandeira: str):
+        if bandeira not in BANDEIRAS:
+            raise ValueError(f"bandeira desconhecida: {bandeira}")
+        self.bandeiras[(ano, mes)] = bandeira
+
+    def preco_local(self, lt: time.struct_time) -> float:
+        # R$/kWh na hora local lt (time.localtime)
+        return self.tabela[lt.tm_mon - 1][lt.tm_wday >= 5][lt.tm_hour] + self.adicional(lt.tm_year, lt.tm_mon)
+
+    def preco(self, ts_ms: int) -> float:
+        return self.preco_local(time.localtime(ts_ms / 1000))
+
+    def integral(self, inicio_ms: int, fim_ms: int) -> float:
+        # soma de duração (ms) x preço, hora a hora; custo = kWh por ms x integral
+        total = 0.0
+        t = inicio_ms
+        while t < fim_ms:
+            fim_hora = min(fim_ms, (t // MS_POR_HORA + 1) * MS_POR_HORA)
+            total += (fim_hora - t) * self.preco(t)
+            t = fim_hora
+        return total
+
+
+def convencional(preco: float = 0.80) -> Tarifa:
+    return Tarifa("convencional", {"ano todo": (preco, preco, preco)})
+
+
+def branca(fora_ponta: float = 0.66, intermediario: float = 0.96, ponta: float = 1.45) -> Tarifa:
+    return Tarifa("branca", {"ano todo": (fora_ponta, intermediario, ponta)}, POSTOS_BRANCA)
+
+
+TARIFAS = {"convencional": convencional, "branca": branca}
+
+
+def tarifa_padrao() -> Tarifa:
+    return TARIFAS[os.environ.get("SMARTLIGHT_TARIFA", "convencional")]()
+
+
+def reais(valor: float) -> str:
+    # 1234.5 -> "R$ 1.234,50"
+    return "R$ " + f"{valor:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
@@ -0,0 +1,24 @@
+# tests/conftest.py
+# Os testes importam os módulos do app direto da pasta acima e rodam num
+# SQLite temporário (nunca o usuarios.db do repositório).
+# Uso: python -m pytest -q   (a partir de "prototipo smartlight solar")
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_PASTA = tempfile.mkdtemp(prefix="smartlight-testes-")
+os.environ["SMARTLIGHT_DB"] = os.path.join(_PASTA, "testes.db")
+
+import pytest  # noqa: E402
+
+import banco  # noqa: E402
+
+
+@pytest.fixture
+def banco_vazio(tmp_path):
+    # banco novo (migrado) só para o teste
+    banco.configurar(str(tmp_path / "teste.db"))
+    yield banco
+    banco.configurar(os.environ["SMARTLIGHT_DB"])
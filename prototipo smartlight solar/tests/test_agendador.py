@@ -0,0 +1,85 @@
+# tests/test_agendador.py
+# Agendamentos perdidos enquanto o processo estava parado: o que cada
+# política faz ao carregar a tabela.
+import threading
+import time
+
+import pytest
+
+import banco
+import recorrencia
+from agendador import DESCARTAR, RECUPERAR_RECENTES, RECUPERAR_TODOS, SQL_INSERIR, Agendador
+
+
+def _gravar(atraso_s, regra=0):
+    with banco.conexao() as conn:
+        return conn.execute(SQL_INSERIR, ("ana", "lâmpada", "sala de estar", 1, time.time() - atraso_s,
+                                          regra)).lastrowid
+
+
+def _tabela():
+    with banco.conexao() as conn:
+        return dict(conn.execute("SELECT id, quando FROM agendamentos").fetchall())
+
+
+@pytest.fixture
+def perdidos(banco_vazio):
+    # 10 min e 2 h de atraso, e uma regra diária que perdeu o horário há 2 h
+    recente = _gravar(600)
+    antigo = _gravar(7200)
+    hora, minuto = time.localtime(time.time() - 7200)[3:5]
+    diario = _gravar(7200, recorrencia.criar(recorrencia.TODO_DIA, hora, minuto))
+    return recente, antigo, diario
+
+
+def _carregar(politica):
+    ag = Agendador(politica=politica, janela_recuperacao=3600)
+    ag._carregar()
+    return ag, {a.id: a for a in ag.listar("ana")}
+
+
+def test_executar_recupera_todos_como_atrasados(perdidos):
+    _, carregados = _carregar(RECUPERAR_TODOS)
+    assert set(carregados) == set(perdidos)
+    assert all(a.atrasado for a in carregados.values())
+    assert set(_tabela()) == set(perdidos)
+
+
+def test_descartar_apaga_os_unicos_e_reprograma_a_regra(perdidos):
+    recente, antigo, diario = perdidos
+    antes = time.time()
+    _, carregados = _carregar(DESCARTAR)
+    assert set(carregados) == {diario}
+    assert not carregados[diario].atrasado
+    assert antes < carregados[diario].quando <= antes + 86_400
+    assert _tabela() == {diario: carregados[diario].quando}
+
+
+def test_recentes_so_dentro_da_janela(perdidos):
+    recente, antigo, diario = perdidos
+    _, carregados = _carregar(RECUPERAR_RECENTES)
+    assert set(carregados) == {recente, diario}
+    assert carregados[recente].atrasado
+    assert not carregados[diario].atrasado and carregados[diario].quando > time.time()
+    assert set(_tabela()) == {recente, diario}
+
+
+def test_atrasados_disparam_ao_iniciar(perdidos):
+    recente, antigo, diario = perdidos
+    executados = []
+    todos = threading.Event()
+
+    def executar(ag):
+        executados.append(ag)
+        if len(executados) == 3:
+            todos.set()
+    ag = Agendador(executor=executar, politica=RECUPERAR_TODOS).iniciar()
+    try:
+        assert todos.wait(5)
+    finally:
+        ag.parar(timeout=5)
+    assert sorted(a.id for a in executados) == sorted(perdidos)
+    assert all(a.atrasado for a in executados)
+    # disparo único sai da tabela; a regra fica com o próximo horário
+    tabela = _tabela()
+    assert set(tabela) == {diario} and tabela[diario] > time.time()
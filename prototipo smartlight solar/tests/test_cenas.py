@@ -0,0 +1,82 @@
+# tests/test_cenas.py
+# cenas.mudancas (sobre o registro.Registro) tem de dar o mesmo que a cena
+# resolvida direto sobre o dicionário do estado, menos o que já está certo.
+import copy
+import random
+
+import pytest
+
+import cenas
+from estado import DISPOSITIVOS_PADRAO
+from registro import montar
+from texto import normalize_text
+
+
+def _casa(semente):
+    rnd = random.Random(semente)
+    dispositivos = copy.deepcopy(DISPOSITIVOS_PADRAO)
+    dispositivos["outros"] = {"alexa (sala de estar)": False, "smart tv (quarto do amom)": False,
+                              "aquecedor (lavanderia)": False}
+    for aparelhos in dispositivos.values():
+        for nome in aparelhos:
+            aparelhos[nome] = rnd.random() < 0.5
+    return dispositivos
+
+
+def _resolver(cena, dispositivos, acao=None):
+    # referência direta sobre o dicionário: todos os alvos da cena, mudando ou
+    # não; se dois itens pegam o mesmo aparelho, vale o último
+    alvo = {}
+    normalizados = {}
+    for item in cena.itens:
+        ligado = acao if item.ligado is None else item.ligado
+        if ligado is None:
+            continue
+        comodo = normalize_text(item.comodo) if item.comodo else None
+        for categoria, aparelhos in dispositivos.items():
+            if item.categoria is not None and categoria != item.categoria:
+                continue
+            if categoria in item.exceto:
+                continue
+            for nome in aparelhos:
+                if comodo is not None:
+                    norm = normalizados.get(nome)
+                    if norm is None:
+                        norm = normalizados[nome] = f" {normalize_text(nome)} "
+                    if f" {comodo} " not in norm:
+                        continue
+                alvo[(categoria, nome)] = ligado
+    return [(c, n, v) for (c, n), v in alvo.items()]
+
+
+def _esperado(nome, dispositivos, acao):
+    return {(c, n, v) for c, n, v in _resolver(cenas.obter(nome), dispositivos, acao)
+            if dispositivos[c][n] != v}
+
+
+NOMES = list(cenas.CENAS) + [cenas.nome_grupo(None, "sala"), cenas.nome_grupo("lâmpada", None),
+                             cenas.nome_grupo("lâmpada", "quarto"), cenas.nome_grupo(None, None),
+                             cenas.nome_grupo("outros", "sala de estar")]
+
+
+@pytest.mark.parametrize("nome", NOMES)
+@pytest.mark.parametrize("acao", [True, False])
+@pytest.mark.parametrize("semente", range(5))
+def test_mudancas_no_registro_igual_ao_dicionario(nome, acao, semente):
+    dispositivos = _casa(semente)
+    registro = montar(dispositivos)
+    assert set(cenas.mudancas(cenas.obter(nome), registro, acao)) == _esperado(nome, dispositivos, acao)
+
+
+def test_mudancas_acompanham_o_registro():
+    dispositivos = _casa(0)
+    registro = montar(dispositivos)
+    cena = cenas.obter("sair de casa")
+    for categoria, nome, ligado in cenas.mudancas(cena, registro):
+        registro.definir_nome(categoria, nome, ligado)
+    assert cenas.mudancas(cena, registro) == []
+    # aparelho novo entra na cena (o cache de trechos do registro é refeito)
+    registro.adicionar("outros", "ventilador (quarto do victor)", ligado=True)
+    assert cenas.mudancas(cena, registro) == [("outros", "ventilador (quarto do victor)", False)]
+    assert cenas.mudancas(cenas.obter(cenas.nome_grupo(None, "quarto")), registro, False) == [
+        ("outros", "ventilador (quarto do victor)", False)]
@@ -0,0 +1,45 @@
+# tests/test_consumo.py
+# Custo de aparelho ligado há dias: cada leitura do relatório só soma as
+# horas novas, e o valor confere com a tarifa hora a hora.
+import datetime
+import time
+
+import pytest
+
+from consumo import MS_POR_HORA, Consumo, potencia
+from tarifa import branca
+
+INICIO_MS = int(time.mktime(datetime.datetime(2026, 10, 1, 7, 40).timetuple()) * 1000)
+
+
+def test_custo_do_aberto_confere_e_so_soma_as_horas_novas(monkeypatch):
+    tarifa = branca()
+    c = Consumo(tarifa)
+    c.ligar("ar condicionado", "quarto", INICIO_MS)
+    c.ligar("lâmpada", "sala", INICIO_MS + 5 * MS_POR_HORA)
+    kw = potencia("ar condicionado") / MS_POR_HORA
+
+    consultas = []
+    preco = tarifa.preco
+    monkeypatch.setattr(tarifa, "preco", lambda ts: consultas.append(ts) or preco(ts))
+
+    agora = INICIO_MS + 3 * 24 * MS_POR_HORA
+    for passo in (0, 10 * 60_000, 50 * 60_000, 2 * MS_POR_HORA):
+        agora += passo
+        consultas.clear()
+        kwh, custo = c.linha("ar condicionado", "quarto", agora)
+        if passo:
+            assert len(consultas) <= passo // MS_POR_HORA + 2
+        assert custo == pytest.approx(kw * tarifa.integral(INICIO_MS, agora), rel=1e-12)
+    total = c.custo(agora)
+    por_disp, _, total_custos = c.custos(agora)
+    assert total == pytest.approx(total_custos, rel=1e-12)
+    assert por_disp[("lâmpada", "sala")] == pytest.approx(
+        potencia("lâmpada") / MS_POR_HORA * tarifa.integral(INICIO_MS + 5 * MS_POR_HORA, agora), rel=1e-12)
+
+    # religado: começa do zero
+    c.desligar("ar condicionado", "quarto", agora)
+    c.ligar("ar condicionado", "quarto", agora + MS_POR_HORA)
+    assert c.linha("ar condicionado", "quarto", agora + 2 * MS_POR_HORA)[1] == pytest.approx(
+        c.custo_por_dispositivo[("ar condicionado", "quarto")]
+        + kw * tarifa.integral(agora + MS_POR_HORA, agora + 2 * MS_POR_HORA), rel=1e-12)
@@ -0,0 +1,89 @@
+# tests/test_eventos_uso.py
+# Buffer de eventos de uso: lote que falha ao gravar volta para a fila.
+import sqlite3
+from contextlib import contextmanager
+
+import pytest
+
+import banco
+from eventos_uso import BufferCircular, LogUso
+
+
+def _gravados(usuario):
+    with banco.conexao() as conn:
+        return conn.execute("SELECT dispositivo, ligado FROM usage_events WHERE usuario = ? ORDER BY ts, id",
+                            (usuario,)).fetchall()
+
+
+@contextmanager
+def _banco_travado():
+    raise sqlite3.OperationalError("database is locked")
+    yield
+
+
+def test_buffer_devolver_volta_na_frente_e_encolhe_depois():
+    buf = BufferCircular(3)
+    buf.adicionar("a")
+    buf.adicionar("b")
+    lote = buf.drenar()
+    buf.adicionar("c")
+    buf.adicionar("d")
+    buf.devolver(lote)
+    assert len(buf) == 4 and buf.capacidade == 4
+    assert buf.drenar() == ["a", "b", "c", "d"]
+    # atraso gravado: capacidade normal de novo
+    assert buf.capacidade == 3 and not buf.cheio()
+
+
+def test_buffer_tem_limite_e_conta_descartados():
+    buf = BufferCircular(2, limite=4)
+    for item in "abc":
+        buf.forcar(item)
+    buf.devolver(["x", "y"])
+    assert buf.capacidade == 4 and buf.descartados == 1
+    assert buf.drenar() == ["y", "a", "b", "c"]
+
+
+def test_flush_com_falha_nao_perde_eventos(banco_vazio, monkeypatch):
+    log = LogUso(capacidade=8, intervalo_flush=60)
+    log.registrar("ana", "lampada", "sala", True, ts=1)
+    log.registrar("ana", "lampada", "sala", False, ts=2)
+
+    with monkeypatch.context() as m:
+        m.setattr(banco, "conexao", _banco_travado)
+        with pytest.raises(sqlite3.OperationalError):
+            log.flush()
+        # o que chegou durante a falha fica atrás do lote devolvido
+        log.registrar("ana", "ventilador", "quarto", True, ts=3)
+
+    assert log.eventos_gravados == 0
+    assert len(log._buffer) == 3
+    assert log.flush() == 3
+    assert _gravados("ana") == [("lampada", 1), ("lampada", 0), ("ventilador", 1)]
+    log.fechar()
+
+
+def test_registrar_varios_com_falha_devolve_pendente_e_lote(banco_vazio, monkeypatch):
+    log = LogUso(capacidade=2, intervalo_flush=60)
+    log.registrar("bia", "lampada", "sala", True, ts=1)
+    lote = [("bia", "tomada", "cozinha", True, 2), ("bia", "tomada", "cozinha", False, 3)]
+
+    with monkeypatch.context() as m:
+        m.setattr(banco, "conexao", _banco_travado)
+        log.registrar_varios(lote)  # falha fica no log, não em quem chamou
+
+    assert len(log._buffer) == 3
+    log.fechar()
+    assert _gravados("bia") == [("lampada", 1), ("tomada", 1), ("tomada", 0)]
+
+
+def test_registrar_com_buffer_cheio_e_banco_travado_nao_quebra(banco_vazio, monkeypatch):
+    log = LogUso(capacidade=2, intervalo_flush=60, limite=3)
+    with monkeypatch.context() as m:
+        m.setattr(banco, "conexao", _banco_travado)
+        for ts in range(1, 6):
+            log.registrar("caio", "lampada", "sala", ts % 2 == 1, ts=ts)
+    assert len(log._buffer) == 3 and log.eventos_descartados == 2
+    log.fechar()
+    assert log._buffer.capacidade == 2
+    assert _gravados("caio") == [("lampada", 1), ("lampada", 0), ("lampada", 1)]
@@ -0,0 +1,101 @@
+# tests/test_interpretador.py
+# Frases do assistente -> Comando (interpretador + léxico), com `agora` fixo.
+import datetime
+
+import pytest
+
+import cenas
+import lexico
+import recorrencia
+from estado import DISPOSITIVOS_PADRAO
+from indice_entidades import IndiceEntidades
+from interpretador import (ERRO_ACAO, ERRO_COMODO, ERRO_DISPOSITIVO, ERRO_DURACAO_CENA, ERRO_RECORRENCIA,
+                           interpretar)
+
+DOMINGO_23H = datetime.datetime(2026, 10, 18, 23, 0)
+QUARTA_9H = datetime.datetime(2026, 10, 14, 9, 0)
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceEntidades(DISPOSITIVOS_PADRAO)
+
+
+@pytest.mark.parametrize("texto, quando", [
+    # o horário de hoje já passou: amanhã
+    ("todo dia às 22h desligue a lâmpada da sala de estar", datetime.datetime(2026, 10, 19, 22, 0)),
+    # ainda dá hoje
+    ("todo dia às 23h30 ligue a lâmpada da sala de estar", datetime.datetime(2026, 10, 18, 23, 30)),
+    # hoje (domingo) não está na regra
+    ("nos dias úteis às 8h ligue a lâmpada da sala de estar", datetime.datetime(2026, 10, 19, 8, 0)),
+    ("toda segunda às 7h ligue a lâmpada da sala de estar", datetime.datetime(2026, 10, 19, 7, 0)),
+])
+def test_recorrente_quando_e_o_proximo_disparo(indice, texto, quando):
+    cmd = interpretar(texto, indice, DOMINGO_23H)
+    assert cmd.ok and cmd.recorrencia
+    assert cmd.quando == quando
+    assert cmd.quando.timestamp() == recorrencia.proxima(cmd.recorrencia, DOMINGO_23H.timestamp())
+
+
+def _hora(dia, hora, minuto=0):
+    return datetime.datetime(2026, 10, dia, hora, minuto)
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("Ligue a lâmpada da sala de estar",
+     dict(acao=True, dispositivo="lâmpada", comodo="sala de estar", quando=None)),
+    ("Desligue o ar condicionado do quarto do Amom às 10:00",
+     dict(acao=False, dispositivo="ar condicionado", comodo="quarto do amom", quando=_hora(14, 10))),
+    ("acenda a lâmpada do quarto do victor às 7h30 da noite", dict(acao=True, quando=_hora(14, 19, 30))),
+    ("apague a câmera da garagem amanhã às 7h", dict(acao=False, dispositivo="câmera", quando=_hora(15, 7))),
+    ("daqui a 30 minutos ligue a lâmpada da sala de estar", dict(quando=_hora(14, 9, 30))),
+    ("sexta às 20h ligue a lâmpada da sala de estar", dict(quando=_hora(16, 20), recorrencia=0)),
+    ("ligue a lâmpada da sala de estar por 2 horas", dict(duracao=datetime.timedelta(hours=2))),
+    ("ligue o ar condicionado do quarto do amom até as 7h", dict(duracao=datetime.timedelta(hours=22))),
+    ("ligue o ar condicionado do quarto do amom por 2 horas até as 7h",
+     dict(duracao=datetime.timedelta(hours=2), prazo=_hora(15, 7))),
+    ("desligue tudo da sala", dict(acao=False, cena="grupo:*:sala")),
+    ("ativar modo noite", dict(acao=True, cena="modo noite")),
+    ("desligue as lâmpadas", dict(acao=False, cena=cenas.nome_grupo("lâmpada", None))),
+    ("desligue os ares", dict(acao=False, cena=cenas.nome_grupo("ar condicionado", None))),
+    ("desligue as câmeras da garagem", dict(acao=False, cena=cenas.nome_grupo("câmera", "garagem"))),
+    ("todo dia às 22h desligue a lâmpada da sala de estar por 30 minutos",
+     dict(acao=False, quando=_hora(14, 22), duracao=datetime.timedelta(minutes=30))),
+    ("toda sexta às 23h ligue a lâmpada da sala de estar por 2 horas",
+     dict(quando=_hora(16, 23), duracao=datetime.timedelta(hours=2))),
+])
+def test_frases(indice, texto, esperado):
+    cmd = interpretar(texto, indice, QUARTA_9H)
+    assert cmd.ok, cmd.erro
+    assert {k: getattr(cmd, k) for k in esperado} == esperado
+
+
+@pytest.mark.parametrize("texto, cena, descricao", [
+    ("todo dia às 22h desligue a lâmpada da sala de estar", None, "todo dia às 22:00"),
+    ("toda segunda e quarta às 18h ligue a lâmpada da sala de estar", None, "toda segunda e quarta às 18:00"),
+    ("todo dia às 22:00 desligue as lâmpadas", cenas.nome_grupo("lâmpada", None), "todo dia às 22:00"),
+])
+def test_frases_recorrentes(indice, texto, cena, descricao):
+    cmd = interpretar(texto, indice, QUARTA_9H)
+    assert cmd.ok, cmd.erro
+    assert cmd.cena == cena
+    assert recorrencia.descrever(cmd.recorrencia) == descricao
+
+
+@pytest.mark.parametrize("texto, erro", [
+    ("ligue a geladeira", ERRO_DISPOSITIVO),
+    ("ligue a lâmpada", ERRO_COMODO.format(disp="lâmpada")),
+    ("faça um café", ERRO_ACAO),
+    ("todo dia ligue a lâmpada da sala de estar", ERRO_RECORRENCIA),
+    ("modo noite por 2 horas", ERRO_DURACAO_CENA.format(cena="modo noite")),
+])
+def test_frases_com_erro(indice, texto, erro):
+    assert interpretar(texto, indice, QUARTA_9H).erro == erro
+
+
+def test_lexico():
+    assert lexico.normalizar("Ligue a LÂMPADA, já!") == "ligue a lampada ja"
+    tokens = lexico.tokens(lexico.normalizar("Desligue tudo da sala às 7h30 da noite por 2 horas"))
+    assert [(t.tipo, t.valor) for t in tokens] == [
+        (lexico.DESLIGAR, "desligue"), (lexico.GRUPO, "tudo"), (lexico.HORA, (7, 30)),
+        (lexico.PERIODO, "noite"), (lexico.DURACAO, 120)]
@@ -0,0 +1,120 @@
+# tests/test_motor_energia.py
+# Motor vetorizado x consumo.Consumo (o caminho do relatório): mesmos kWh e
+# R$ no total, por dispositivo e por dia local, inclusive nas trocas de
+# horário de verão.
+import datetime
+import os
+import random
+import time
+
+import numpy as np
+import pytest
+
+from consumo import MS_POR_HORA, Consumo
+from motor_energia import MS_POR_DIA, Intervalos, MotorEnergia, bordas_periodos
+from tarifa import branca
+
+CATEGORIAS = ["ar condicionado", "lâmpada", "câmera", "aquecedor"]
+
+
+@pytest.fixture
+def fuso(monkeypatch):
+    def trocar(nome):
+        monkeypatch.setenv("TZ", nome)
+        time.tzset()
+    yield trocar
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _historico(inicio_ms, dias, n=400, semente=7):
+    rnd = random.Random(semente)
+    disps, comodos, inicio, fim = [], [], [], []
+    relogio = {}
+    for _ in range(n):
+        par = (rnd.choice(CATEGORIAS), f"comodo {rnd.randrange(6)}")
+        ini = max(relogio.get(par, inicio_ms), inicio_ms + rnd.randrange(dias * MS_POR_DIA))
+        fin = ini + rnd.randrange(60_000, 30 * MS_POR_HORA)
+        relogio[par] = fin + 1
+        disps.append(par[0])
+        comodos.append(par[1])
+        inicio.append(ini)
+        fim.append(fin)
+    return disps, comodos, inicio, fim
+
+
+def _conferir(disps, comodos, inicio, fim):
+    tarifa = branca()
+    ref = Consumo(tarifa)
+    for d, c, ini, fin in sorted(zip(disps, comodos, inicio, fim), key=lambda x: x[2]):
+        ref.ligar(d, c, ini)
+        ref.desligar(d, c, fin)
+    res = MotorEnergia(tarifa=tarifa).calcular(Intervalos.de_listas(disps, comodos, inicio, fim))
+
+    assert res.total_kwh == pytest.approx(ref.total_kwh, rel=1e-9)
+    assert res.custo_total == pytest.approx(ref.custo_total, rel=1e-9)
+    for chave, kwh in ref.por_dispositivo.items():
+        assert res.por_par[chave] == pytest.approx(kwh, rel=1e-9)
+        assert res.custo_por_par[chave] == pytest.approx(ref.custo_por_dispositivo[chave], rel=1e-9)
+    for comodo, kwh in ref.por_comodo.items():
+        assert res.por_comodo[comodo] == pytest.approx(kwh, rel=1e-9)
+        assert res.custo_por_comodo[comodo] == pytest.approx(ref.custo_por_comodo[comodo], rel=1e-9)
+    # cada período começa na meia-noite local do dia que o Consumo usa
+    por_dia = {datetime.date.fromtimestamp(k / 1000): v for k, v in res.por_periodo.items()}
+    custo_por_dia = {datetime.date.fromtimestamp(k / 1000): v for k, v in res.custo_por_periodo.items()}
+    assert por_dia.keys() == {d for d, v in ref.por_dia.items() if v > 1e-12}
+    for dia, kwh in por_dia.items():
+        assert kwh == pytest.approx(ref.por_dia[dia], rel=1e-9), dia
+        assert custo_por_dia[dia] == pytest.approx(ref.custo_por_dia[dia], rel=1e-9), dia
+
+
+@pytest.mark.parametrize("nome, inicio", [
+    ("Europe/Berlin", datetime.datetime(2023, 10, 20)),        # fim do verão: 29/10, 03:00 -> 02:00
+    ("Europe/Berlin", datetime.datetime(2024, 3, 25)),         # início: 31/03, 02:00 -> 03:00
+    ("America/Sao_Paulo", datetime.datetime(2018, 10, 28)),    # início à meia-noite: 04/11 começa 01:00
+    ("America/Sao_Paulo", datetime.datetime(2019, 2, 10)),     # fim à meia-noite: 16/02 tem 25 h
+])
+def test_motor_confere_com_consumo_no_horario_de_verao(fuso, nome, inicio):
+    fuso(nome)
+    if not os.path.exists(os.path.join("/usr/share/zoneinfo", nome)) and time.localtime().tm_gmtoff == 0:
+        pytest.skip(f"sem dados de fuso para {nome}")
+    inicio_ms = int(time.mktime(inicio.timetuple()) * 1000)
+    _conferir(*_historico(inicio_ms, dias=14))
+
+
+def test_dia_com_troca_de_horario_tem_23_ou_25_horas(fuso):
+    fuso("Europe/Berlin")
+    inicio = int(time.mktime(datetime.datetime(2023, 10, 27).timetuple()) * 1000)
+    fim = int(time.mktime(datetime.datetime(2024, 4, 2).timetuple()) * 1000)
+    horas = set((np.diff(bordas_periodos(inicio, fim, MS_POR_DIA)) // MS_POR_HORA).tolist())
+    assert horas == {23, 24, 25}
+
+
+def test_motor_confere_com_consumo():
+    inicio_ms = int(time.mktime(datetime.datetime(2026, 10, 1).timetuple()) * 1000)
+    _conferir(*_historico(inicio_ms, dias=21, semente=3))
+
+
+def test_de_eventos_segue_a_regra_do_consumo():
+    # ligar repetido não reinicia o intervalo, desligar solto é ignorado e o
+    # que ainda está ligado fecha em agora_ms
+    rnd = random.Random(11)
+    inicio_ms = int(time.mktime(datetime.datetime(2026, 10, 1).timetuple()) * 1000)
+    eventos = sorted((("ana", rnd.choice(CATEGORIAS), f"comodo {rnd.randrange(3)}", rnd.random() < 0.6,
+                       inicio_ms + rnd.randrange(5 * MS_POR_DIA)) for _ in range(300)), key=lambda e: e[4])
+    agora_ms = inicio_ms + 5 * MS_POR_DIA
+    tarifa = branca()
+    ref = Consumo(tarifa)
+    for _, d, c, ligado, ts in eventos:
+        (ref.ligar if ligado else ref.desligar)(d, c, ts)
+    assert ref.abertos
+
+    res = MotorEnergia(tarifa=tarifa).calcular(Intervalos.de_eventos(eventos, agora_ms))
+    por_par, por_comodo, total = ref.custos(agora_ms)
+    assert res.total_kwh == pytest.approx(ref.total(agora_ms), rel=1e-9)
+    assert res.custo_total == pytest.approx(total, rel=1e-9)
+    for d, c, kwh in ref.dispositivos(agora_ms):
+        assert res.por_par.get((d, c), 0.0) == pytest.approx(kwh, rel=1e-9, abs=1e-12)
+        assert res.custo_por_par.get((d, c), 0.0) == pytest.approx(por_par[(d, c)], rel=1e-9, abs=1e-12)
+    for c, reais in por_comodo.items():
+        assert res.custo_por_comodo[c] == pytest.approx(reais, rel=1e-9)
@@ -0,0 +1,107 @@
+# tests/test_nucleo.py
+# Comandos e agendamentos passam pelo adaptador: sem confirmação, o estado
+# não muda e a falha aparece na resposta / no evento.
+import asyncio
+import datetime
+import time
+
+import pytest
+
+import nucleo
+from consumo import MS_POR_HORA
+from adaptador import Adaptador, FalhaDispositivo
+from agendador import Agendador, Agendamento
+from eventos import AgendamentoExecutado, IntervaloUso
+from interpretador import Comando
+from nucleo import Controlador
+
+
+class AdaptadorQueFalha(Adaptador):
+    async def enviar(self, ordem):
+        raise FalhaDispositivo(f"{ordem.dispositivo} não confirmou")
+
+
+class AdaptadorMudo(Adaptador):
+    async def enviar(self, ordem):
+        await asyncio.sleep(60)
+
+
+@pytest.fixture
+def controlador(banco_vazio):
+    ctls = []
+
+    def criar(adaptador=None):
+        ctl = Controlador(agendador=Agendador(persistir=False), adaptador=adaptador)
+        ctls.append(ctl)
+        return ctl
+    yield criar
+    for ctl in ctls:
+        ctl.parar()
+
+
+def test_comando_confirmado_muda_estado(controlador):
+    ctl = controlador()
+    res = ctl.executar_comando("n1@teste", "ligue a lâmpada da sala de estar")
+    assert res.comando.ok and res.comando.erro is None
+    assert ctl.dispositivos("n1@teste")["lâmpada"]["sala de estar"] is True
+
+
+def test_comando_sem_confirmacao_responde_com_erro(controlador, monkeypatch):
+    monkeypatch.setattr(nucleo, "ESPERA_ORDENS", 0.2)
+    ctl = controlador(AdaptadorMudo())
+    inicio = time.monotonic()
+    res = ctl.executar_comando("n2@teste", "ligue a lâmpada da sala de estar")
+    assert time.monotonic() - inicio < 5
+    assert "não respondeu" in res.mensagem
+    assert ctl.dispositivos("n2@teste")["lâmpada"]["sala de estar"] is False
+
+
+def test_agendamento_em_thread_passa_pelo_adaptador(controlador):
+    ctl = controlador(AdaptadorQueFalha())
+    executados = []
+    ctl.eventos.assinar(AgendamentoExecutado, lambda e: executados.append(e.ok))
+    ctl._executar_agendamento(Agendamento(1, "n3@teste", "lâmpada", "sala de estar", True, time.time()))
+    assert executados == [False]
+    assert ctl.dispositivos("n3@teste")["lâmpada"]["sala de estar"] is False
+
+
+def test_comando_async_espera_no_loop(controlador):
+    ctl = controlador()
+
+    async def rodar():
+        ctl.iniciar(asyncio.get_running_loop())
+        try:
+            return await ctl.executar_comando_async("n4@teste", "desligue a câmera da garagem")
+        finally:
+            await asyncio.to_thread(ctl.agendador.parar)
+    res = asyncio.run(rodar())
+    assert res.comando.ok and res.comando.erro is None
+    assert ctl.dispositivos("n4@teste")["câmera"]["garagem"] is False
+
+
+@pytest.mark.parametrize("despejar", [False, True])
+def test_intervalo_de_uso_sai_mesmo_com_consumo_despejado(controlador, despejar):
+    # sem o Consumo em cache, ele é refeito do log antes de o desligar entrar nele
+    ctl = controlador()
+    usuario = f"n5-{despejar}@teste"
+    intervalos = []
+    ctl.eventos.assinar(IntervaloUso, intervalos.append)
+    t0 = nucleo.agora_ms() - MS_POR_HORA
+    ctl.registrar_uso(usuario, "lâmpada", "sala de estar", True, t0)
+    if despejar:
+        ctl._consumos.remover(usuario)
+    ctl.registrar_uso(usuario, "lâmpada", "sala de estar", False, t0 + MS_POR_HORA)
+    assert [(e.inicio_ms, e.fim_ms) for e in intervalos] == [(t0, t0 + MS_POR_HORA)]
+    assert ctl.consumo(usuario).total_kwh == pytest.approx(intervalos[0].kwh)
+
+
+def test_horario_que_ja_passou_responde_com_o_de_amanha(controlador):
+    # "ligue ... às 10:00" dito às 10:53: dispara amanhã às 10:00, e é isso que volta
+    ctl = controlador()
+    pedido = (datetime.datetime.now() - datetime.timedelta(hours=1)).replace(second=0, microsecond=0)
+    cmd = Comando(True, "lâmpada", "sala de estar", quando=pedido)
+    res = ctl._concluir_comando("n6@teste", cmd, [], [])
+    amanha = pedido + datetime.timedelta(days=1)
+    assert res.comando.quando == amanha
+    ag, = ctl.agendamentos("n6@teste")
+    assert ag.id == res.agendamento and ag.quando == amanha.timestamp()
@@ -0,0 +1,59 @@
+# tests/test_otimizador.py
+# Cargas flexíveis que não cabem antes do prazo.
+import datetime
+
+import numpy as np
+
+from agendador import Agendador
+from nucleo import Controlador
+from otimizador import CargaFlexivel, Horizonte, MS_POR_QUARTO, otimizar
+
+INICIO_MS = 1_800_000_000_000 // MS_POR_QUARTO * MS_POR_QUARTO
+
+
+def _horizonte(quartos=16):
+    # sem sol; preço sobe ao longo do horizonte (mais barato = mais cedo)
+    return Horizonte(INICIO_MS, np.zeros(quartos), np.linspace(0.5, 1.5, quartos))
+
+
+def _carga(nome, horas, prazo_quartos, contigua=True):
+    prazo = datetime.datetime.fromtimestamp((INICIO_MS + prazo_quartos * MS_POR_QUARTO) / 1000)
+    return CargaFlexivel(nome, "sala", 1.0, datetime.timedelta(hours=horas), prazo, contigua)
+
+
+def test_carga_que_nao_cabe_fica_fora_do_prazo():
+    h = _horizonte()
+    cargas = [_carga("cabe", 1, 8), _carga("curto", 3, 4), _carga("passado", 1, -4),
+              _carga("fatiada", 3, 4, contigua=False)]
+    colocacoes = otimizar(h, cargas)
+    assert [c.carga.dispositivo for c in colocacoes] == ["cabe", "curto", "passado", "fatiada"]
+    assert [c.no_prazo for c in colocacoes] == [True, False, False, False]
+    for col in colocacoes:
+        # mesmo fora do prazo, os trechos ficam dentro do horizonte
+        assert all(0 <= a < b <= len(h) for a, b in col.trechos)
+
+
+def test_carga_maior_que_o_horizonte_e_cortada():
+    h = _horizonte(8)
+    col, = otimizar(h, [_carga("longa", 5, 40)])
+    assert not col.no_prazo
+    assert col.trechos == [(0, 8)]
+
+
+def test_carga_fora_do_prazo_nao_rouba_lugar_das_outras():
+    h = _horizonte()
+    sozinha, = otimizar(h, [_carga("cabe", 1, 8)])
+    cabe, _ = otimizar(h, [_carga("cabe", 1, 8), _carga("curto", 3, 2)])
+    assert cabe.no_prazo and cabe.trechos == sozinha.trechos
+
+
+def test_controlador_nao_agenda_carga_fora_do_prazo(banco_vazio):
+    ctl = Controlador(agendador=Agendador(persistir=False))
+    try:
+        cargas = [_carga("lâmpada", 1, 8), _carga("ar condicionado", 3, 4)]
+        cabe, curto = ctl.otimizar_cargas("ana", cargas, agora=INICIO_MS)
+        assert cabe.no_prazo and len(cabe.agendamentos) == 2 * len(cabe.trechos) >= 2
+        assert not curto.no_prazo and curto.agendamentos == []
+        assert sorted(a.id for a in ctl.agendamentos("ana")) == sorted(a.id for a in cabe.agendamentos)
+    finally:
+        ctl.parar()
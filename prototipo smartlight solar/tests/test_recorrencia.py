@@ -0,0 +1,59 @@
+# tests/test_recorrencia.py
+# Regras de repetição: próximo disparo e deslocamento na virada da semana.
+import datetime
+
+import pytest
+
+import recorrencia
+from recorrencia import DIAS_UTEIS, FIM_DE_SEMANA, TODO_DIA
+
+SEGUNDA, SEXTA, SABADO, DOMINGO = 1, 1 << 4, 1 << 5, 1 << 6
+
+
+def _proxima(regra, depois: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(recorrencia.proxima(regra, depois.timestamp()))
+
+
+@pytest.mark.parametrize("mascara, hora, depois, esperado", [
+    # domingo 23h -> segunda seguinte
+    (SEGUNDA, 7, datetime.datetime(2026, 10, 18, 23, 0), datetime.datetime(2026, 10, 19, 7, 0)),
+    # exatamente no horário não conta: uma semana depois
+    (SEGUNDA, 7, datetime.datetime(2026, 10, 19, 7, 0), datetime.datetime(2026, 10, 26, 7, 0)),
+    # sexta depois do horário -> segunda (pula o fim de semana)
+    (DIAS_UTEIS, 8, datetime.datetime(2026, 10, 16, 9, 0), datetime.datetime(2026, 10, 19, 8, 0)),
+    # domingo depois do horário -> sábado seguinte
+    (FIM_DE_SEMANA, 10, datetime.datetime(2026, 10, 18, 11, 0), datetime.datetime(2026, 10, 24, 10, 0)),
+    # virada de mês e de ano
+    (TODO_DIA, 6, datetime.datetime(2026, 12, 31, 22, 0), datetime.datetime(2027, 1, 1, 6, 0)),
+])
+def test_proxima_na_virada_da_semana(mascara, hora, depois, esperado):
+    assert _proxima(recorrencia.criar(mascara, hora, 0), depois) == esperado
+
+
+@pytest.mark.parametrize("mascara, hora, minutos, mascara_nova, hora_nova", [
+    (DOMINGO, 23, 120, SEGUNDA, 1),                  # domingo 23h + 2 h = segunda 1h
+    (DIAS_UTEIS, 23, 120, DIAS_UTEIS << 1, 1),       # seg..sex 23h -> ter..sáb 1h
+    (SEXTA | SABADO | DOMINGO, 22, 180, SABADO | DOMINGO | SEGUNDA, 1),
+    (SEGUNDA, 7, 30, SEGUNDA, 7),                    # mesmo dia
+    (SEGUNDA, 7, 7 * 24 * 60, SEGUNDA, 7),           # uma semana inteira
+])
+def test_deslocar_gira_a_mascara(mascara, hora, minutos, mascara_nova, hora_nova):
+    deslocada = recorrencia.deslocar(recorrencia.criar(mascara, hora, 0), minutos)
+    assert recorrencia.mascara_de(deslocada) == mascara_nova
+    assert recorrencia.horario_de(deslocada) == (hora_nova, (hora * 60 + minutos) % 60)
+
+
+def test_desligar_de_domingo_a_noite_cai_na_segunda():
+    # "todo domingo às 23h ligue ... por 2 horas": o desligar é segunda 1h
+    liga = recorrencia.criar(DOMINGO, 23, 0)
+    desliga = recorrencia.deslocar(liga, 120)
+    depois = datetime.datetime(2026, 10, 18, 12, 0)  # domingo
+    assert _proxima(liga, depois) == datetime.datetime(2026, 10, 18, 23, 0)
+    assert _proxima(desliga, _proxima(liga, depois)) == datetime.datetime(2026, 10, 19, 1, 0)
+    assert recorrencia.descrever(desliga) == "toda segunda às 01:00"
+
+
+@pytest.mark.parametrize("mascara, hora, minuto", [(0, 7, 0), (TODO_DIA, 24, 0), (TODO_DIA, 7, 60)])
+def test_criar_recusa_regra_invalida(mascara, hora, minuto):
+    with pytest.raises(ValueError):
+        recorrencia.criar(mascara, hora, minuto)
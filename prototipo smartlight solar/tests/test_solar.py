@@ -0,0 +1,55 @@
+# tests/test_solar.py
+# Balanço solar corrente do relatório: leitura a leitura, igual ao balanço
+# refeito do zero sobre todos os quartos de hora do Consumo.
+import random
+
+import numpy as np
+import pytest
+
+import solar
+from consumo import MS_POR_QUARTO, Consumo
+
+T0 = 1_790_000_000_000
+
+
+def _do_zero(consumo, inst, agora_ms):
+    fechados, abertos = consumo.quartos()
+    quartos = [np.fromiter(fechados.keys(), np.int64, len(fechados))]
+    kwh = [np.fromiter(fechados.values(), np.float64, len(fechados))]
+    for inicio, p in abertos:
+        if agora_ms > inicio:
+            q = np.arange(inicio // MS_POR_QUARTO, (agora_ms - 1) // MS_POR_QUARTO + 1)
+            quartos.append(q)
+            kwh.append((np.minimum(agora_ms, (q + 1) * MS_POR_QUARTO) - np.maximum(inicio, q * MS_POR_QUARTO)) * p)
+    return solar.balanco(np.concatenate(quartos), np.concatenate(kwh), inst, (agora_ms - 1) // MS_POR_QUARTO)
+
+
+def _conferir(consumo, inst, agora_ms):
+    corrente, esperado = solar.balanco_consumo(consumo, inst, agora_ms), _do_zero(consumo, inst, agora_ms)
+    for campo in ("consumo_kwh", "geracao_kwh", "autoconsumo_kwh", "excedente_kwh", "co2_evitado_kg"):
+        assert getattr(corrente, campo) == pytest.approx(getattr(esperado, campo), rel=1e-9, abs=1e-12), campo
+
+
+def test_balanco_corrente_igual_ao_refeito():
+    rnd = random.Random(5)
+    consumo, inst = Consumo(), solar.Instalacao()
+    t = T0
+    for passo in range(400):
+        t += rnd.randrange(1, 3_000_000)
+        aparelho = (rnd.choice(["lâmpada", "ar condicionado", "câmera"]), f"comodo {rnd.randrange(3)}")
+        (consumo.ligar if rnd.random() < 0.55 else consumo.desligar)(*aparelho, t)
+        if passo % 9 == 0:
+            _conferir(consumo, inst, t + 1000)
+        if passo == 200:
+            inst = solar.Instalacao(potencia_kwp=5.0)  # instalação nova: refaz do zero
+    _conferir(consumo, inst, t + solar.QUARTOS_POR_DIA * MS_POR_QUARTO)
+
+
+def test_evento_antes_do_primeiro_quarto_estende_a_geracao():
+    consumo, inst = Consumo(), solar.Instalacao()
+    consumo.ligar("lâmpada", "sala", T0)
+    _conferir(consumo, inst, T0 + 10 * MS_POR_QUARTO)
+    consumo.ligar("ar condicionado", "quarto", T0 - 40 * MS_POR_QUARTO)
+    consumo.desligar("ar condicionado", "quarto", T0 - 30 * MS_POR_QUARTO)
+    _conferir(consumo, inst, T0 + 12 * MS_POR_QUARTO)
+    assert solar.balanco_consumo(Consumo(), inst, T0).consumo_kwh == 0.0
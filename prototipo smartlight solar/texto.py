@@ -0,0 +1,16 @@
+# texto.py
+# Normalização de texto usada pelo assistente (sem depender do Flet).
+import re
+import unicodedata
+
+_nao_alfanumerico = re.compile(r'[^a-z0-9\s]')
+
+
+def normalize_text(s: str) -> str:
+    if not s:
+        return ""
+    s = s.lower()
+    s = unicodedata.normalize("NFD", s)
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    s = _nao_alfanumerico.sub('', s)
+    return s